@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Every array starts on this boundary so it can be viewed in place from a memory map
+_ALIGN = 64
+
+
+class IndexFormatError(ValueError):
+    """Raised when an index file is missing its header or was written by another format version."""
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_array_file(path: str, magic: bytes, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Atomically write named arrays plus JSON metadata to ``path``.
+
+    The file starts with ``magic``, a little-endian header length and a JSON
+    header (``meta`` plus the layout of every array), followed by the aligned
+    raw array data.
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({**meta, "arrays": layout}).encode("utf-8")
+    data_start = _align(len(magic) + 4 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".idx")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(magic)
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_array_file(path: str, magic: bytes, format_version: int) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Memory-map a file written by :func:`write_array_file`.
+
+    Args:
+        path: File to open
+        magic: Expected leading bytes
+        format_version: Required value of the ``format_version`` metadata key
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, np.ndarray]]: The metadata and read-only array views
+
+    Raises:
+        FileNotFoundError: If ``path`` does not exist
+        IndexFormatError: If the file is not a compatible array file
+    """
+    preamble_size = len(magic) + 4
+    with open(path, "rb") as f:
+        preamble = f.read(preamble_size)
+        if len(preamble) < preamble_size or preamble[:len(magic)] != magic:
+            raise IndexFormatError(f"{path} does not start with {magic!r}.")
+        header_len = int.from_bytes(preamble[len(magic):], "little")
+        try:
+            meta = json.loads(f.read(header_len).decode("utf-8"))
+        except ValueError as e:
+            raise IndexFormatError(f"Corrupt header in {path}: {e}") from e
+
+    if meta.get("format_version") != format_version:
+        raise IndexFormatError(
+            f"Format {meta.get('format_version')} in {path} does not match {format_version}."
+        )
+
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    data_start = _align(preamble_size + header_len)
+    arrays = {}
+    for name, spec in meta.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        end = start + count * dtype.itemsize
+        if count and end > len(buffer):
+            raise IndexFormatError(f"{path} is truncated.")
+        arrays[name] = buffer[start:end].view(dtype).reshape(spec["shape"])
+    return meta, arrays
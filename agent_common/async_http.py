@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import random
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from .http_client import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_BACKOFF_JITTER,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_SIZE,
+    RETRY_STATUSES,
+    _env_float,
+    default_timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+# aiohttp sessions are bound to the event loop that created them
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+def build_async_session(pool_size: Optional[int] = None) -> aiohttp.ClientSession:
+    """
+    Create a keep-alive ``aiohttp`` session with the same pool size and timeouts as :func:`build_session`.
+
+    Must be called from a running event loop.
+    """
+    if pool_size is None:
+        pool_size = int(_env_float("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+    connect, read = default_timeout()
+    timeout = aiohttp.ClientTimeout(connect=connect, sock_read=read)
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=pool_size), timeout=timeout)
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """Return the session shared by every async tool running on the current event loop."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = build_async_session()
+        _sessions[loop] = session
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the current event loop's shared session and its pooled connections."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return DEFAULT_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, DEFAULT_BACKOFF_JITTER)
+
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+    """
+    Non-blocking GET with the retry policy of :func:`default_retry`.
+
+    Connection errors, timeouts and 429/5xx answers are retried up to
+    ``HTTP_MAX_RETRIES`` times with exponential backoff and jitter, honouring
+    ``Retry-After``; the last answer is returned as is.
+
+    Args:
+        url: Request URL
+        params: Query parameters
+
+    Returns:
+        Tuple[int, Any]: HTTP status and decoded JSON body (None if the body is not JSON)
+
+    Raises:
+        aiohttp.ClientError: If the connection keeps failing
+        asyncio.TimeoutError: If the request keeps timing out
+    """
+    retries = int(_env_float("HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+    session = get_async_session()
+    attempt = 0
+    while True:
+        try:
+            async with session.get(url, params=params) as response:
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    return response.status, data
+                delay = _backoff(attempt, response.headers.get("Retry-After"))
+                logger.debug(f"GET {url} returned {response.status}, retrying in {delay:.2f}s")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt >= retries:
+                raise
+            delay = _backoff(attempt)
+            logger.debug(f"GET {url} failed ({e!r}), retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
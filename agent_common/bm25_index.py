@@ -0,0 +1,584 @@
+import hashlib
+import logging
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .array_file import IndexFormatError, read_array_file, write_array_file
+from .paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GBM25IDX"
+FORMAT_VERSION = 3
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+DEFAULT_INDEX_NAME = "guest_bm25.idx"
+
+_ARRAY_NAMES = ("vocab_ptr", "vocab_blob", "idf", "post_ptr", "post_doc", "post_tf", "post_weight", "term_max", "doc_len")
+_TOKEN_RE = re.compile(r"\w+")
+# Queries scored per sparse product; bounds the size of the intermediate score matrix
+_QUERY_CHUNK = 256
+# Candidates scored exactly in the first pruning round (doubled every round)
+_PRUNE_BLOCK = 512
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokenizer shared by indexing and querying."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def compute_source_hash(texts: Iterable[str]) -> str:
+    """Return a SHA-256 digest identifying the exact list of indexed texts."""
+    digest = hashlib.sha256()
+    for text in texts:
+        encoded = text.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def top_k(doc_ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """
+    Select the ``k`` best ``(doc_id, score)`` pairs, best first.
+
+    ``argpartition`` narrows the candidates in linear time; ties on the cut-off
+    score are kept and broken by ascending document id so the ranking is fully
+    deterministic.
+    """
+    if k <= 0 or len(scores) == 0:
+        return []
+    if len(scores) > k:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        keep = scores >= kth
+        doc_ids, scores = doc_ids[keep], scores[keep]
+    order = np.lexsort((doc_ids, -scores))[:k]
+    return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+
+@dataclass
+class AnalyzedBatch:
+    """
+    Tokenized documents in a compact, picklable form.
+
+    Terms are numbered locally within the batch; ``term_idx``, ``doc_idx`` and
+    ``tf`` hold one entry per distinct (document, term) pair.
+    """
+    terms: List[str]
+    term_idx: np.ndarray
+    doc_idx: np.ndarray
+    tf: np.ndarray
+    doc_len: np.ndarray
+
+
+def analyze_texts(texts: Sequence[str]) -> AnalyzedBatch:
+    """Tokenize a batch of documents and count term frequencies."""
+    local_vocab: Dict[str, int] = {}
+    term_idx: List[int] = []
+    doc_idx: List[int] = []
+    tfs: List[int] = []
+    doc_len = np.zeros(len(texts), dtype=np.int32)
+
+    for doc, text in enumerate(texts):
+        tokens = tokenize(text)
+        doc_len[doc] = len(tokens)
+        counts = Counter(tokens)
+        term_idx.extend([local_vocab.setdefault(term, len(local_vocab)) for term in counts])
+        doc_idx.extend([doc] * len(counts))
+        tfs.extend(counts.values())
+
+    return AnalyzedBatch(
+        terms=list(local_vocab),
+        term_idx=np.asarray(term_idx, dtype=np.int32),
+        doc_idx=np.asarray(doc_idx, dtype=np.int32),
+        tf=np.asarray(tfs, dtype=np.int32),
+        doc_len=doc_len,
+    )
+
+
+class BM25Index:
+    """
+    Okapi BM25 index stored as flat arrays.
+
+    Postings are laid out term-major: the documents containing term ``t`` are
+    ``post_doc[post_ptr[t]:post_ptr[t + 1]]`` (sorted by document id) with their
+    term frequencies in ``post_tf``. The vocabulary is a UTF-8 blob sorted by
+    bytes so a term id can be found by binary search without building a dict,
+    which keeps opening a memory-mapped index independent of corpus size.
+
+    ``post_weight`` holds the precomputed BM25 contribution of every posting, so
+    the postings double as the CSR term-document matrix used for exhaustive
+    scoring: a batch of queries becomes a sparse query-term matrix and is scored
+    with one sparse matrix product. ``term_max`` holds the largest weight of
+    each term, the upper bound that lets :meth:`score_batch` prune documents
+    that cannot reach the top ``k``.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        self.vocab_ptr = arrays["vocab_ptr"]
+        self.vocab_blob = arrays["vocab_blob"]
+        self.idf = arrays["idf"]
+        self.post_ptr = arrays["post_ptr"]
+        self.post_doc = arrays["post_doc"]
+        self.post_tf = arrays["post_tf"]
+        self.post_weight = arrays["post_weight"]
+        self.term_max = arrays["term_max"]
+        self.doc_len = arrays["doc_len"]
+        self.source_hash: str = meta["source_hash"]
+        self.k1: float = meta["k1"]
+        self.b: float = meta["b"]
+        self.n_docs: int = meta["n_docs"]
+        self.n_terms: int = meta["n_terms"]
+        self.avgdl: float = meta["avgdl"]
+        self._matrix: Optional[sparse.csr_matrix] = None
+
+    @property
+    def version(self) -> str:
+        """Identifier that changes whenever the indexed data or format changes."""
+        return f"{FORMAT_VERSION}:{self.source_hash}"
+
+    @classmethod
+    def build(
+        cls,
+        texts: Sequence[str],
+        source_hash: Optional[str] = None,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+    ) -> "BM25Index":
+        """
+        Build an in-memory index from raw texts.
+
+        Args:
+            texts: Documents to index; document ids are positions in this sequence
+            source_hash: Precomputed hash of ``texts`` (computed when omitted)
+            k1: BM25 term-frequency saturation parameter
+            b: BM25 length-normalization parameter
+
+        Returns:
+            BM25Index: The built index
+        """
+        if source_hash is None:
+            source_hash = compute_source_hash(texts)
+        builder = BM25IndexBuilder(k1=k1, b=b)
+        builder.add(analyze_texts(texts))
+        return builder.finish(source_hash)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in _ARRAY_NAMES}
+
+    def save(self, path: str) -> None:
+        """Atomically write the index to ``path``."""
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "source_hash": self.source_hash,
+            "k1": self.k1,
+            "b": self.b,
+            "n_docs": self.n_docs,
+            "n_terms": self.n_terms,
+            "avgdl": self.avgdl,
+        }
+        write_array_file(path, MAGIC, meta, self._arrays())
+
+    @classmethod
+    def open(cls, path: str) -> "BM25Index":
+        """
+        Memory-map an index written by :meth:`save`.
+
+        Raises:
+            FileNotFoundError: If ``path`` does not exist
+            IndexFormatError: If the file is not a compatible index
+        """
+        meta, arrays = read_array_file(path, MAGIC, FORMAT_VERSION)
+        missing = set(_ARRAY_NAMES) - set(arrays)
+        if missing:
+            raise IndexFormatError(f"Index file {path} is missing arrays {sorted(missing)}.")
+        return cls(arrays, meta)
+
+    def term_id(self, term: str) -> int:
+        """Return the id of ``term`` or -1 when it is not in the vocabulary."""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = self.vocab_blob[self.vocab_ptr[mid]:self.vocab_ptr[mid + 1]].tobytes()
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """The ``n_terms x n_docs`` BM25 weight matrix, a view over the postings."""
+        if self._matrix is None:
+            self._matrix = sparse.csr_matrix(
+                (self.post_weight, self.post_doc, self.post_ptr),
+                shape=(self.n_terms, self.n_docs),
+                copy=False,
+            )
+        return self._matrix
+
+    def query_terms(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ascending ids of the indexed terms in ``query`` and their counts."""
+        counts: Dict[int, int] = {}
+        for term in tokenize(query):
+            tid = self.term_id(term)
+            if tid >= 0:
+                counts[tid] = counts.get(tid, 0) + 1
+        tids = sorted(counts)
+        return np.asarray(tids, dtype=np.int64), np.asarray([counts[tid] for tid in tids], dtype=np.float32)
+
+    def query_matrix(self, queries: Sequence[str]) -> sparse.csr_matrix:
+        """Encode queries as a ``len(queries) x n_terms`` matrix of query-term counts."""
+        indptr = [0]
+        indices: List[np.ndarray] = []
+        data: List[np.ndarray] = []
+        for query in queries:
+            tids, counts = self.query_terms(query)
+            indices.append(tids)
+            data.append(counts)
+            indptr.append(indptr[-1] + len(tids))
+        return sparse.csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+             np.concatenate(indices).astype(self.post_ptr.dtype) if indices else np.zeros(0, dtype=self.post_ptr.dtype),
+             np.asarray(indptr, dtype=self.post_ptr.dtype)),
+            shape=(len(queries), self.n_terms),
+        )
+
+    def score_batch_exhaustive(self, queries: Sequence[str], k: int = 3) -> List[List[Tuple[int, float]]]:
+        """
+        Score a batch of queries against every document and return each top ``k``.
+
+        This is the reference ranking :meth:`score_batch` reproduces.
+
+        Args:
+            queries: Query strings
+            k: Number of results per query
+
+        Returns:
+            List[List[Tuple[int, float]]]: For each query, ``(doc_id, score)`` pairs,
+            best first; documents sharing no term with the query are never returned
+        """
+        results: List[List[Tuple[int, float]]] = []
+        for start in range(0, len(queries), _QUERY_CHUNK):
+            scores = (self.query_matrix(queries[start:start + _QUERY_CHUNK]) @ self.matrix).tocsr()
+            for row in range(scores.shape[0]):
+                lo, hi = scores.indptr[row], scores.indptr[row + 1]
+                row_scores = scores.data[lo:hi]
+                positive = row_scores > 0
+                results.append(top_k(scores.indices[lo:hi][positive], row_scores[positive], k))
+        return results
+
+    def _postings(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = self.post_ptr[tid], self.post_ptr[tid + 1]
+        return self.post_doc[lo:hi], self.post_weight[lo:hi]
+
+    def _weights_at(self, tid: int, count: np.float32, docs: np.ndarray) -> np.ndarray:
+        """Query-weighted contribution of term ``tid`` to each of the sorted ``docs`` (0 where absent)."""
+        post_doc, post_weight = self._postings(tid)
+        pos = np.minimum(np.searchsorted(post_doc, docs), len(post_doc) - 1)
+        hit = post_doc[pos] == docs
+        weights = np.zeros(len(docs), dtype=np.float32)
+        weights[hit] = count * post_weight[pos[hit]]
+        return weights
+
+    def _exact_scores(self, tids: np.ndarray, counts: np.ndarray, docs: np.ndarray) -> np.ndarray:
+        # Accumulate in float32 in ascending term order, exactly like the sparse product
+        scores = np.zeros(len(docs), dtype=np.float32)
+        for tid, count in zip(tids, counts):
+            scores += self._weights_at(tid, count, docs)
+        return scores
+
+    def _prune_top_k(self, tids: np.ndarray, counts: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if len(tids) == 0 or k <= 0:
+            return []
+        if len(tids) == 1:
+            post_doc, post_weight = self._postings(tids[0])
+            return top_k(post_doc, counts[0] * post_weight, k)
+
+        # Per-term upper bounds in the same float32 arithmetic as the exact scores.
+        # Rounding is monotonic, so summing bounds in ascending term order never
+        # undershoots the score it bounds and pruning needs no tolerance.
+        bounds = counts * self.term_max[tids]
+
+        # Initial threshold: exact k-th best score among the best postings of the strongest term
+        post_doc, post_weight = self._postings(tids[np.argmax(bounds)])
+        threshold = np.float32(0.0)
+        if len(post_doc) >= k:
+            seeds = np.sort(post_doc[np.argpartition(-post_weight, k - 1)[:k]])
+            threshold = self._exact_scores(tids, counts, seeds).min()
+
+        # MaxScore split: a document containing only weak terms scores at most the sum
+        # of their bounds, which is below the threshold, so weak postings are never
+        # traversed; they are only probed for documents found through essential terms
+        weak = np.zeros(len(tids), dtype=bool)
+        for i in np.argsort(bounds, kind="stable"):
+            weak[i] = True
+            weak_bound = np.float32(0.0)
+            for bound in bounds[weak]:
+                weak_bound += bound
+            if not weak_bound < threshold:
+                weak[i] = False
+                break
+
+        essential = np.flatnonzero(~weak)
+        if len(essential) == 1:
+            candidates = self._postings(tids[essential[0]])[0]
+        else:
+            member = np.zeros(self.n_docs, dtype=bool)
+            for i in essential:
+                member[self._postings(tids[i])[0]] = True
+            candidates = np.flatnonzero(member)
+
+        # Upper bound per candidate: exact weights of essential terms, bounds of weak ones,
+        # accumulated in ascending term order
+        upper = np.zeros(len(candidates), dtype=np.float32)
+        scatter = np.zeros(self.n_docs, dtype=np.float32) if len(essential) > 1 else None
+        for i, (tid, count) in enumerate(zip(tids, counts)):
+            if weak[i]:
+                upper += bounds[i]
+            elif scatter is None:
+                upper += count * self._postings(tid)[1]
+            else:
+                post_doc, post_weight = self._postings(tid)
+                scatter[post_doc] = count * post_weight
+                upper += scatter[candidates]
+                scatter[post_doc] = 0.0
+
+        # Score candidates exactly in blocks, most promising first. The k-th result so
+        # far bounds the final k-th result in (-score, doc_id) order, so every remaining
+        # candidate whose upper bound ranks below it is dropped without being scored.
+        best: List[Tuple[int, float]] = []
+        block = _PRUNE_BLOCK
+        while len(candidates):
+            if len(candidates) > block:
+                take = np.zeros(len(candidates), dtype=bool)
+                take[np.argpartition(-upper, block - 1)[:block]] = True
+            else:
+                take = np.ones(len(candidates), dtype=bool)
+            docs = candidates[take]
+            scores = self._exact_scores(tids, counts, docs)
+            best = top_k(
+                np.concatenate([np.asarray([doc_id for doc_id, _ in best], dtype=docs.dtype), docs]),
+                np.concatenate([np.asarray([score for _, score in best], dtype=np.float32), scores]),
+                k,
+            )
+            candidates, upper = candidates[~take], upper[~take]
+            if len(best) == k:
+                kth_doc, kth_score = best[-1]
+                kth_score = np.float32(kth_score)
+                keep = (upper > kth_score) | ((upper == kth_score) & (candidates < kth_doc))
+                candidates, upper = candidates[keep], upper[keep]
+            block *= 2
+        return best
+
+    def score_batch(self, queries: Sequence[str], k: int = 3) -> List[List[Tuple[int, float]]]:
+        """
+        Return the top ``k`` documents of every query using dynamic pruning.
+
+        Per-term upper bounds (``term_max``) split each query into essential and
+        non-essential terms (MaxScore). Only documents containing an essential
+        term are scored, so the long postings of common words are merely probed.
+        The ranking, scores and tie-breaking are identical to
+        :meth:`score_batch_exhaustive`.
+
+        Args:
+            queries: Query strings
+            k: Number of results per query
+
+        Returns:
+            List[List[Tuple[int, float]]]: For each query, ``(doc_id, score)`` pairs,
+            best first; documents sharing no term with the query are never returned
+        """
+        return [self._prune_top_k(*self.query_terms(query), k) for query in queries]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return the best ``k`` ``(doc_id, score)`` pairs for a single query."""
+        return self.score_batch([query], k)[0]
+
+
+class BM25IndexBuilder:
+    """
+    Incrementally assemble a :class:`BM25Index` from analyzed batches.
+
+    Only compact integer arrays are retained between batches, so documents can
+    be streamed through without ever holding their text in memory at once.
+    Document ids are assigned in the order documents are added.
+    """
+
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B) -> None:
+        self.k1 = k1
+        self.b = b
+        self.n_docs = 0
+        self._vocab: Dict[str, int] = {}
+        self._term_ids: List[np.ndarray] = []
+        self._doc_ids: List[np.ndarray] = []
+        self._tfs: List[np.ndarray] = []
+        self._doc_lens: List[np.ndarray] = []
+
+    def add(self, batch: AnalyzedBatch) -> None:
+        """Append the documents of ``batch`` after those already added."""
+        mapping = np.fromiter(
+            (self._vocab.setdefault(term, len(self._vocab)) for term in batch.terms),
+            dtype=np.int64,
+            count=len(batch.terms),
+        )
+        self._term_ids.append(mapping[batch.term_idx])
+        self._doc_ids.append(batch.doc_idx.astype(np.int64) + self.n_docs)
+        self._tfs.append(batch.tf)
+        self._doc_lens.append(batch.doc_len)
+        self.n_docs += len(batch.doc_len)
+
+    def finish(self, source_hash: str) -> BM25Index:
+        """Sort the accumulated postings into the final index."""
+        term_ids = np.concatenate(self._term_ids) if self._term_ids else np.zeros(0, dtype=np.int64)
+        doc_ids = np.concatenate(self._doc_ids) if self._doc_ids else np.zeros(0, dtype=np.int64)
+        tfs = np.concatenate(self._tfs) if self._tfs else np.zeros(0, dtype=np.int32)
+        doc_len = np.concatenate(self._doc_lens) if self._doc_lens else np.zeros(0, dtype=np.int32)
+        self._term_ids, self._doc_ids, self._tfs, self._doc_lens = [], [], [], []
+        k1, b, n_docs = self.k1, self.b, self.n_docs
+
+        # Re-number terms in byte order so lookups can binary search the blob
+        terms = sorted(self._vocab, key=lambda term: term.encode("utf-8"))
+        remap = np.empty(len(terms), dtype=np.int64)
+        for new_id, term in enumerate(terms):
+            remap[self._vocab[term]] = new_id
+
+        # scipy needs the CSR pointer and index arrays to share one dtype
+        index_dtype = np.int32 if max(len(tfs), n_docs) < 2**31 else np.int64
+        term_arr = remap[term_ids]
+        order = np.lexsort((doc_ids, term_arr))
+        post_doc = doc_ids[order].astype(index_dtype)
+        post_tf = tfs[order]
+
+        df = np.bincount(term_arr, minlength=len(terms))
+        post_ptr = np.zeros(len(terms) + 1, dtype=index_dtype)
+        np.cumsum(df, out=post_ptr[1:])
+
+        encoded = [term.encode("utf-8") for term in terms]
+        vocab_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(term) for term in encoded], out=vocab_ptr[1:])
+
+        avgdl = float(doc_len.mean()) if n_docs else 0.0
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        post_idf = np.repeat(idf, df).astype(np.float64)
+        norm = k1 * (1.0 - b + b * doc_len[post_doc] / max(avgdl, 1e-9))
+        post_weight = (post_idf * post_tf * (k1 + 1.0) / (post_tf + norm)).astype(np.float32)
+        term_max = np.zeros(len(terms), dtype=np.float32)
+        if len(post_weight):
+            # Every vocabulary term has at least one posting, so no reduceat segment is empty
+            term_max = np.maximum.reduceat(post_weight, post_ptr[:-1].astype(np.int64))
+
+        arrays = {
+            "vocab_ptr": vocab_ptr,
+            "vocab_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "idf": idf,
+            "post_ptr": post_ptr,
+            "post_doc": post_doc,
+            "post_tf": post_tf,
+            "post_weight": post_weight,
+            "term_max": term_max,
+            "doc_len": doc_len,
+        }
+        meta = {
+            "source_hash": source_hash,
+            "k1": k1,
+            "b": b,
+            "n_docs": n_docs,
+            "n_terms": len(terms),
+            "avgdl": avgdl,
+        }
+        return BM25Index(arrays, meta)
+
+
+def open_current_index(path: str, source_hash: str, k1: float = DEFAULT_K1, b: float = DEFAULT_B) -> Optional[BM25Index]:
+    """
+    Memory-map the index at ``path`` if it was built from ``source_hash`` with the same parameters.
+
+    Returns:
+        Optional[BM25Index]: The index, or None when it is missing, stale or unreadable
+    """
+    try:
+        index = BM25Index.open(path)
+        if index.source_hash == source_hash and index.k1 == k1 and index.b == b:
+            logger.info(f"Opened BM25 index {path} ({index.n_docs} documents).")
+            return index
+        logger.info(f"BM25 index {path} is stale, rebuilding.")
+    except FileNotFoundError:
+        logger.info(f"No BM25 index at {path}, building one.")
+    except IndexFormatError as e:
+        logger.warning(f"Ignoring unusable BM25 index: {e}")
+    return None
+
+
+def save_index(index: BM25Index, path: str) -> None:
+    """Persist ``index``, logging rather than failing when the file cannot be replaced."""
+    try:
+        index.save(path)
+        logger.info(f"Saved BM25 index with {index.n_docs} documents to {path}.")
+    except OSError as e:
+        # e.g. another process on Windows still has the old file mapped
+        logger.warning(f"Could not save BM25 index to {path}: {e}")
+
+
+def index_dir(source_hash: Optional[str] = None) -> str:
+    """
+    Directory of the index files built from one source.
+
+    The guest snapshot's indexes, shared by all agents, live directly in the
+    ``index`` cache directory. Indexes over any other text list get a directory
+    named after its ``source_hash``, so they never overwrite the agents'
+    indexes or each other.
+    """
+    if source_hash is None:
+        return get_cache_dir("index")
+    return get_cache_dir("index", "texts", source_hash[:16])
+
+
+def default_index_path(source_hash: Optional[str] = None) -> str:
+    """Location of the BM25 index for the guest snapshot, or for the texts hashing to ``source_hash``."""
+    return os.path.join(index_dir(source_hash), DEFAULT_INDEX_NAME)
+
+
+def load_or_build_index(
+    texts: Sequence[str],
+    path: Optional[str] = None,
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B,
+    source_hash: Optional[str] = None,
+) -> BM25Index:
+    """
+    Open the on-disk index for ``texts``, rebuilding it only if the data changed.
+
+    The index is looked up in a cache directory of its own, named after a hash
+    of the texts (see :func:`index_dir`), and validated against that hash and
+    the BM25 parameters before being memory-mapped.
+
+    Args:
+        texts: Documents to index, in document-id order
+        path: Index file location (defaults to the texts' own cache directory)
+        k1: BM25 term-frequency saturation parameter
+        b: BM25 length-normalization parameter
+        source_hash: Precomputed :func:`compute_source_hash` of ``texts``
+
+    Returns:
+        BM25Index: A memory-mapped or freshly built index
+    """
+    if source_hash is None:
+        source_hash = compute_source_hash(texts)
+    if path is None:
+        path = default_index_path(source_hash)
+
+    index = open_current_index(path, source_hash, k1, b)
+    if index is None:
+        index = BM25Index.build(texts, source_hash=source_hash, k1=k1, b=b)
+        save_index(index, path)
+    return index
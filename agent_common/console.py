@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+# Line being read by the console thread; shared so a cancelled read is picked up by the next call
+_pending: Optional["Future[str]"] = None
+_pending_lock = threading.Lock()
+# Bytes read past the end of the last line (several lines may arrive at once from a pipe)
+_buffer = b""
+
+
+def _read(future: "Future[str]") -> None:
+    global _buffer
+    try:
+        # Raw reads: a thread blocked in sys.stdin would hold its buffer lock and abort interpreter shutdown
+        fd = sys.stdin.fileno()
+        while b"\n" not in _buffer:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            _buffer += chunk
+        if not _buffer:
+            raise EOFError("EOF when reading a line")
+        line, _, _buffer = _buffer.partition(b"\n")
+        future.set_result(line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r"))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+async def read_line(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    The line is read on a daemon thread, so a pending read neither stalls
+    background work nor holds up shutdown after Ctrl+C (which ``asyncio.run``
+    delivers to the main task as ``CancelledError``). A read abandoned that way
+    stays in flight; the next call waits for the same line instead of starting
+    a second reader.
+
+    Raises:
+        EOFError: On end of input (Ctrl+D)
+    """
+    global _pending
+    with _pending_lock:
+        if _pending is None or _pending.done():
+            print(prompt, end="", flush=True)
+            _pending = Future()
+            threading.Thread(target=_read, args=(_pending,), name="console-input", daemon=True).start()
+        future = _pending
+    # Shielded: cancelling the caller must not cancel the shared read
+    return await asyncio.shield(asyncio.wrap_future(future))
@@ -0,0 +1,285 @@
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .array_file import IndexFormatError, read_array_file, write_array_file
+from .bm25_index import BM25Index, top_k
+from .paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GDENSIDX"
+FORMAT_VERSION = 1
+DEFAULT_DIM = 64
+DEFAULT_NPROBE = 32
+DEFAULT_INDEX_NAME = "guest_dense.idx"
+RRF_K = 60
+
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 64
+_ASSIGN_CHUNK = 65536
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _effective_dim(bm25_index: BM25Index, dim: int) -> int:
+    return max(1, min(dim, bm25_index.n_terms, bm25_index.n_docs))
+
+
+def _latent_projection(weights: sparse.csr_matrix, dim: int, n_iter: int = 3, seed: int = 0) -> np.ndarray:
+    """
+    Compute a rank-``dim`` LSA projection of the term-document matrix.
+
+    Uses randomized subspace iteration, so only ``n_docs x dim`` dense
+    temporaries are ever materialized.
+
+    Returns:
+        np.ndarray: ``n_terms x dim`` matrix whose columns span the top left singular vectors
+    """
+    rng = np.random.default_rng(seed)
+    width = min(dim + 10, *weights.shape)
+    basis = rng.standard_normal((weights.shape[0], width)).astype(np.float32)
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(weights @ (weights.T @ basis))
+    doc_coords = weights.T @ basis
+    eigenvalues, eigenvectors = np.linalg.eigh(doc_coords.T @ doc_coords)
+    top = np.argsort(eigenvalues)[::-1][:dim]
+    return (basis @ eigenvectors[:, top]).astype(np.float32)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the most similar centroid for every vector."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = vectors[start:start + _ASSIGN_CHUNK]
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _spherical_kmeans(vectors: np.ndarray, n_clusters: int, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity, training on a bounded sample."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_clusters * _KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = _assign(sample, centroids)
+        membership = sparse.csr_matrix(
+            (np.ones(sample_size, dtype=np.float32), (assignment, np.arange(sample_size))),
+            shape=(n_clusters, sample_size),
+        )
+        sums = np.asarray(membership @ sample)
+        empty = np.asarray(membership.sum(axis=1)).ravel() == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[int, float]]],
+    k: int,
+    rrf_k: int = RRF_K,
+) -> List[Tuple[int, float]]:
+    """
+    Merge several rankings with reciprocal-rank fusion.
+
+    Args:
+        rankings: ``(doc_id, score)`` lists, best first; only the ranks are used
+        k: Number of fused results to return
+        rrf_k: Rank offset damping the influence of the very top ranks
+
+    Returns:
+        List[Tuple[int, float]]: ``(doc_id, fused_score)`` pairs, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class DenseIndex:
+    """
+    CPU-only dense retrieval channel for the guest index.
+
+    Documents and queries are embedded with an LSA projection learned from the
+    BM25 weight matrix (a local stand-in for a neural embedder) and searched
+    through an IVF index: vectors are grouped into ``nlist`` clusters stored
+    contiguously, and a query only scans the ``nprobe`` closest clusters.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, object]) -> None:
+        self.projection = arrays["projection"]
+        self.centroids = arrays["centroids"]
+        self.list_ptr = arrays["list_ptr"]
+        self.list_ids = arrays["list_ids"]
+        self.list_vecs = arrays["list_vecs"]
+        self.source_version: str = meta["source_version"]
+        self.dim: int = meta["dim"]
+        self.nlist: int = meta["nlist"]
+
+    @classmethod
+    def build(cls, bm25_index: BM25Index, dim: int = DEFAULT_DIM, nlist: Optional[int] = None) -> "DenseIndex":
+        """
+        Build the dense channel for an existing BM25 index.
+
+        Args:
+            bm25_index: Index whose weight matrix is embedded
+            dim: Embedding dimension
+            nlist: Number of IVF clusters (defaults to ``sqrt(n_docs)``)
+
+        Returns:
+            DenseIndex: The built index
+        """
+        n_docs = bm25_index.n_docs
+        dim = _effective_dim(bm25_index, dim)
+        if nlist is None:
+            nlist = int(np.sqrt(n_docs))
+        nlist = max(1, min(nlist, n_docs))
+
+        if n_docs and bm25_index.n_terms:
+            weights = bm25_index.matrix
+            projection = _latent_projection(weights, dim)
+            doc_vecs = _normalize_rows(weights.T @ projection)
+            centroids = _spherical_kmeans(doc_vecs, nlist)
+            assignment = _assign(doc_vecs, centroids)
+        else:
+            projection = np.zeros((bm25_index.n_terms, dim), dtype=np.float32)
+            doc_vecs = np.zeros((n_docs, dim), dtype=np.float32)
+            centroids = np.zeros((nlist, dim), dtype=np.float32)
+            assignment = np.zeros(n_docs, dtype=np.int64)
+
+        order = np.argsort(assignment, kind="stable")
+        list_ptr = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=list_ptr[1:])
+
+        arrays = {
+            "projection": projection,
+            "centroids": centroids,
+            "list_ptr": list_ptr,
+            "list_ids": order.astype(np.int64),
+            "list_vecs": doc_vecs[order],
+        }
+        meta = {"source_version": bm25_index.version, "dim": dim, "nlist": nlist}
+        return cls(arrays, meta)
+
+    def save(self, path: str) -> None:
+        """Atomically write the index to ``path``."""
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "source_version": self.source_version,
+            "dim": self.dim,
+            "nlist": self.nlist,
+        }
+        arrays = {
+            "projection": self.projection,
+            "centroids": self.centroids,
+            "list_ptr": self.list_ptr,
+            "list_ids": self.list_ids,
+            "list_vecs": self.list_vecs,
+        }
+        write_array_file(path, MAGIC, meta, arrays)
+
+    @classmethod
+    def open(cls, path: str) -> "DenseIndex":
+        """
+        Memory-map an index written by :meth:`save`.
+
+        Raises:
+            FileNotFoundError: If ``path`` does not exist
+            IndexFormatError: If the file is not a compatible index
+        """
+        meta, arrays = read_array_file(path, MAGIC, FORMAT_VERSION)
+        return cls(arrays, meta)
+
+    def embed_queries(self, bm25_index: BM25Index, queries: Sequence[str]) -> np.ndarray:
+        """Embed queries as unit vectors (all-zero when no query term is known)."""
+        query_terms = bm25_index.query_matrix(queries)
+        query_terms.data = query_terms.data * bm25_index.idf[query_terms.indices]
+        return _normalize_rows(np.asarray(query_terms @ self.projection))
+
+    def search_batch(
+        self,
+        bm25_index: BM25Index,
+        queries: Sequence[str],
+        k: int,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Approximate cosine-similarity search for a batch of queries.
+
+        Args:
+            bm25_index: The BM25 index this dense index was built from (provides the vocabulary)
+            queries: Query strings
+            k: Number of results per query
+            nprobe: Number of IVF clusters scanned per query
+
+        Returns:
+            List[List[Tuple[int, float]]]: For each query, ``(doc_id, similarity)`` pairs, best first
+        """
+        embeddings = self.embed_queries(bm25_index, queries)
+        coarse = embeddings @ self.centroids.T
+        nprobe = min(nprobe, self.nlist)
+
+        results: List[List[Tuple[int, float]]] = []
+        for embedding, cluster_scores in zip(embeddings, coarse):
+            if not embedding.any():
+                results.append([])
+                continue
+            probes = np.argpartition(-cluster_scores, nprobe - 1)[:nprobe]
+            ids, scores = [], []
+            for cluster in probes:
+                start, end = self.list_ptr[cluster], self.list_ptr[cluster + 1]
+                ids.append(self.list_ids[start:end])
+                scores.append(self.list_vecs[start:end] @ embedding)
+            ids_arr, scores_arr = np.concatenate(ids), np.concatenate(scores)
+            positive = scores_arr > 0
+            results.append(top_k(ids_arr[positive], scores_arr[positive], k))
+        return results
+
+
+def load_or_build_dense_index(
+    bm25_index: BM25Index,
+    path: Optional[str] = None,
+    dim: int = DEFAULT_DIM,
+) -> DenseIndex:
+    """
+    Open the on-disk dense index for ``bm25_index``, rebuilding it when stale.
+
+    Args:
+        bm25_index: The BM25 index the dense channel is derived from
+        path: Index file location (defaults to the shared cache directory)
+        dim: Embedding dimension
+
+    Returns:
+        DenseIndex: A memory-mapped or freshly built index
+    """
+    if path is None:
+        path = os.path.join(get_cache_dir("index"), DEFAULT_INDEX_NAME)
+
+    try:
+        index = DenseIndex.open(path)
+        if index.source_version == bm25_index.version and index.dim == _effective_dim(bm25_index, dim):
+            logger.info(f"Opened dense index {path} ({index.nlist} lists).")
+            return index
+        logger.info(f"Dense index {path} is stale, rebuilding.")
+    except FileNotFoundError:
+        logger.info(f"No dense index at {path}, building one.")
+    except IndexFormatError as e:
+        logger.warning(f"Ignoring unusable dense index: {e}")
+
+    index = DenseIndex.build(bm25_index, dim=dim)
+    try:
+        index.save(path)
+        logger.info(f"Saved dense index with {index.nlist} lists to {path}.")
+    except OSError as e:
+        logger.warning(f"Could not save dense index to {path}: {e}")
+    return index
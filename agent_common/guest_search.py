@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .bm25_index import BM25Index, compute_source_hash, default_index_path, index_dir, load_or_build_index
+from .dense_index import DEFAULT_INDEX_NAME as DENSE_INDEX_NAME
+from .dense_index import DEFAULT_NPROBE, DenseIndex, load_or_build_dense_index, reciprocal_rank_fusion
+from .guest_store import GuestStore
+from .ingest import load_or_build_guest_index
+from .name_index import NameIndex, load_or_build_name_index
+from .query_cache import QueryCache, normalize_query
+from .snapshot import load_invitees
+
+logger = logging.getLogger(__name__)
+
+# Candidates taken from each channel before fusion
+HYBRID_DEPTH = 50
+
+_shared: Optional["GuestSearch"] = None
+_shared_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def hybrid_enabled() -> bool:
+    """Whether the dense channel is switched on via ``GUEST_HYBRID_SEARCH``."""
+    return os.getenv("GUEST_HYBRID_SEARCH", "").lower() in ("1", "true", "yes")
+
+
+def name_lookup_enabled() -> bool:
+    """Whether the name fast path is on; disable with ``GUEST_NAME_LOOKUP=0``."""
+    return os.getenv("GUEST_NAME_LOOKUP", "1").lower() not in ("0", "false", "no")
+
+
+def cache_from_env() -> QueryCache:
+    """Create the query cache sized by ``GUEST_QUERY_CACHE_SIZE`` (0 disables it) and ``GUEST_QUERY_CACHE_TTL`` seconds."""
+    return QueryCache(
+        maxsize=int(os.getenv("GUEST_QUERY_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("GUEST_QUERY_CACHE_TTL", "300")),
+    )
+
+
+def _search_executor() -> ThreadPoolExecutor:
+    """Worker pool for :meth:`GuestSearch.asearch`, sized by ``GUEST_SEARCH_WORKERS``."""
+    global _executor
+    with _shared_lock:
+        if _executor is None:
+            workers = int(os.getenv("GUEST_SEARCH_WORKERS", min(4, os.cpu_count() or 1)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="guest-search")
+        return _executor
+
+
+class GuestSearch:
+    """
+    Guest retrieval shared by every agent's ``guest_info_retriever`` tool.
+
+    Queries that are guest names are answered by the name index when one is
+    attached; result slots the name matches leave free are filled from the
+    text ranking. Other queries are ranked with BM25 alone, or, when a dense index
+    is attached, by fusing the BM25 and dense rankings with reciprocal-rank
+    fusion. Rankings are cached per
+    normalized query and invalidated whenever the index version changes.
+    Results are document ids; text is only built from ``store`` for the hits
+    that are actually returned (see :meth:`texts`).
+    """
+
+    def __init__(
+        self,
+        bm25_index: BM25Index,
+        dense_index: Optional[DenseIndex] = None,
+        nprobe: int = DEFAULT_NPROBE,
+        cache: Optional[QueryCache] = None,
+        store: Optional[GuestStore] = None,
+        name_index: Optional[NameIndex] = None,
+    ) -> None:
+        self.bm25_index = bm25_index
+        self.dense_index = dense_index
+        self.nprobe = nprobe
+        self.cache = cache if cache is not None else cache_from_env()
+        self.store = store
+        self.name_index = name_index
+
+    @property
+    def version(self) -> str:
+        """Identifier of everything that determines a ranking; used to key the cache."""
+        version = self.bm25_index.version
+        if self.dense_index is not None:
+            version += f"|dense:{self.dense_index.dim}:{self.dense_index.nlist}:{self.nprobe}"
+        if self.name_index is not None:
+            version += "|names"
+        return version
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return the best ``k`` ``(doc_id, score)`` pairs for a single query."""
+        return self.search_batch([query], k)[0]
+
+    async def asearch(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Non-blocking :meth:`search`; ranking runs on a shared worker pool, off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_search_executor(), self.search, query, k)
+
+    def search_batch(self, queries: Sequence[str], k: int = 3) -> List[List[Tuple[int, float]]]:
+        """Return the best ``k`` ``(doc_id, score)`` pairs for every query."""
+        version = self.version
+        keys = [(normalize_query(query), k) for query in queries]
+        results: List[Optional[List[Tuple[int, float]]]] = [self.cache.get(key, version) for key in keys]
+
+        misses = [i for i, ranking in enumerate(results) if ranking is None]
+        if misses:
+            for i, ranking in zip(misses, self._rank([queries[i] for i in misses], k)):
+                self.cache.put(keys[i], version, ranking)
+                results[i] = ranking
+        return results
+
+    def texts(self, results: Sequence[Tuple[int, float]]) -> List[str]:
+        """
+        Build the text blocks for ranked results.
+
+        Raises:
+            RuntimeError: If no guest store is attached
+        """
+        if self.store is None:
+            raise RuntimeError("GuestSearch has no guest store attached.")
+        return self.store.texts([doc_id for doc_id, _ in results])
+
+    def records(self, results: Sequence[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        """
+        Materialize the store rows for ranked results, e.g. for :func:`agent_common.tool_output.format_guests`.
+
+        Raises:
+            RuntimeError: If no guest store is attached
+        """
+        if self.store is None:
+            raise RuntimeError("GuestSearch has no guest store attached.")
+        return self.store.records([doc_id for doc_id, _ in results])
+
+    def _rank(self, queries: Sequence[str], k: int) -> List[List[Tuple[int, float]]]:
+        if self.name_index is None:
+            return self._rank_text(queries, k)
+
+        results = [self.name_index.lookup(query, k) or [] for query in queries]
+        # Queries the name lookup did not fully answer are completed from the text ranking, after the name matches
+        rest = [i for i, ranking in enumerate(results) if len(ranking) < k]
+        if rest:
+            for i, ranking in zip(rest, self._rank_text([queries[i] for i in rest], k)):
+                seen = {doc_id for doc_id, _ in results[i]}
+                results[i] = (results[i] + [(doc_id, score) for doc_id, score in ranking if doc_id not in seen])[:k]
+        return results
+
+    def _rank_text(self, queries: Sequence[str], k: int) -> List[List[Tuple[int, float]]]:
+        if self.dense_index is None:
+            return self.bm25_index.score_batch(queries, k)
+
+        depth = max(k, HYBRID_DEPTH)
+        lexical = self.bm25_index.score_batch(queries, depth)
+        dense = self.dense_index.search_batch(self.bm25_index, queries, depth, self.nprobe)
+        return [reciprocal_rank_fusion([lex, den], k) for lex, den in zip(lexical, dense)]
+
+
+def load_guest_search(
+    texts: Optional[Sequence[str]] = None,
+    hybrid: Optional[bool] = None,
+    names: Optional[bool] = None,
+) -> GuestSearch:
+    """
+    Open (or build) the shared indexes.
+
+    Args:
+        texts: Guest documents in document-id order; when omitted the invitees
+            snapshot is indexed through the streaming ingestion pipeline, with
+            document ids following snapshot row order. Indexes over ``texts``
+            are kept in a cache directory named after their hash, apart from
+            the snapshot's
+        hybrid: Attach the dense channel; defaults to ``GUEST_HYBRID_SEARCH``
+        names: Attach the name fast path (snapshot only); defaults to ``GUEST_NAME_LOOKUP``
+
+    Returns:
+        GuestSearch: Search over the loaded indexes, with a guest store attached
+    """
+    if names is None:
+        names = name_lookup_enabled()
+    name_index = None
+    directory = index_dir()
+    if texts is None:
+        table = load_invitees()
+        bm25_index = load_or_build_guest_index(table)
+        store = GuestStore(table)
+        if names:
+            name_index = load_or_build_name_index(table, bm25_index.version)
+    else:
+        source_hash = compute_source_hash(texts)
+        directory = index_dir(source_hash)
+        bm25_index = load_or_build_index(texts, path=default_index_path(source_hash), source_hash=source_hash)
+        store = GuestStore.from_texts(texts)
+    if len(store) != bm25_index.n_docs:
+        raise RuntimeError(f"Guest store has {len(store)} rows but the index has {bm25_index.n_docs} documents.")
+    if hybrid is None:
+        hybrid = hybrid_enabled()
+    dense_index = (
+        load_or_build_dense_index(bm25_index, path=os.path.join(directory, DENSE_INDEX_NAME)) if hybrid else None
+    )
+    channels = "hybrid BM25 + dense" if dense_index else "BM25"
+    if name_index is not None:
+        channels = f"name lookup, then {channels}"
+    logger.info(f"Guest search ready ({channels}).")
+    return GuestSearch(bm25_index, dense_index, store=store, name_index=name_index)
+
+
+def get_guest_search() -> GuestSearch:
+    """Return the process-wide :class:`GuestSearch` over the invitees snapshot, loading it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = load_guest_search()
+        return _shared
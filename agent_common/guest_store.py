@@ -0,0 +1,44 @@
+from typing import Any, Callable, Dict, List, Sequence
+
+import pyarrow as pa
+
+from .ingest import format_guest
+
+
+class GuestStore:
+    """
+    Columnar guest storage shared by every agent.
+
+    Each field is an Arrow string column, i.e. one contiguous UTF-8 buffer plus
+    an offsets array. When backed by the invitees snapshot the buffers are
+    memory-mapped, so the store costs no heap memory per guest and its pages
+    are shared between processes. Text blocks are only built for the ids a
+    search actually returns.
+    """
+
+    def __init__(self, table: pa.Table, formatter: Callable[[Dict[str, Any]], str] = format_guest) -> None:
+        self.table = table
+        self._formatter = formatter
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str]) -> "GuestStore":
+        """Wrap pre-formatted documents (one ``text`` column)."""
+        return cls(pa.table({"text": pa.array(list(texts), type=pa.string())}), formatter=lambda row: row["text"])
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the column buffers (mapped, not necessarily resident)."""
+        return self.table.nbytes
+
+    def records(self, doc_ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Materialize the rows for ``doc_ids`` as dicts, in the given order."""
+        if not doc_ids:
+            return []
+        return self.table.take(pa.array(doc_ids, type=pa.int64())).to_pylist()
+
+    def texts(self, doc_ids: Sequence[int]) -> List[str]:
+        """Build the text blocks for ``doc_ids``, in the given order."""
+        return [self._formatter(record) for record in self.records(doc_ids)]
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+from typing import Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_BACKOFF_JITTER = 0.3
+DEFAULT_POOL_SIZE = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_hub_configured = False
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def default_timeout() -> Tuple[float, float]:
+    """``(connect, read)`` timeout in seconds from ``HTTP_CONNECT_TIMEOUT`` / ``HTTP_READ_TIMEOUT``."""
+    return (
+        _env_float("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+        _env_float("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+    )
+
+
+def default_retry() -> Retry:
+    """
+    Bounded retry policy with exponential backoff and jitter.
+
+    Connection failures, read errors and 429/5xx answers to idempotent requests
+    are retried up to ``HTTP_MAX_RETRIES`` times, honouring ``Retry-After``.
+    Jitter spreads out retries from concurrent tool calls.
+    """
+    return Retry(
+        total=int(_env_float("HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter=DEFAULT_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        # Hand the final response back to the caller instead of raising MaxRetryError
+        raise_on_status=False,
+    )
+
+
+class TimeoutSession(requests.Session):
+    """``requests.Session`` that applies a default ``(connect, read)`` timeout to every request."""
+
+    def __init__(self, timeout: Optional[Tuple[float, float]] = None) -> None:
+        super().__init__()
+        self.timeout = timeout or default_timeout()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def build_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    Create a keep-alive session with connection pooling, retries and timeouts.
+
+    Args:
+        pool_size: Connections kept per host (``HTTP_POOL_SIZE`` by default)
+
+    Returns:
+        requests.Session: A new session
+    """
+    if pool_size is None:
+        pool_size = int(_env_float("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+    session = TimeoutSession()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=default_retry())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session shared by every tool that calls an external API."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def close_session() -> None:
+    """Close the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def configure_huggingface_hub() -> None:
+    """Make ``huggingface_hub`` calls (e.g. ``list_models``) use pooled sessions with the same policy."""
+    global _hub_configured
+    if _hub_configured:
+        return
+    try:
+        from huggingface_hub import configure_http_backend
+    except ImportError:
+        logger.debug("huggingface_hub has no configurable HTTP backend; using its defaults.")
+        return
+    # huggingface_hub keeps one session per thread, created through this factory
+    configure_http_backend(backend_factory=build_session)
+    _hub_configured = True
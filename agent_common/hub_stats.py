@@ -0,0 +1,275 @@
+import argparse
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .paths import get_cache_dir
+from .single_flight import SingleFlight, flight_group
+from .snapshot import is_offline, write_atomic
+from .tool_runtime import ToolRuntime, tool_runtime
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "hub_stats.json"
+DEFAULT_TTL = 3600.0
+DEFAULT_WORKERS = 4
+
+ListModels = Callable[..., Iterable[Any]]
+
+
+@dataclass
+class TopModel:
+    """Most downloaded model of an author."""
+    model_id: str
+    downloads: int
+
+
+@dataclass
+class AuthorStats:
+    """
+    Hub statistics for one author.
+
+    ``top_model`` is None when the author has no models. ``error`` is set when
+    the lookup failed; such results are never cached.
+    """
+    author: str
+    top_model: Optional[TopModel]
+    fetched_at: float
+    error: Optional[str] = None
+
+
+def _default_list_models() -> ListModels:
+    from huggingface_hub import list_models
+
+    from .http_client import configure_huggingface_hub
+
+    configure_huggingface_hub()
+    return list_models
+
+
+def default_snapshot_path() -> str:
+    """Snapshot location: ``HUB_STATS_SNAPSHOT``, or ``hub/hub_stats.json`` under the cache root."""
+    return os.getenv("HUB_STATS_SNAPSHOT") or os.path.join(get_cache_dir("hub"), SNAPSHOT_NAME)
+
+
+class HubStats:
+    """
+    Per-author "most downloaded model" lookups on the Hugging Face Hub.
+
+    Results are cached per author for ``ttl`` seconds and mirrored to a local
+    JSON snapshot, so they survive restarts. With ``AGENTIC_RAG_OFFLINE=1`` (or
+    ``offline=True``) the snapshot is served regardless of age and the Hub is
+    never contacted; refresh it with ``python -m agent_common.hub_stats
+    --refresh``. Several authors are looked up in one call, with the misses
+    fetched concurrently and identical in-flight lookups coalesced. Hub
+    requests run under a deadline and circuit breaker (see
+    :class:`~agent_common.tool_runtime.ToolRuntime`), so a degraded Hub yields
+    quick per-author errors rather than a stalled turn.
+    """
+
+    def __init__(
+        self,
+        list_models: Optional[ListModels] = None,
+        ttl: Optional[float] = None,
+        snapshot_path: Optional[str] = None,
+        offline: Optional[bool] = None,
+        persist: bool = True,
+        max_workers: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+        flight: Optional[SingleFlight] = None,
+        runtime: Optional[ToolRuntime] = None,
+    ) -> None:
+        self._list_models = list_models
+        self.ttl = ttl if ttl is not None else float(os.getenv("HUB_STATS_TTL", DEFAULT_TTL))
+        self.snapshot_path = snapshot_path or default_snapshot_path()
+        self.offline = offline if offline is not None else is_offline()
+        self.persist = persist
+        self.max_workers = max_workers or int(os.getenv("HUB_STATS_WORKERS", DEFAULT_WORKERS))
+        self._clock = clock
+        self._flight = flight if flight is not None else SingleFlight("hub_stats")
+        self._runtime = runtime if runtime is not None else ToolRuntime("hub_stats")
+        self._lock = threading.Lock()
+        # Serializes snapshot writes, so a newer copy of the entries is never overwritten by an older one
+        self._write_lock = threading.Lock()
+        self._entries: Dict[str, AuthorStats] = self._read_snapshot()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _read_snapshot(self) -> Dict[str, AuthorStats]:
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Hub stats snapshot {self.snapshot_path}: {e}")
+            return {}
+
+        entries = {}
+        for author, entry in data.get("authors", {}).items():
+            top_model = entry.get("top_model")
+            entries[author] = AuthorStats(
+                author=author,
+                top_model=TopModel(**top_model) if top_model else None,
+                fetched_at=float(entry["fetched_at"]),
+            )
+        logger.info(f"Loaded Hub stats snapshot with {len(entries)} author(s) from {self.snapshot_path}.")
+        return entries
+
+    def _write_snapshot(self) -> None:
+        """Write the cached entries to the snapshot; readers are only held up while they are copied."""
+        with self._write_lock:
+            with self._lock:
+                entries = sorted(self._entries.items())
+            data = {
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "authors": {
+                    author: {"top_model": asdict(stats.top_model) if stats.top_model else None, "fetched_at": stats.fetched_at}
+                    for author, stats in entries
+                },
+            }
+            encoded = json.dumps(data, indent=2).encode("utf-8")
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+                write_atomic(self.snapshot_path, lambda f: f.write(encoded))
+            except OSError as e:
+                logger.warning(f"Could not save Hub stats snapshot to {self.snapshot_path}: {e}")
+
+    def _persist(self, loaded: Iterable[AuthorStats]) -> None:
+        """Write the snapshot once for a batch of fetches, if any of them succeeded."""
+        if self.persist and any(stats.error is None for stats in loaded):
+            self._write_snapshot()
+
+    def _query(self, author: str) -> List[Any]:
+        if self._list_models is None:
+            self._list_models = _default_list_models()
+        # Consumed here: the Hub is only contacted while the results are iterated
+        return list(self._list_models(author=author, sort="downloads", direction=-1, limit=1))
+
+    def _fetch(self, author: str) -> AuthorStats:
+        models = self._runtime.call(self._query, author)
+        top_model = TopModel(models[0].id, int(models[0].downloads or 0)) if models else None
+        stats = AuthorStats(author, top_model, self._clock())
+        with self._lock:
+            self._entries[author] = stats
+        return stats
+
+    def _load(self, author: str) -> AuthorStats:
+        if self.offline:
+            return AuthorStats(author, None, self._clock(), error="not in the local Hub stats snapshot (offline mode)")
+        try:
+            return self._flight.do(author, lambda: self._fetch(author))
+        except Exception as e:
+            logger.warning(f"Hub stats lookup for {author} failed: {e}")
+            return AuthorStats(author, None, self._clock(), error=str(e))
+
+    def _cached(self, author: str) -> Optional[AuthorStats]:
+        with self._lock:
+            stats = self._entries.get(author)
+        if stats is None:
+            return None
+        if self.offline or self._clock() - stats.fetched_at < self.ttl:
+            return stats
+        return None
+
+    def lookup(self, authors: Sequence[str]) -> Dict[str, AuthorStats]:
+        """
+        Return the statistics of every author, fetching only those not cached.
+
+        Args:
+            authors: Hugging Face user or organization ids; duplicates are looked up once
+
+        Returns:
+            Dict[str, AuthorStats]: Statistics keyed by (stripped) author id, in input order
+        """
+        names = list(dict.fromkeys(author.strip() for author in authors if author.strip()))
+        results: Dict[str, Optional[AuthorStats]] = {author: self._cached(author) for author in names}
+        missing = [author for author, stats in results.items() if stats is None]
+        if missing:
+            loaded = [self._load(missing[0])] if len(missing) == 1 else self._load_all(missing)
+            results.update(zip(missing, loaded))
+            self._persist(loaded)
+        return {author: stats for author, stats in results.items() if stats is not None}
+
+    def top_model(self, author: str) -> AuthorStats:
+        """Statistics for a single author (see :meth:`lookup`)."""
+        return self.lookup([author])[author.strip()]
+
+    def known_authors(self) -> List[str]:
+        """Authors currently cached or in the snapshot."""
+        with self._lock:
+            return sorted(self._entries)
+
+    def refresh(self, authors: Optional[Sequence[str]] = None) -> Dict[str, AuthorStats]:
+        """
+        Re-fetch ``authors`` (default: every author in the snapshot) from the Hub, ignoring the TTL.
+
+        Raises:
+            RuntimeError: In offline mode
+        """
+        if self.offline:
+            raise RuntimeError("Cannot refresh Hub stats while AGENTIC_RAG_OFFLINE is set.")
+        if authors is None:
+            authors = self.known_authors()
+        names = list(dict.fromkeys(author.strip() for author in authors if author.strip()))
+        loaded = self._load_all(names)
+        self._persist(loaded)
+        return dict(zip(names, loaded))
+
+    def _load_all(self, authors: Sequence[str]) -> List[AuthorStats]:
+        # Each lookup keeps the caller's context variables (the turn's latency budget)
+        pool = self._pool()
+        futures = [pool.submit(contextvars.copy_context().run, self._load, author) for author in authors]
+        return [future.result() for future in futures]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hub-stats")
+            return self._executor
+
+
+_shared: Optional[HubStats] = None
+_shared_lock = threading.Lock()
+
+
+def get_hub_stats() -> HubStats:
+    """Return the process-wide :class:`HubStats`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HubStats(flight=flight_group("hub_stats"), runtime=tool_runtime("hub_stats"))
+        return _shared
+
+
+def format_author_stats(stats: AuthorStats) -> str:
+    """One-line answer for an author, as returned by the agents' Hub stats tools."""
+    if stats.error is not None:
+        return f"Error fetching models for {stats.author}: {stats.error}"
+    if stats.top_model is None:
+        return f"No models found for author {stats.author}."
+    return (
+        f"The most downloaded model by {stats.author} is {stats.top_model.model_id} "
+        f"with {stats.top_model.downloads:,} downloads."
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manage the local Hugging Face Hub stats snapshot.")
+    parser.add_argument("authors", nargs="*", help="Authors to look up (default: every author in the snapshot).")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch from the Hub even if cached.")
+    args = parser.parse_args()
+
+    hub_stats = get_hub_stats()
+    if args.refresh:
+        results: List[AuthorStats] = list(hub_stats.refresh(args.authors or None).values())
+    else:
+        results = list(hub_stats.lookup(args.authors or hub_stats.known_authors()).values())
+    for stats in results:
+        print(format_author_stats(stats))
@@ -0,0 +1,166 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pyarrow as pa
+
+from .bm25_index import (
+    DEFAULT_B,
+    DEFAULT_K1,
+    AnalyzedBatch,
+    BM25Index,
+    BM25IndexBuilder,
+    analyze_texts,
+    compute_source_hash,
+    default_index_path,
+    open_current_index,
+    save_index,
+)
+from .snapshot import content_hash_of, load_invitees
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10_000
+GUEST_FIELDS = ("name", "relation", "description", "email")
+# Bumped whenever format_guest changes, so indexes keyed on snapshot content are rebuilt
+TEXT_FORMAT_VERSION = 1
+_LOG_EVERY_SECONDS = 5.0
+
+
+def format_guest(guest: Dict[str, Any], fields: Sequence[str] = GUEST_FIELDS) -> str:
+    """
+    Render one guest record as the text block the agents index and return.
+
+    Args:
+        guest: Snapshot row
+        fields: Fields to include, in order; all of them for the indexed text
+    """
+    return "\n".join(f"{field.capitalize()}: {guest[field]}" for field in fields)
+
+
+def iter_guest_batches(table: pa.Table, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the rows of ``table`` as lists of dicts, ``batch_size`` rows at a time."""
+    for record_batch in table.to_batches(max_chunksize=batch_size):
+        yield record_batch.to_pylist()
+
+
+def _analyze_guests(rows: List[Dict[str, Any]]) -> AnalyzedBatch:
+    # Runs in worker processes: format and tokenize, return only compact arrays
+    return analyze_texts([format_guest(row) for row in rows])
+
+
+def _default_workers() -> int:
+    configured = os.getenv("GUEST_INGEST_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def analyze_guest_batches(
+    batches: Iterable[List[Dict[str, Any]]],
+    workers: Optional[int] = None,
+) -> Iterator[AnalyzedBatch]:
+    """
+    Format and tokenize guest batches in a process pool, yielding results in order.
+
+    At most ``2 * workers`` batches are in flight at any time, which bounds
+    memory regardless of how many rows the source holds.
+
+    Args:
+        batches: Guest rows in batches
+        workers: Worker processes (``GUEST_INGEST_WORKERS`` or the CPU count by default)
+
+    Yields:
+        AnalyzedBatch: One analyzed batch per input batch
+    """
+    if workers is None:
+        workers = _default_workers()
+    # Never spawn pools from worker processes (e.g. when a spawned child re-imports an agent)
+    if workers <= 1 or multiprocessing.parent_process() is not None:
+        for batch in batches:
+            yield _analyze_guests(batch)
+        return
+
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in batches:
+            pending.append(executor.submit(_analyze_guests, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_index_from_table(
+    table: pa.Table,
+    source_hash: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B,
+) -> BM25Index:
+    """
+    Stream a guest table into a new BM25 index, reporting throughput as it goes.
+
+    Args:
+        table: Guest rows (e.g. the memory-mapped snapshot)
+        source_hash: Identifier stored in the index header
+        batch_size: Rows formatted and tokenized per task
+        workers: Worker processes for formatting and tokenization
+        k1: BM25 term-frequency saturation parameter
+        b: BM25 length-normalization parameter
+
+    Returns:
+        BM25Index: The built index
+    """
+    if table.num_rows <= batch_size:
+        workers = 1
+
+    builder = BM25IndexBuilder(k1=k1, b=b)
+    start = last_log = time.perf_counter()
+    for analyzed in analyze_guest_batches(iter_guest_batches(table, batch_size), workers):
+        builder.add(analyzed)
+        now = time.perf_counter()
+        if now - last_log >= _LOG_EVERY_SECONDS:
+            last_log = now
+            logger.info(f"Ingested {builder.n_docs}/{table.num_rows} guests ({builder.n_docs / (now - start):,.0f} rows/s).")
+
+    index = builder.finish(source_hash)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    logger.info(f"Indexed {index.n_docs} guests in {elapsed:.2f}s ({index.n_docs / elapsed:,.0f} rows/s).")
+    return index
+
+
+def load_or_build_guest_index(table: Optional[pa.Table] = None, path: Optional[str] = None) -> BM25Index:
+    """
+    Open the shared BM25 index for the guest snapshot, stream-building it when stale.
+
+    The index is keyed on the snapshot content hash and the text format, so an
+    up-to-date index is opened without reading a single guest row.
+
+    Args:
+        table: Guest rows; defaults to the local invitees snapshot
+        path: Index file location (defaults to the shared cache directory)
+
+    Returns:
+        BM25Index: A memory-mapped or freshly built index
+    """
+    if table is None:
+        table = load_invitees()
+    if path is None:
+        path = default_index_path()
+
+    content_hash = content_hash_of(table)
+    if content_hash is None:
+        content_hash = compute_source_hash(format_guest(row) for batch in iter_guest_batches(table) for row in batch)
+    source_hash = f"snapshot:{content_hash}:text-v{TEXT_FORMAT_VERSION}"
+
+    index = open_current_index(path, source_hash)
+    if index is None:
+        index = build_index_from_table(table, source_hash)
+        save_index(index, path)
+    return index
@@ -0,0 +1,233 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from .paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL = 7 * 24 * 3600.0
+# Bumped whenever the key layout changes, so old entries are never matched
+KEY_VERSION = 1
+
+# Per-call metadata that does not reach the model: dropped from keys
+_VOLATILE_KEYS = {"response_metadata", "usage_metadata", "raw", "token_usage"}
+# Generated identifiers (message and tool call ids): replaced by their order of appearance
+_ID_KEYS = {"id", "tool_call_id"}
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+_shared: Optional["LLMCache"] = None
+_shared_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    """Whether model responses are cached at all; disable with ``LLM_CACHE=0``."""
+    return os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+@contextlib.contextmanager
+def bypass_llm_cache() -> Iterator[None]:
+    """Neither read nor write the response cache for model calls made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def should_cache(temperature: Optional[float] = None) -> bool:
+    """
+    Whether a model call may use the cache.
+
+    False when caching is disabled, inside :func:`bypass_llm_cache` or, with
+    ``LLM_CACHE_SKIP_SAMPLING=1``, when the call samples (``temperature`` above 0).
+    """
+    if not cache_enabled() or _bypass.get():
+        return False
+    if temperature and os.getenv("LLM_CACHE_SKIP_SAMPLING", "").lower() in ("1", "true", "yes"):
+        return False
+    return True
+
+
+def canonicalize(value: Any, ids: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Strip what varies between identical requests from a JSON-like structure.
+
+    Response metadata is dropped. Message and tool call ids are generated anew
+    on every run, so each distinct id becomes its ordinal (``"#0"``, ``"#1"``
+    ...), which keeps the pairing of tool calls and results.
+    """
+    if ids is None:
+        ids = {}
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key in _VOLATILE_KEYS:
+                continue
+            if key in _ID_KEYS and isinstance(item, str):
+                result[key] = ids.setdefault(item, f"#{len(ids)}")
+            else:
+                result[key] = canonicalize(item, ids)
+        return result
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item, ids) for item in value]
+    return value
+
+
+def cache_key(model: str, messages: Any, tools: Any = None, settings: Any = None) -> str:
+    """
+    Hash identifying a model call: model id, message history, bound tools and settings.
+
+    Args:
+        model: Model id
+        messages: JSON-serializable message history (canonicalized here)
+        tools: JSON-serializable tool schemas, or None
+        settings: Other request parameters that change the answer (temperature, stop sequences, ...)
+    """
+    payload = {
+        "v": KEY_VERSION,
+        "model": model,
+        "messages": canonicalize(messages),
+        "tools": canonicalize(tools),
+        "settings": settings,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LLMCacheStats:
+    """Counters of the response cache."""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+
+class LLMCache:
+    """
+    Two-tier cache of model responses, keyed by :func:`cache_key`.
+
+    An in-memory LRU of ``maxsize`` entries sits in front of a SQLite file, so
+    identical turns are answered without a model call within a process and
+    across restarts. Values are opaque strings: each framework adapter
+    serializes its own response type. Entries older than ``ttl`` seconds are
+    ignored.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        persist: bool = True,
+    ) -> None:
+        """
+        Args:
+            path: SQLite file (``LLM_CACHE_PATH``, default ``llm/responses.sqlite`` under the cache root)
+            maxsize: Entries kept in memory (``LLM_CACHE_SIZE``, default 512)
+            ttl: Seconds an entry stays valid (``LLM_CACHE_TTL``, default 7 days)
+            persist: Keep the SQLite tier; memory only when False
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH") or os.path.join(get_cache_dir("llm"), "responses.sqlite")
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv("LLM_CACHE_SIZE", DEFAULT_MAXSIZE))
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = LLMCacheStats()
+        self._db: Optional[sqlite3.Connection] = self._open() if persist else None
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            return db
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache at {self.path} unavailable, using memory only: {e}")
+            return None
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        # Caller holds the lock
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return entry[0]
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM response cache read failed: {e}")
+                    row = None
+                if row is not None and now - row[1] < self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self._stats.hits += 1
+                    self._stats.disk_hits += 1
+                    return row[0]
+            self._stats.misses += 1
+            return None
+
+    def put(self, key: str, value: str, model: str = "") -> None:
+        """Store ``value`` under ``key`` in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats.writes += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, model, value, created_at) VALUES (?, ?, ?, ?)",
+                        (key, model, value, now),
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM response cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters plus the size of both tiers."""
+        with self._lock:
+            stats = {**asdict(self._stats), "memory_size": len(self._entries)}
+            if self._db is not None:
+                stats["disk_size"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide :class:`LLMCache`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMCache()
+        return _shared
@@ -0,0 +1,283 @@
+import difflib
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from .array_file import IndexFormatError, read_array_file, write_array_file
+from .paths import get_cache_dir
+from .query_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GNAMEIDX"
+FORMAT_VERSION = 1
+DEFAULT_INDEX_NAME = "guest_names.idx"
+# Shortest query that may be completed to a unique name by prefix
+MIN_PREFIX_CHARS = 4
+# Share of a name a prefix must cover; shorter prefixes ("lady", "john") are generic words, left to BM25
+MIN_PREFIX_COVERAGE = 0.5
+# Dice coefficient over character trigrams a name needs to be considered a typo of the query
+MIN_GRAM_DICE = 0.6
+# difflib similarity a fuzzy candidate must reach to be returned
+MIN_FUZZY_RATIO = 0.85
+MAX_FUZZY_CANDIDATES = 16
+# Typo matching is skipped (BM25 answers instead) when the query's rarest trigrams are this common
+MAX_FUZZY_POSTINGS = 20_000
+# Queries with more words than this are treated as descriptive and left to BM25
+MAX_NAME_WORDS = 5
+
+_ARRAY_NAMES = ("name_ptr", "name_blob", "name_doc_ptr", "name_doc", "name_grams", "gram_keys", "gram_ptr", "gram_names")
+
+
+def _trigram_codes(names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return ``(codes, owners)`` for the character trigrams of every padded name.
+
+    Each trigram is packed into one int64 (21 bits per code point), which keeps
+    the whole computation vectorized.
+    """
+    padded = [f" {name} " for name in names]
+    lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+    chars = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    if len(chars) < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    owners = np.repeat(np.arange(len(padded), dtype=np.int64), lengths)
+    codes = (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+    # A trigram is valid only when all three characters belong to the same name
+    valid = owners[:-2] == owners[2:]
+    return codes[valid], owners[:-2][valid]
+
+
+def _query_grams(name: str) -> np.ndarray:
+    codes, _ = _trigram_codes([name])
+    return np.unique(codes)
+
+
+class NameIndex:
+    """
+    Direct lookup of guests by name, answered before any BM25 scoring.
+
+    Distinct normalized names are stored byte-sorted, which gives exact lookup
+    and prefix completion by binary search over the memory-mapped arrays, and
+    a character-trigram inverted index over those names catches typos. Only a
+    handful of names are ever compared, independent of the number of guests.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, object]) -> None:
+        for name in _ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.source_version = str(meta["source_version"])
+        self.n_names = len(self.name_ptr) - 1
+
+    @classmethod
+    def build(cls, names: Sequence[Optional[str]], source_version: str) -> "NameIndex":
+        """
+        Index guest names.
+
+        Args:
+            names: Guest names in document-id order
+            source_version: Version of the data the names come from
+
+        Returns:
+            NameIndex: The built index
+        """
+        normalized = [normalize_query(name or "") for name in names]
+        distinct = sorted({name.encode("utf-8") for name in normalized if name})
+        name_ids = {name.decode("utf-8"): i for i, name in enumerate(distinct)}
+
+        doc_names = np.fromiter((name_ids.get(name, -1) for name in normalized), dtype=np.int64, count=len(normalized))
+        docs = np.flatnonzero(doc_names >= 0)
+        docs = docs[np.argsort(doc_names[docs], kind="stable")]
+        name_doc_ptr = np.zeros(len(distinct) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_names[docs], minlength=len(distinct)), out=name_doc_ptr[1:])
+
+        name_ptr = np.zeros(len(distinct) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in distinct], out=name_ptr[1:])
+        name_blob = np.frombuffer(b"".join(distinct), dtype=np.uint8)
+
+        codes, owners = _trigram_codes([name.decode("utf-8") for name in distinct])
+        # Owners are already ascending, so a stable sort by code yields sorted posting lists
+        order = np.argsort(codes, kind="stable")
+        codes, owners = codes[order], owners[order]
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = (codes[1:] != codes[:-1]) | (owners[1:] != owners[:-1])
+        codes, owners = codes[first], owners[first]
+        gram_keys, gram_counts = np.unique(codes, return_counts=True)
+        gram_ptr = np.zeros(len(gram_keys) + 1, dtype=np.int64)
+        np.cumsum(gram_counts, out=gram_ptr[1:])
+
+        arrays = {
+            "name_ptr": name_ptr,
+            "name_blob": name_blob,
+            "name_doc_ptr": name_doc_ptr,
+            "name_doc": docs.astype(np.int64),
+            "name_grams": np.bincount(owners, minlength=len(distinct)).astype(np.int32),
+            "gram_keys": gram_keys.astype(np.int64),
+            "gram_ptr": gram_ptr,
+            "gram_names": owners.astype(np.int32),
+        }
+        return cls(arrays, {"source_version": source_version})
+
+    def save(self, path: str) -> None:
+        """Atomically write the index to ``path``."""
+        meta = {"format_version": FORMAT_VERSION, "source_version": self.source_version}
+        write_array_file(path, MAGIC, meta, {name: getattr(self, name) for name in _ARRAY_NAMES})
+
+    @classmethod
+    def open(cls, path: str) -> "NameIndex":
+        """
+        Memory-map an index written by :meth:`save`.
+
+        Raises:
+            FileNotFoundError: If ``path`` does not exist
+            IndexFormatError: If the file is not a compatible index
+        """
+        meta, arrays = read_array_file(path, MAGIC, FORMAT_VERSION)
+        missing = [name for name in _ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise IndexFormatError(f"{path} is missing arrays: {', '.join(missing)}")
+        return cls(arrays, meta)
+
+    def _name(self, name_id: int) -> bytes:
+        return self.name_blob[self.name_ptr[name_id]:self.name_ptr[name_id + 1]].tobytes()
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.n_names
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _docs(self, name_id: int) -> np.ndarray:
+        return self.name_doc[self.name_doc_ptr[name_id]:self.name_doc_ptr[name_id + 1]]
+
+    def _collect(self, matches: Sequence[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+        results: List[Tuple[int, float]] = []
+        for name_id, score in matches:
+            for doc_id in self._docs(name_id):
+                results.append((int(doc_id), score))
+                if len(results) >= k:
+                    return results
+        return results
+
+    def _fuzzy_candidates(self, query: str) -> List[int]:
+        grams = _query_grams(query)
+        if not len(grams) or not len(self.gram_keys):
+            return []
+        positions = np.clip(np.searchsorted(self.gram_keys, grams), 0, len(self.gram_keys) - 1)
+        present = self.gram_keys[positions] == grams
+        df = np.where(present, self.gram_ptr[positions + 1] - self.gram_ptr[positions], 0)
+
+        # A name reaching MIN_GRAM_DICE shares at least `needed` trigrams with the query,
+        # so it must appear in one of the len(grams) - needed + 1 rarest posting lists
+        needed = max(1, math.ceil(MIN_GRAM_DICE * len(grams) / (2 - MIN_GRAM_DICE)))
+        order = np.argsort(df, kind="stable")
+        lists = [
+            self.gram_names[self.gram_ptr[positions[i]]:self.gram_ptr[positions[i] + 1]]
+            for i in order if present[i]
+        ]
+        n_rare = len(grams) - needed + 1 - int((~present).sum())
+        if n_rare <= 0 or sum(len(postings) for postings in lists[:n_rare]) > MAX_FUZZY_POSTINGS:
+            return []
+        candidates = np.unique(np.concatenate(lists[:n_rare]))
+
+        shared = np.zeros(len(candidates), dtype=np.int64)
+        for postings in lists:
+            hits = np.clip(np.searchsorted(postings, candidates), 0, len(postings) - 1)
+            shared += postings[hits] == candidates
+        dice = 2.0 * shared / (len(grams) + self.name_grams[candidates])
+        keep = np.flatnonzero(dice >= MIN_GRAM_DICE)
+        keep = keep[np.lexsort((candidates[keep], -dice[keep]))][:MAX_FUZZY_CANDIDATES]
+        return [int(name_id) for name_id in candidates[keep]]
+
+    def lookup(self, query: str, k: int = 3) -> Optional[List[Tuple[int, float]]]:
+        """
+        Answer ``query`` if it is a guest name.
+
+        Tries, in order, an exact match on the normalized name, a unique prefix
+        completion covering at least half of the name and a typo-tolerant
+        match. Scores are name similarities in ``(0, 1]``.
+
+        Args:
+            query: Raw query text
+            k: Maximum number of guests to return
+
+        Returns:
+            Optional[List[Tuple[int, float]]]: Matching ``(doc_id, score)`` pairs,
+            or None when the query does not look like a known name
+        """
+        normalized = normalize_query(query)
+        if not normalized or self.n_names == 0 or len(normalized.split()) > MAX_NAME_WORDS:
+            return None
+        key = normalized.encode("utf-8")
+
+        lo = self._lower_bound(key)
+        if lo < self.n_names and self._name(lo) == key:
+            return self._collect([(lo, 1.0)], k)
+
+        if len(normalized) >= MIN_PREFIX_CHARS:
+            # 0xff never occurs in UTF-8, so this bounds every name starting with key
+            hi = self._lower_bound(key + b"\xff")
+            if 0 < hi - lo <= k:
+                matches = [(name_id, len(key) / len(self._name(name_id))) for name_id in range(lo, hi)]
+                matches = [match for match in matches if match[1] >= MIN_PREFIX_COVERAGE]
+                if matches:
+                    matches.sort(key=lambda match: -match[1])
+                    return self._collect(matches, k)
+
+        matches = []
+        for name_id in self._fuzzy_candidates(normalized):
+            ratio = difflib.SequenceMatcher(None, normalized, self._name(name_id).decode("utf-8")).ratio()
+            if ratio >= MIN_FUZZY_RATIO:
+                matches.append((name_id, ratio))
+        if not matches:
+            return None
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return self._collect(matches, k)
+
+
+def load_or_build_name_index(
+    table: pa.Table,
+    source_version: str,
+    path: Optional[str] = None,
+) -> NameIndex:
+    """
+    Open the on-disk name index for ``source_version``, rebuilding it when stale.
+
+    Args:
+        table: Guest rows in document-id order; the ``name`` column is only read when rebuilding
+        source_version: Version of the guest data, e.g. the BM25 index version
+        path: Index file location (defaults to the shared cache directory)
+
+    Returns:
+        NameIndex: A memory-mapped or freshly built index
+    """
+    if path is None:
+        path = os.path.join(get_cache_dir("index"), DEFAULT_INDEX_NAME)
+
+    try:
+        index = NameIndex.open(path)
+        if index.source_version == source_version:
+            logger.info(f"Opened name index {path} ({index.n_names} names).")
+            return index
+        logger.info(f"Name index {path} is stale, rebuilding.")
+    except FileNotFoundError:
+        logger.info(f"No name index at {path}, building one.")
+    except IndexFormatError as e:
+        logger.warning(f"Ignoring unusable name index: {e}")
+
+    index = NameIndex.build(table.column("name").to_pylist(), source_version)
+    try:
+        index.save(path)
+        logger.info(f"Saved name index with {index.n_names} names to {path}.")
+    except OSError as e:
+        logger.warning(f"Could not save name index to {path}: {e}")
+    return index
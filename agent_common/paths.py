@@ -0,0 +1,21 @@
+import os
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agentic_rag")
+
+def get_cache_dir(*parts: str) -> str:
+    """
+    Return (and create) a directory under the local cache root.
+
+    The root defaults to ``~/.cache/agentic_rag`` and can be moved with the
+    ``AGENTIC_RAG_CACHE_DIR`` environment variable.
+
+    Args:
+        *parts: Optional sub-directory components below the cache root
+
+    Returns:
+        str: Absolute path of the directory
+    """
+    root = os.getenv("AGENTIC_RAG_CACHE_DIR", DEFAULT_CACHE_DIR)
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,340 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from .http_client import get_session
+from .single_flight import SingleFlight, flight_group
+from .tool_output import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com"
+DEFAULT_CONTEXT_TTL = 3600.0
+# Gemini rejects explicit caches below a model-dependent size; smaller prefixes rely on implicit caching
+DEFAULT_CONTEXT_MIN_TOKENS = 4096
+# A cache is re-registered this long before it expires
+REFRESH_MARGIN = 60.0
+# After a failed registration, wait this long before trying again
+RETRY_AFTER = 300.0
+
+DEFAULT_BLOCK_TOKENS = 128
+DEFAULT_SIMULATED_MIN_TOKENS = 1024
+DEFAULT_SIMULATED_CAPACITY = 4096
+
+# JSON Schema keywords Gemini's function declarations accept
+_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "properties", "required", "items"}
+
+_prefixes: Dict[str, str] = {}
+_observed: Dict[str, str] = {}
+_prefix_lock = threading.Lock()
+
+_shared: Optional["GeminiContextCache"] = None
+_shared_lock = threading.Lock()
+
+
+def prefix_fingerprint(text: str) -> str:
+    """Short hash of a prompt prefix, to compare prefixes in logs."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def static_prefix(name: str, build: Callable[[], str]) -> str:
+    """
+    Return the static prompt prefix ``name``, building it on first use.
+
+    The result is kept for the life of the process, so every call sends the
+    same bytes and provider prefix caches can match it.
+    """
+    with _prefix_lock:
+        prefix = _prefixes.get(name)
+        if prefix is None:
+            prefix = _prefixes[name] = build()
+            logger.info(
+                f"Static prompt prefix '{name}': ~{estimate_tokens(prefix)} tokens, "
+                f"fingerprint {prefix_fingerprint(prefix)}"
+            )
+        return prefix
+
+
+def check_prefix(name: str, text: str) -> None:
+    """
+    Record the prefix sent under ``name`` and warn when it changes.
+
+    For prompts built by a framework (the ReAct header, the smolagents system
+    prompt): a prefix that changes between calls cannot be served from the
+    provider's cache.
+    """
+    fingerprint = prefix_fingerprint(text)
+    with _prefix_lock:
+        previous = _observed.get(name)
+        _observed[name] = fingerprint
+    if previous is None:
+        logger.info(f"Prompt prefix '{name}': ~{estimate_tokens(text)} tokens, fingerprint {fingerprint}")
+    elif previous != fingerprint:
+        logger.warning(
+            f"Prompt prefix '{name}' changed ({previous} -> {fingerprint}); provider prefix caching cannot match it."
+        )
+
+
+def gemini_schema(schema: Any) -> Any:
+    """JSON Schema reduced to the subset Gemini function declarations accept."""
+    if isinstance(schema, list):
+        return [gemini_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    result = {}
+    for key, value in schema.items():
+        if key not in _SCHEMA_KEYS:
+            continue
+        if key == "properties":
+            result[key] = {name: gemini_schema(prop) for name, prop in value.items()}
+        elif key == "items":
+            result[key] = gemini_schema(value)
+        else:
+            result[key] = value
+    return result
+
+
+@dataclass
+class ContextCacheStats:
+    """Counters of the explicit context cache."""
+    registrations: int = 0
+    reuses: int = 0
+    skipped_small: int = 0
+    failures: int = 0
+
+
+class GeminiContextCache:
+    """
+    Registers static prompt prefixes as Gemini cached contents.
+
+    A prefix (system instruction plus tool declarations) is uploaded once via
+    ``cachedContents`` and referenced by name on every later call, so only the
+    conversation is sent and billed at the full input rate. Registrations
+    are refreshed shortly before their TTL runs out; concurrent callers for
+    the same prefix share one registration, and the lock is not held during
+    the HTTP call. Prefixes below ``min_tokens`` are not registered: Gemini
+    refuses them, and implicit prefix caching covers them when the prefix is
+    byte-stable, so for them :meth:`get` is a no-op returning None. Explicit
+    caches need a versioned model id (``gemini-1.5-flash-002``, not
+    ``gemini-1.5-flash``). A failed registration is retried after a pause;
+    callers fall back to sending the full prompt.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        ttl: Optional[float] = None,
+        min_tokens: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        clock: Callable[[], float] = time.time,
+        flight: Optional[SingleFlight] = None,
+    ) -> None:
+        """
+        Args:
+            api_key: Gemini API key (``GEMINI_API_KEY``)
+            base_url: API root (``GEMINI_API_BASE``, default the public endpoint)
+            ttl: Lifetime of a registration in seconds (``GEMINI_CONTEXT_CACHE_TTL``, default 3600)
+            min_tokens: Smallest prefix registered (``GEMINI_CONTEXT_CACHE_MIN_TOKENS``, default 4096)
+            session: HTTP session (default: the shared pooled session)
+            clock: Time source, for tests
+            flight: Coalesces concurrent registrations of the same prefix
+        """
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.base_url = (base_url or os.getenv("GEMINI_API_BASE") or GEMINI_API_URL).rstrip("/")
+        self.ttl = ttl if ttl is not None else float(os.getenv("GEMINI_CONTEXT_CACHE_TTL", DEFAULT_CONTEXT_TTL))
+        self.min_tokens = (
+            min_tokens
+            if min_tokens is not None
+            else int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", DEFAULT_CONTEXT_MIN_TOKENS))
+        )
+        self._session = session
+        self._clock = clock
+        self._flight = flight if flight is not None else SingleFlight("gemini_context_cache")
+        self._lock = threading.Lock()
+        # (model, fingerprint) -> (cached content name or None after a failure, valid until)
+        self._entries: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._stats = ContextCacheStats()
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session or get_session()
+
+    def get(self, model: str, system_instruction: str, tools: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """
+        Return the cached content name for this prefix, registering it if needed.
+
+        Args:
+            model: Model id, e.g. ``gemini-1.5-flash-002``
+            system_instruction: Static system prompt
+            tools: Function declarations (``name``, ``description``, ``parameters``)
+
+        Returns:
+            ``cachedContents/...`` to pass as ``cached_content``, or None to send the full prompt
+            (always None below ``min_tokens``)
+        """
+        if not self.api_key:
+            return None
+        prefix_tokens = estimate_tokens(system_instruction + repr(tools or []))
+        if prefix_tokens < self.min_tokens:
+            with self._lock:
+                self._stats.skipped_small += 1
+            return None
+        key = (model, prefix_fingerprint(system_instruction + repr(tools or [])))
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[0]
+        # One registration per prefix at a time; callers of other prefixes are not held up by it
+        return self._flight.do(key, lambda: self._refresh(key, model, system_instruction, tools))
+
+    def _fresh(self, key: Tuple[str, str]) -> Optional[Tuple[Optional[str], float]]:
+        """The unexpired entry for ``key``, counting a reuse, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() >= entry[1]:
+                return None
+            if entry[0] is not None:
+                self._stats.reuses += 1
+            return entry
+
+    def _refresh(
+        self, key: Tuple[str, str], model: str, system_instruction: str, tools: Optional[List[Dict[str, Any]]]
+    ) -> Optional[str]:
+        # A registration that finished while this caller was waiting to lead is reused
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[0]
+        name = self._register(model, system_instruction, tools)
+        now = self._clock()
+        with self._lock:
+            if name is None:
+                self._stats.failures += 1
+                self._entries[key] = (None, now + RETRY_AFTER)
+            else:
+                self._stats.registrations += 1
+                self._entries[key] = (name, now + self.ttl - REFRESH_MARGIN)
+        return name
+
+    def _register(self, model: str, system_instruction: str, tools: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        body: Dict[str, Any] = {
+            "model": model if model.startswith("models/") else f"models/{model}",
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "ttl": f"{int(self.ttl)}s",
+        }
+        if tools:
+            body["tools"] = [{"functionDeclarations": tools}]
+        try:
+            response = self.session.post(
+                f"{self.base_url}/v1beta/cachedContents", params={"key": self.api_key}, json=body
+            )
+            response.raise_for_status()
+            name = response.json()["name"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning(f"Could not register a Gemini context cache for {model}, sending full prompts: {e}")
+            return None
+        logger.info(f"Registered Gemini context cache {name} for {model} (TTL {int(self.ttl)}s)")
+        return name
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return asdict(self._stats)
+
+
+def context_cache_enabled() -> bool:
+    """Whether static prefixes may be registered as cached contents; disable with ``GEMINI_CONTEXT_CACHE=0``."""
+    return os.getenv("GEMINI_CONTEXT_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def get_context_cache() -> GeminiContextCache:
+    """Return the process-wide :class:`GeminiContextCache`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = GeminiContextCache(flight=flight_group("gemini_context_cache"))
+        return _shared
+
+
+@dataclass
+class PrefixCacheStats:
+    """Counters of the simulated prefix cache."""
+    requests: int = 0
+    hits: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class PrefixCacheSimulator:
+    """
+    Model of a provider's implicit prefix cache, for tests and the stand-in.
+
+    Prompts are split into blocks of ``block_tokens``. A block is cached when
+    the same prompt bytes up to its end were seen before. The cached part of a
+    prompt is its leading run of cached blocks, counted only when it reaches
+    ``min_tokens``. This mirrors providers that bill a repeated prefix at a
+    discount: a prefix that changes by one byte early on matches nothing after it.
+    At most ``capacity`` blocks are kept (least recently used first out).
+    """
+
+    def __init__(
+        self,
+        block_tokens: int = DEFAULT_BLOCK_TOKENS,
+        min_tokens: int = DEFAULT_SIMULATED_MIN_TOKENS,
+        capacity: int = DEFAULT_SIMULATED_CAPACITY,
+    ) -> None:
+        if block_tokens <= 0:
+            raise ValueError("block_tokens must be positive")
+        self.block_chars = block_tokens * CHARS_PER_TOKEN
+        self.min_tokens = min_tokens
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._blocks: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = PrefixCacheStats()
+
+    def observe(self, prompt: str) -> int:
+        """
+        Account for one request with ``prompt``.
+
+        Returns:
+            Tokens of ``prompt`` that a provider would serve from its cache
+        """
+        digest = hashlib.sha256()
+        hashes = []
+        for start in range(0, len(prompt) - self.block_chars + 1, self.block_chars):
+            # Chained hash: a block's identity includes everything before it
+            digest.update(prompt[start:start + self.block_chars].encode("utf-8"))
+            hashes.append(digest.hexdigest())
+        with self._lock:
+            matched = 0
+            for block in hashes:
+                if block not in self._blocks:
+                    break
+                matched += 1
+            for block in hashes:
+                self._blocks[block] = None
+                self._blocks.move_to_end(block)
+            while len(self._blocks) > self.capacity:
+                self._blocks.popitem(last=False)
+            cached = matched * self.block_chars // CHARS_PER_TOKEN
+            if cached < self.min_tokens:
+                cached = 0
+            self._stats.requests += 1
+            self._stats.prompt_tokens += estimate_tokens(prompt)
+            self._stats.cached_tokens += cached
+            if cached:
+                self._stats.hits += 1
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters and the share of prompt tokens served from cache."""
+        with self._lock:
+            stats = asdict(self._stats)
+        stats["cached_ratio"] = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        return stats
@@ -0,0 +1,98 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, punctuation and whitespace so equivalent queries share a cache entry."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip()
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with per-entry TTL, bound to an index version.
+
+    Every lookup carries the version of the index that would answer it. When a
+    new version shows up, all entries computed against the old index are
+    dropped, so a rebuilt index never serves stale results.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def _check_version(self, version: str) -> None:
+        # Caller holds the lock
+        if version != self._version:
+            if self._entries:
+                self._stats.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        """Return the cached value for ``key`` under ``version``, or None."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: str, value: Any) -> None:
+        """Store ``value`` for ``key`` under ``version``, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            if self._entries:
+                self._stats.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters plus current size and hit rate."""
+        with self._lock:
+            return {**asdict(self._stats), "size": len(self._entries), "hit_rate": self._stats.hit_rate}
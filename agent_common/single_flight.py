@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_groups: Dict[str, "SingleFlight"] = {}
+_groups_lock = threading.Lock()
+
+
+@dataclass
+class FlightStats:
+    """Counters describing how many calls were coalesced."""
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    @property
+    def coalesce_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _consume_exception(future: "asyncio.Future[Any]") -> None:
+    # Avoid "exception was never retrieved" warnings when every caller was cancelled
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into one execution.
+
+    While a call for a key is in flight, further calls for the same key wait
+    for it and receive the same result (or exception) instead of running
+    again. Nothing is kept once the call finishes, so this complements a
+    cache rather than replacing it. :meth:`do` serves threads and
+    :meth:`ado` serves coroutines on an event loop.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Task[Any]"] = {}
+        self._stats = FlightStats()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight, in which case wait for its result.
+
+        Raises:
+            Exception: Whatever the shared execution of ``fn`` raised
+        """
+        with self._lock:
+            self._stats.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._stats.executions += 1
+                if call.error is not None:
+                    self._stats.errors += 1
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async :meth:`do`: await ``fn()`` unless an identical call is in flight on this event loop.
+
+        Raises:
+            Exception: Whatever the shared execution of ``fn`` raised
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self._stats.calls += 1
+            task = self._tasks.get(flight_key)
+            if task is None:
+                # The shared call runs as its own task, so cancelling any one caller
+                # (the first included) does not cancel it for the others
+                task = self._tasks[flight_key] = loop.create_task(self._run(flight_key, fn))
+                task.add_done_callback(_consume_exception)
+            else:
+                self._stats.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, flight_key: Tuple[int, Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        failed = False
+        try:
+            return await fn()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._tasks[flight_key]
+                self._stats.executions += 1
+                if failed:
+                    self._stats.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters plus the number of calls in flight."""
+        with self._lock:
+            return {
+                **asdict(self._stats),
+                "coalesce_rate": self._stats.coalesce_rate,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
+
+
+def flight_group(name: str) -> SingleFlight:
+    """Return the process-wide :class:`SingleFlight` called ``name``, creating it on first use."""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters of every flight group, keyed by name."""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,256 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+
+from .paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DATASET_ID = "agents-course/unit3-invitees"
+DATASET_SPLIT = "train"
+COLUMNS = ("name", "relation", "description", "email")
+SEGMENT_ROWS = 50_000
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class RefreshResult:
+    """Outcome of a snapshot refresh."""
+    content_hash: str
+    num_rows: int
+    segments_written: int
+    segments_reused: int
+    segments_removed: int
+
+    @property
+    def changed(self) -> bool:
+        return self.segments_written > 0 or self.segments_removed > 0
+
+
+def _snapshot_dir() -> str:
+    return get_cache_dir("snapshots", DATASET_ID.replace("/", "--"))
+
+
+def is_offline() -> bool:
+    """Whether ``AGENTIC_RAG_OFFLINE`` forbids network access to the Hub."""
+    return os.getenv("AGENTIC_RAG_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _segment_hash(segment: pa.Table) -> str:
+    """Hash the row contents of a segment, independent of its Arrow encoding."""
+    digest = hashlib.sha256()
+    for column in COLUMNS:
+        digest.update(column.encode("utf-8"))
+        for value in segment.column(column).to_pylist():
+            encoded = ("" if value is None else str(value)).encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+    return digest.hexdigest()
+
+
+def write_atomic(path: str, write: Any) -> None:
+    """Write ``path`` through ``write(file)`` into a temporary file that replaces it once complete."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _write_segment(path: str, segment: pa.Table) -> None:
+    def write(f: Any) -> None:
+        with pa.ipc.new_file(f, segment.schema) as writer:
+            writer.write_table(segment)
+    write_atomic(path, write)
+
+
+def read_manifest() -> Optional[Dict[str, Any]]:
+    """Return the current snapshot manifest, or None if no snapshot exists."""
+    path = os.path.join(_snapshot_dir(), MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot() -> Optional[pa.Table]:
+    """
+    Memory-map the local snapshot without copying any row data.
+
+    The manifest's content hash is attached to the table's schema metadata
+    (see :func:`content_hash_of`).
+
+    Returns:
+        Optional[pa.Table]: The snapshot table, or None if there is no usable snapshot
+    """
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+
+    directory = _snapshot_dir()
+    tables = []
+    for segment in manifest["segments"]:
+        path = os.path.join(directory, segment["file"])
+        try:
+            source = pa.memory_map(path, "r")
+        except FileNotFoundError:
+            logger.warning(f"Snapshot segment {path} is missing; ignoring the snapshot.")
+            return None
+        tables.append(pa.ipc.open_file(source).read_all())
+
+    if tables:
+        table = pa.concat_tables(tables)
+    else:
+        table = pa.table({column: pa.array([], type=pa.string()) for column in COLUMNS})
+    # Lets consumers key derived artifacts (e.g. the search index) on the snapshot content
+    return table.replace_schema_metadata({"content_hash": manifest["content_hash"]})
+
+
+def content_hash_of(table: pa.Table) -> Optional[str]:
+    """Return the snapshot content hash attached by :func:`load_snapshot`, if any."""
+    metadata = table.schema.metadata or {}
+    value = metadata.get(b"content_hash")
+    return value.decode("ascii") if value is not None else None
+
+
+def fetch_from_hub() -> pa.Table:
+    """Download the invitees dataset from the Hugging Face Hub as an Arrow table."""
+    import datasets
+
+    logger.info(f"Downloading {DATASET_ID} from the Hugging Face Hub...")
+    guest_dataset = datasets.load_dataset(DATASET_ID, split=DATASET_SPLIT)
+    return guest_dataset.data.table.select(list(COLUMNS))
+
+
+def refresh_snapshot(table: Optional[pa.Table] = None) -> RefreshResult:
+    """
+    Bring the local snapshot in line with the source dataset.
+
+    The snapshot is split into fixed-size segments stored as Arrow IPC files
+    named after the hash of their rows. Segments whose content is unchanged are
+    reused as-is, so a refresh only writes the segments that contain changed
+    rows (for an append-only guest list, just the tail segment).
+
+    Args:
+        table: Source rows; downloaded from the Hub when omitted
+
+    Returns:
+        RefreshResult: Summary of what was written
+    """
+    if table is None:
+        table = fetch_from_hub()
+    table = table.select(list(COLUMNS))
+
+    directory = _snapshot_dir()
+    previous = read_manifest() or {"segments": []}
+    previous_files = {segment["file"] for segment in previous["segments"]}
+
+    segments: List[Dict[str, Any]] = []
+    written = reused = 0
+    for start in range(0, table.num_rows, SEGMENT_ROWS):
+        segment = table.slice(start, SEGMENT_ROWS)
+        segment_hash = _segment_hash(segment)
+        file_name = f"seg-{segment_hash[:32]}.arrow"
+        if file_name in previous_files and os.path.exists(os.path.join(directory, file_name)):
+            reused += 1
+        else:
+            _write_segment(os.path.join(directory, file_name), segment.combine_chunks())
+            written += 1
+        segments.append({"file": file_name, "hash": segment_hash, "num_rows": segment.num_rows})
+
+    content_hash = hashlib.sha256("".join(s["hash"] for s in segments).encode("ascii")).hexdigest()
+    manifest = {
+        "dataset": DATASET_ID,
+        "split": DATASET_SPLIT,
+        "content_hash": content_hash,
+        "num_rows": table.num_rows,
+        "segments": segments,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    if previous.get("content_hash") != content_hash or written:
+        encoded = json.dumps(manifest, indent=2).encode("utf-8")
+        write_atomic(os.path.join(directory, MANIFEST_NAME), lambda f: f.write(encoded))
+
+    removed = 0
+    for file_name in previous_files - {segment["file"] for segment in segments}:
+        try:
+            os.unlink(os.path.join(directory, file_name))
+            removed += 1
+        except OSError as e:
+            # Still mapped by another process on some platforms; harmless to leave behind
+            logger.debug(f"Could not remove stale snapshot segment {file_name}: {e}")
+
+    result = RefreshResult(content_hash, table.num_rows, written, reused, removed)
+    logger.info(
+        f"Snapshot refreshed: {result.num_rows} rows, {written} segment(s) written, "
+        f"{reused} reused, {removed} removed."
+    )
+    return result
+
+
+def load_invitees(refresh: bool = False) -> pa.Table:
+    """
+    Return the invitees dataset, served from the local snapshot whenever possible.
+
+    The Hub is only contacted when ``refresh`` is requested or no snapshot
+    exists yet. Setting ``AGENTIC_RAG_OFFLINE=1`` forbids that download.
+
+    Args:
+        refresh: Re-download the dataset and update changed snapshot segments first
+
+    Returns:
+        pa.Table: Table with the ``name``, ``relation``, ``description`` and ``email`` columns
+
+    Raises:
+        RuntimeError: If no snapshot exists and downloading is not allowed
+    """
+    if not refresh:
+        table = load_snapshot()
+        if table is not None:
+            logger.info(f"Loaded invitees snapshot with {table.num_rows} rows.")
+            return table
+
+    if is_offline():
+        raise RuntimeError(
+            "No local invitees snapshot available and AGENTIC_RAG_OFFLINE is set. "
+            "Run `python -m agent_common.snapshot --refresh` on a machine with network access "
+            "and copy the snapshot directory over."
+        )
+
+    refresh_snapshot()
+    table = load_snapshot()
+    if table is None:
+        raise RuntimeError("Invitees snapshot could not be read back after refreshing.")
+    return table
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manage the local invitees dataset snapshot.")
+    parser.add_argument("--refresh", action="store_true", help="Re-download and update changed segments.")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_snapshot()
+    manifest = read_manifest()
+    if manifest is None:
+        print("No snapshot found.")
+    else:
+        print(f"Snapshot {manifest['content_hash'][:16]}: {manifest['num_rows']} rows in "
+              f"{len(manifest['segments'])} segment(s), updated {manifest['updated_at']}.")
@@ -0,0 +1,567 @@
+"""
+Local stand-in for the external services the agents call.
+
+Each service gets its own port, so clients only need a different base URL:
+
+    weather   OpenWeatherMap        WEATHER_API_URL
+    gemini    Gemini API            GEMINI_API_BASE
+    hub       Hugging Face Hub API  HF_ENDPOINT
+    search    DuckDuckGo search     WEB_SEARCH_URL
+    langfuse  Langfuse ingestion    LANGFUSE_HOST, LANGFUSE_HOST_OTEL
+
+In ``record`` mode requests are forwarded to the real service and the
+responses are written to a cassette directory. DuckDuckGo has no HTTP API, so
+the stand-in runs the search itself. In ``replay`` mode only the cassettes are
+served, so no network is needed. ``auto`` replays what was recorded and
+records the rest. Langfuse is a sink: telemetry is accepted and dropped.
+Latency and error rates can be injected per service to reproduce a degraded
+dependency. Gemini context caching is simulated: ``cachedContents`` are held
+locally and responses report the prompt tokens a provider prefix cache would
+have served (``usageMetadata.cachedContentTokenCount``).
+
+Usage:
+    python -m agent_common.standin --mode record
+    python -m agent_common.standin --mode replay --latency 50 --latency weather=2000 --error-rate search=0.2
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from .paths import get_cache_dir
+from .prompt_cache import DEFAULT_BLOCK_TOKENS, DEFAULT_SIMULATED_MIN_TOKENS, PrefixCacheSimulator
+from .snapshot import write_atomic
+from .tool_output import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "auto")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_BASE_PORT = 8700
+DEFAULT_ERROR_STATUS = 503
+# Answered on a replay miss; deliberately not a status the clients retry
+MISS_STATUS = 501
+UPSTREAM_TIMEOUT = 60.0
+
+# Query parameters that carry credentials: kept out of cassette keys and files
+SECRET_PARAMS = {"appid", "key", "api_key", "apikey", "token", "access_token"}
+# Headers never copied between client, upstream and cassette
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "content-length", "content-encoding", "host", "set-cookie",
+}
+
+
+@dataclass
+class Service:
+    """One stand-in service: its upstream (None for the built-in search) and port offset."""
+    name: str
+    upstream: Optional[str]
+    port_offset: int
+    sink: bool = False
+
+
+SERVICES: Dict[str, Service] = {
+    service.name: service
+    for service in (
+        Service("weather", "http://api.openweathermap.org", 1),
+        Service("gemini", "https://generativelanguage.googleapis.com", 2),
+        Service("hub", "https://huggingface.co", 3),
+        Service("search", None, 4),
+        Service("langfuse", None, 5, sink=True),
+    )
+}
+
+
+def client_env(host: str = DEFAULT_HOST, base_port: int = DEFAULT_BASE_PORT) -> Dict[str, str]:
+    """Environment variables that point the agents at a stand-in listening on ``host``/``base_port``."""
+    def url(name: str) -> str:
+        return f"http://{host}:{base_port + SERVICES[name].port_offset}"
+
+    return {
+        "WEATHER_API_URL": f"{url('weather')}/data/2.5/weather",
+        "GEMINI_API_BASE": url("gemini"),
+        "HF_ENDPOINT": url("hub"),
+        "WEB_SEARCH_URL": f"{url('search')}/search",
+        "LANGFUSE_HOST": url("langfuse"),
+        "LANGFUSE_HOST_OTEL": f"{url('langfuse')}/api/public/otel",
+    }
+
+
+def _parse_per_service(values: Optional[List[str]], default: float) -> Dict[str, float]:
+    """Parse ``["50", "weather=2000"]`` into ``{"*": 50, "weather": 2000}``."""
+    parsed = {"*": default}
+    for value in values or []:
+        name, _, number = value.rpartition("=")
+        if name and name not in SERVICES:
+            raise ValueError(f"Unknown service '{name}'; expected one of {', '.join(SERVICES)}.")
+        parsed[name or "*"] = float(number)
+    return parsed
+
+
+class Faults:
+    """
+    Injected latency and errors, per service.
+
+    Args:
+        latency_ms: Added delay per service (``"*"`` for the default)
+        jitter_ms: Uniform +/- jitter around the delay, per service
+        error_rate: Fraction of requests answered with ``error_status``, per service
+        error_status: HTTP status of injected errors
+        seed: Seed of the random generator, for reproducible runs
+    """
+
+    def __init__(
+        self,
+        latency_ms: Optional[Dict[str, float]] = None,
+        jitter_ms: Optional[Dict[str, float]] = None,
+        error_rate: Optional[Dict[str, float]] = None,
+        error_status: int = DEFAULT_ERROR_STATUS,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = latency_ms or {"*": 0.0}
+        self.jitter_ms = jitter_ms or {"*": 0.0}
+        self.error_rate = error_rate or {"*": 0.0}
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get(values: Dict[str, float], service: str) -> float:
+        return values.get(service, values.get("*", 0.0))
+
+    def delay(self, service: str) -> float:
+        """Seconds to wait before answering a request for ``service``."""
+        latency = self._get(self.latency_ms, service)
+        jitter = self._get(self.jitter_ms, service)
+        with self._lock:
+            offset = self._rng.uniform(-jitter, jitter) if jitter else 0.0
+        return max(0.0, latency + offset) / 1000
+
+    def should_fail(self, service: str) -> bool:
+        rate = self._get(self.error_rate, service)
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+
+@dataclass
+class Recording:
+    """A captured response."""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+@dataclass
+class StandInStats:
+    """Counters of one stand-in run."""
+    requests: int = 0
+    replayed: int = 0
+    recorded: int = 0
+    misses: int = 0
+    injected_errors: int = 0
+    upstream_errors: int = 0
+
+
+class Cassettes:
+    """
+    Recorded responses, one JSON file per request.
+
+    Files are named after a hash of the service, method, path, query (without
+    credentials) and body (JSON bodies are canonicalized first). Identical
+    requests therefore replay the same response.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or get_cache_dir("standin")
+
+    @staticmethod
+    def request_key(service: str, method: str, path: str, body: bytes) -> Tuple[str, Dict[str, Any]]:
+        """Return the hash identifying a request and the redacted request description stored with it."""
+        parts = urlsplit(path)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+        try:
+            canonical = json.dumps(json.loads(body), sort_keys=True).encode("utf-8") if body else b""
+        except ValueError:
+            canonical = body
+        request = {
+            "service": service,
+            "method": method,
+            "path": parts.path,
+            "query": urlencode(query),
+            "body_sha256": hashlib.sha256(canonical).hexdigest(),
+        }
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+        return digest, request
+
+    def _path(self, service: str, digest: str) -> str:
+        return os.path.join(self.directory, service, digest[:2], f"{digest}.json")
+
+    def load(self, service: str, digest: str) -> Optional[Recording]:
+        try:
+            with open(self._path(service, digest), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        response = entry["response"]
+        if response["encoding"] == "base64":
+            body = base64.b64decode(response["body"])
+        else:
+            body = response["body"].encode("utf-8")
+        return Recording(response["status"], response["headers"], body)
+
+    def save(self, service: str, digest: str, request: Dict[str, Any], recording: Recording) -> None:
+        try:
+            body, encoding = recording.body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(recording.body).decode("ascii"), "base64"
+        entry = {
+            "request": request,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": {"status": recording.status, "headers": recording.headers, "encoding": encoding, "body": body},
+        }
+        path = self._path(service, digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        encoded = json.dumps(entry, indent=2, ensure_ascii=False).encode("utf-8")
+        write_atomic(path, lambda f: f.write(encoded))
+
+
+class GeminiContexts:
+    """
+    Gemini context caching, simulated.
+
+    ``cachedContents`` registrations are kept here and never forwarded. A
+    request that references one gets its system instruction and tools inlined
+    before it is replayed or forwarded, so cassettes do not depend on cache
+    names. Every ``generateContent`` prompt goes through a
+    :class:`PrefixCacheSimulator`, and the response reports the cached part as
+    ``usageMetadata.cachedContentTokenCount``, as the real API does.
+    """
+
+    def __init__(self, simulator: Optional[PrefixCacheSimulator] = None) -> None:
+        self.simulator = simulator or PrefixCacheSimulator()
+        self._lock = threading.Lock()
+        self._contents: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def is_create(method: str, path: str) -> bool:
+        return method == "POST" and urlsplit(path).path.rstrip("/").endswith("/cachedContents")
+
+    @staticmethod
+    def _is_generate(path: str) -> bool:
+        return ":generateContent" in path or ":streamGenerateContent" in path
+
+    def create(self, body: bytes) -> Recording:
+        """Register a cached content and answer like ``cachedContents.create``."""
+        try:
+            content = json.loads(body)
+        except ValueError:
+            return Recording(400, {"Content-Type": "application/json"}, b'{"error": {"message": "Invalid JSON"}}')
+        canonical = json.dumps(content, sort_keys=True)
+        name = f"cachedContents/standin-{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]}"
+        with self._lock:
+            self._contents[name] = content
+        payload = {
+            "name": name,
+            "model": content.get("model"),
+            "ttl": content.get("ttl"),
+            "usageMetadata": {"totalTokenCount": estimate_tokens(canonical)},
+        }
+        return Recording(200, {"Content-Type": "application/json"}, json.dumps(payload).encode("utf-8"))
+
+    def prepare(self, path: str, body: bytes) -> Tuple[bytes, Optional[int]]:
+        """
+        Inline a referenced cached content and simulate the prefix cache for a generate request.
+
+        Returns:
+            The body to replay or forward, and the cached prompt tokens (None for other requests)
+        """
+        if not self._is_generate(path):
+            return body, None
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return body, None
+        explicit = 0
+        name = request.pop("cachedContent", None)
+        if name:
+            with self._lock:
+                cached_content = self._contents.get(name)
+            if cached_content is None:
+                # Not one of ours: pass the request through untouched
+                return body, None
+            for field in ("systemInstruction", "tools", "toolConfig"):
+                if field in cached_content:
+                    request[field] = cached_content[field]
+            explicit = estimate_tokens(json.dumps(
+                [cached_content.get("systemInstruction"), cached_content.get("tools")], sort_keys=True
+            ))
+            body = json.dumps(request).encode("utf-8")
+        # The prompt in the order the model reads it: instruction, tools, then the turns
+        parts = [request.get("systemInstruction"), request.get("tools")] + list(request.get("contents") or [])
+        prompt = "".join(json.dumps(part, sort_keys=True) for part in parts)
+        return body, max(explicit, self.simulator.observe(prompt))
+
+    @staticmethod
+    def _annotate(payload: Any, cached: int) -> Any:
+        if isinstance(payload, dict) and "usageMetadata" in payload:
+            payload["usageMetadata"]["cachedContentTokenCount"] = cached
+        elif isinstance(payload, list):
+            for item in payload:
+                GeminiContexts._annotate(item, cached)
+        return payload
+
+    def annotate(self, recording: Recording, cached: int) -> Recording:
+        """``recording`` with ``cachedContentTokenCount`` set in its usage metadata (JSON and SSE bodies)."""
+        if recording.status >= 400:
+            return recording
+        try:
+            text = recording.body.decode("utf-8")
+        except UnicodeDecodeError:
+            return recording
+        if text.lstrip().startswith(("{", "[")):
+            try:
+                body = json.dumps(self._annotate(json.loads(text), cached)).encode("utf-8")
+            except ValueError:
+                return recording
+        else:
+            lines = []
+            for line in text.split("\n"):
+                if line.startswith("data: "):
+                    try:
+                        line = "data: " + json.dumps(self._annotate(json.loads(line[6:]), cached))
+                    except ValueError:
+                        pass
+                lines.append(line)
+            body = "\n".join(lines).encode("utf-8")
+        return Recording(recording.status, recording.headers, body)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            contents = len(self._contents)
+        return {**self.simulator.stats(), "cached_contents": contents}
+
+
+class StandIn:
+    """
+    Runs one HTTP listener per service on consecutive ports.
+
+    Args:
+        mode: ``record``, ``replay`` or ``auto`` (see the module docstring)
+        cassettes: Where responses are recorded and replayed from
+        faults: Injected latency and errors
+        host: Interface to listen on
+        base_port: Services listen on ``base_port + 1`` and up
+        gemini_contexts: Simulated Gemini context and prefix caching
+    """
+
+    def __init__(
+        self,
+        mode: str = "replay",
+        cassettes: Optional[Cassettes] = None,
+        faults: Optional[Faults] = None,
+        host: str = DEFAULT_HOST,
+        base_port: int = DEFAULT_BASE_PORT,
+        gemini_contexts: Optional[GeminiContexts] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'; expected one of {', '.join(MODES)}.")
+        self.mode = mode
+        self.cassettes = cassettes or Cassettes()
+        self.faults = faults or Faults()
+        self.host = host
+        self.base_port = base_port
+        self.gemini_contexts = gemini_contexts or GeminiContexts()
+        self._upstream = requests.Session()
+        self._servers: List[ThreadingHTTPServer] = []
+        self._lock = threading.Lock()
+        self._stats = StandInStats()
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self._stats, field, getattr(self._stats, field) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = asdict(self._stats)
+        stats["gemini_prefix_cache"] = self.gemini_contexts.stats()
+        return stats
+
+    def _forward(self, service: Service, method: str, path: str, headers: Dict[str, str], body: bytes) -> Recording:
+        if service.upstream is None:
+            return self._search(path)
+        forwarded = {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+        # Plain bodies keep cassettes readable
+        forwarded["Accept-Encoding"] = "identity"
+        response = self._upstream.request(
+            method, service.upstream + path, headers=forwarded, data=body or None,
+            allow_redirects=False, timeout=UPSTREAM_TIMEOUT,
+        )
+        kept = {k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS}
+        return Recording(response.status_code, kept, response.content)
+
+    @staticmethod
+    def _search(path: str) -> Recording:
+        from .web_search import DEFAULT_REGION, FETCH_RESULTS, duckduckgo_backend
+
+        params = dict(parse_qsl(urlsplit(path).query))
+        results = duckduckgo_backend(
+            params.get("q", ""), int(params.get("max_results", FETCH_RESULTS)), params.get("region", DEFAULT_REGION),
+        )
+        body = json.dumps(results or []).encode("utf-8")
+        return Recording(200, {"Content-Type": "application/json"}, body)
+
+    def respond(self, service: Service, method: str, path: str, headers: Dict[str, str], body: bytes) -> Recording:
+        """Answer one request: sink, injected error, replay or upstream (recording it)."""
+        cached_tokens = None
+        if service.name == "gemini":
+            if self.gemini_contexts.is_create(method, path):
+                self._count("requests")
+                return self.gemini_contexts.create(body)
+            body, cached_tokens = self.gemini_contexts.prepare(path, body)
+        recording = self._respond(service, method, path, headers, body)
+        if cached_tokens is not None:
+            recording = self.gemini_contexts.annotate(recording, cached_tokens)
+        return recording
+
+    def _respond(self, service: Service, method: str, path: str, headers: Dict[str, str], body: bytes) -> Recording:
+        self._count("requests")
+        delay = self.faults.delay(service.name)
+        if delay:
+            time.sleep(delay)
+        if self.faults.should_fail(service.name):
+            self._count("injected_errors")
+            payload = {"cod": self.faults.error_status, "message": "Injected error (stand-in)"}
+            return Recording(self.faults.error_status, {"Content-Type": "application/json"}, json.dumps(payload).encode())
+        if service.sink:
+            return Recording(200, {"Content-Type": "application/json"}, b'{"successes": [], "errors": []}')
+
+        digest, request = self.cassettes.request_key(service.name, method, path, body)
+        if self.mode != "record":
+            recording = self.cassettes.load(service.name, digest)
+            if recording is not None:
+                self._count("replayed")
+                return recording
+            if self.mode == "replay":
+                self._count("misses")
+                logger.warning(f"No recording for {service.name} {method} {request['path']}?{request['query']}")
+                payload = {"cod": MISS_STATUS, "message": f"No recording for {method} {request['path']} (stand-in replay)"}
+                return Recording(MISS_STATUS, {"Content-Type": "application/json"}, json.dumps(payload).encode())
+
+        try:
+            recording = self._forward(service, method, path, headers, body)
+        except Exception as e:
+            self._count("upstream_errors")
+            logger.warning(f"Upstream {service.name} request failed: {e}")
+            payload = {"cod": 502, "message": f"Upstream request failed: {e}"}
+            return Recording(502, {"Content-Type": "application/json"}, json.dumps(payload).encode())
+        # Only successful exchanges and "not found" answers are worth replaying
+        if recording.status < 400 or recording.status == 404:
+            self.cassettes.save(service.name, digest, request, recording)
+            self._count("recorded")
+        return recording
+
+    def _handler(self, service: Service) -> type:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                recording = standin.respond(service, self.command, self.path, dict(self.headers.items()), body)
+                self.send_response(recording.status)
+                for name, value in recording.headers.items():
+                    if name.lower() not in HOP_HEADERS:
+                        self.send_header(name, value)
+                self.send_header("Content-Length", str(len(recording.body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(recording.body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _handle
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(f"{service.name}: {format % args}")
+
+        return Handler
+
+    def start(self) -> Dict[str, str]:
+        """Start every listener in the background and return the client environment."""
+        for service in SERVICES.values():
+            server = ThreadingHTTPServer((self.host, self.base_port + service.port_offset), self._handler(service))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f"standin-{service.name}", daemon=True).start()
+            self._servers.append(server)
+        logger.info(f"Stand-in services ({self.mode}) listening on {self.host}:{self.base_port + 1}-"
+                    f"{self.base_port + len(SERVICES)}, cassettes in {self.cassettes.directory}")
+        return client_env(self.host, self.base_port)
+
+    def stop(self) -> None:
+        """Stop every listener."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+        self._upstream.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Record/replay stand-in for the agents' external services.")
+    parser.add_argument("--mode", choices=MODES, default="replay")
+    parser.add_argument("--cassettes", help="Cassette directory (default: standin/ under the cache root).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--base-port", type=int, default=int(os.getenv("STANDIN_BASE_PORT", DEFAULT_BASE_PORT)))
+    parser.add_argument("--latency", action="append", metavar="[SERVICE=]MS", help="Injected latency; repeatable.")
+    parser.add_argument("--jitter", action="append", metavar="[SERVICE=]MS", help="Uniform +/- jitter; repeatable.")
+    parser.add_argument("--error-rate", action="append", metavar="[SERVICE=]RATE", help="Injected error rate; repeatable.")
+    parser.add_argument("--error-status", type=int, default=DEFAULT_ERROR_STATUS)
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latency and errors.")
+    parser.add_argument("--prefix-block-tokens", type=int, default=DEFAULT_BLOCK_TOKENS,
+                        help="Granularity of the simulated Gemini prefix cache.")
+    parser.add_argument("--prefix-min-tokens", type=int, default=DEFAULT_SIMULATED_MIN_TOKENS,
+                        help="Smallest prefix the simulated Gemini cache serves.")
+    args = parser.parse_args()
+
+    standin = StandIn(
+        mode=args.mode,
+        cassettes=Cassettes(args.cassettes),
+        faults=Faults(
+            latency_ms=_parse_per_service(args.latency, 0.0),
+            jitter_ms=_parse_per_service(args.jitter, 0.0),
+            error_rate=_parse_per_service(args.error_rate, 0.0),
+            error_status=args.error_status,
+            seed=args.seed,
+        ),
+        host=args.host,
+        base_port=args.base_port,
+        gemini_contexts=GeminiContexts(
+            PrefixCacheSimulator(block_tokens=args.prefix_block_tokens, min_tokens=args.prefix_min_tokens)
+        ),
+    )
+    print("# Point the agents at the stand-in:")
+    for name, value in standin.start().items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+        logger.info(f"Stand-in stats: {standin.stats()}")
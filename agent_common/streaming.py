@@ -0,0 +1,51 @@
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def streaming_enabled() -> bool:
+    """Whether the CLIs stream answers as they are generated; disable with ``AGENT_STREAM=0``."""
+    return os.getenv("AGENT_STREAM", "1").lower() not in ("0", "false", "no")
+
+
+class TurnTimer:
+    """
+    Latency of one streamed turn: time to first token, tool time and total.
+
+    Call :meth:`token` for every piece of text shown to the user,
+    :meth:`tool_started`/:meth:`tool_finished` around tool calls and
+    :meth:`finish` once the answer is complete; the measurements are logged.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.tool_calls = 0
+        self.tool_seconds = 0.0
+        self._tool_started: Optional[float] = None
+
+    def token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+            logger.info(f"Time to first token: {(self.first_token - self.started) * 1000:.0f} ms")
+
+    def tool_started(self) -> None:
+        self.tool_calls += 1
+        if self._tool_started is None:
+            self._tool_started = time.perf_counter()
+
+    def tool_finished(self) -> None:
+        if self._tool_started is not None:
+            self.tool_seconds += time.perf_counter() - self._tool_started
+            self._tool_started = None
+
+    def finish(self) -> None:
+        total = time.perf_counter() - self.started
+        ttft = f"{(self.first_token - self.started) * 1000:.0f} ms" if self.first_token is not None else "n/a"
+        logger.info(
+            f"Turn finished in {total * 1000:.0f} ms (first token {ttft}, "
+            f"{self.tool_calls} tool call(s), {self.tool_seconds * 1000:.0f} ms in tools)."
+        )
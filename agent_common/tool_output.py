@@ -0,0 +1,211 @@
+import logging
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .ingest import GUEST_FIELDS, format_guest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 500
+# Rough size of a token for English text with Gemini/GPT-style tokenizers
+CHARS_PER_TOKEN = 4
+# Smallest piece of a record worth keeping when it has to be cut
+MIN_RECORD_TOKENS = 40
+ELLIPSIS = " …"
+# Space kept for the "N more ... omitted" note
+NOTE_CHARS = 60
+
+# Queries that ask for contact details keep the guest's email
+_CONTACT_RE = re.compile(r"\b(e-?mail|mail|contact|reach|write|address)\b", re.IGNORECASE)
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+
+_budgets: Dict[str, "OutputBudget"] = {}
+_budgets_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text``; no tokenizer is needed for budgeting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """
+    Cut ``text`` to at most ``max_chars`` characters at the best boundary available.
+
+    Paragraph breaks are preferred, then sentence ends, line breaks and finally
+    spaces, as long as they keep at least half of the allowed length. A cut
+    text ends with an ellipsis.
+    """
+    if len(text) <= max_chars:
+        return text
+    limit = max_chars - len(ELLIPSIS)
+    if limit <= 0:
+        return ""
+    head = text[:limit]
+    cut = head.rfind("\n\n")
+    if cut < limit // 2:
+        sentence_ends = [match.end() for match in _SENTENCE_END_RE.finditer(head + " ")]
+        cut = sentence_ends[-1] if sentence_ends else -1
+    if cut < limit // 2:
+        cut = head.rfind("\n")
+    if cut < limit // 2:
+        cut = head.rfind(" ")
+    if cut >= limit // 2:
+        head = head[:cut]
+    return head.rstrip(" ,;:\n") + ELLIPSIS
+
+
+@dataclass
+class OutputStats:
+    """Token counters of one tool's outputs (estimated, see :func:`estimate_tokens`)."""
+    calls: int = 0
+    truncated: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+class OutputBudget:
+    """
+    Token budget applied to a tool's output before it enters the prompt.
+
+    Every ReAct step re-sends earlier observations, so each token cut here is
+    saved on every later model call. Records (guests, search hits) are kept
+    whole in rank order while they fit. The first record that does not fit is
+    cut at a sentence boundary if enough budget is left, and a note says how
+    many were left out. Plain text is cut at the last paragraph, sentence or
+    word boundary.
+    """
+
+    def __init__(self, name: str, max_tokens: Optional[int] = None) -> None:
+        """
+        Args:
+            name: Tool name, used to read ``TOOL_OUTPUT_TOKENS_<NAME>``
+            max_tokens: Budget in tokens (``TOOL_OUTPUT_TOKENS_<NAME>``, ``TOOL_OUTPUT_TOKENS``, default 500)
+        """
+        self.name = name
+        if max_tokens is None:
+            value = os.getenv(f"TOOL_OUTPUT_TOKENS_{name.upper()}") or os.getenv("TOOL_OUTPUT_TOKENS")
+            max_tokens = int(value) if value else DEFAULT_MAX_TOKENS
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._stats = OutputStats()
+
+    @property
+    def max_chars(self) -> int:
+        return self.max_tokens * CHARS_PER_TOKEN
+
+    def _account(self, source: str, output: str, truncated: bool) -> str:
+        tokens_in, tokens_out = estimate_tokens(source), estimate_tokens(output)
+        with self._lock:
+            self._stats.calls += 1
+            self._stats.tokens_in += tokens_in
+            self._stats.tokens_out += tokens_out
+            if truncated:
+                self._stats.truncated += 1
+        if tokens_in > tokens_out:
+            logger.debug(f"{self.name} output trimmed from ~{tokens_in} to ~{tokens_out} tokens.")
+        return output
+
+    def fit_text(self, text: str, source: Optional[str] = None) -> str:
+        """
+        Return ``text`` within the budget.
+
+        Args:
+            text: Tool output
+            source: What the output was derived from (e.g. before field
+                stripping), counted as the input when computing tokens saved
+        """
+        output = truncate_text(text, self.max_chars)
+        return self._account(source if source is not None else text, output, output != text)
+
+    def fit_records(
+        self,
+        records: Sequence[str],
+        separator: str = "\n\n",
+        source: Optional[str] = None,
+        noun: str = "result",
+    ) -> str:
+        """
+        Join ranked ``records`` with ``separator``, keeping as many whole records as fit.
+
+        Args:
+            records: Formatted records, best first
+            separator: Placed between records
+            source: Full output the records were derived from, for the tokens-saved counter
+            noun: What a record is, for the "N more ... omitted" note
+        """
+        budget = self.max_chars
+        kept: List[str] = []
+        for i, record in enumerate(records):
+            cost = len(record) + (len(separator) if kept else 0)
+            if cost <= budget:
+                kept.append(record)
+                budget -= cost
+                continue
+            omitted = len(records) - i
+            # Leave room for the separator and, if records remain, the note
+            room = budget - (len(separator) if kept else 0) - (len(separator) + NOTE_CHARS if omitted > 1 else 0)
+            if not kept or room >= MIN_RECORD_TOKENS * CHARS_PER_TOKEN:
+                kept.append(truncate_text(record, room))
+                omitted -= 1
+            if omitted:
+                kept.append(f"({omitted} more matching {noun}{'s' if omitted > 1 else ''} omitted to save space.)")
+            break
+        output = separator.join(kept)
+        full = separator.join(records)
+        return self._account(source if source is not None else full, output, output != full)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters, including ``tokens_saved``."""
+        with self._lock:
+            return {**asdict(self._stats), "tokens_saved": self._stats.tokens_saved, "max_tokens": self.max_tokens}
+
+
+def output_budget(name: str) -> OutputBudget:
+    """Return the process-wide :class:`OutputBudget` of tool ``name``, creating it on first use."""
+    with _budgets_lock:
+        budget = _budgets.get(name)
+        if budget is None:
+            budget = _budgets[name] = OutputBudget(name)
+        return budget
+
+
+def output_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters of every tool's output budget, keyed by tool name."""
+    with _budgets_lock:
+        budgets = list(_budgets.values())
+    return {budget.name: budget.stats() for budget in budgets}
+
+
+def relevant_guest_fields(query: str) -> Tuple[str, ...]:
+    """Guest fields worth returning for ``query``: the email only when contact details are asked for."""
+    if _CONTACT_RE.search(query):
+        return GUEST_FIELDS
+    return tuple(field for field in GUEST_FIELDS if field != "email")
+
+
+def format_guests(query: str, records: Sequence[Dict[str, Any]], separator: str = "\n\n") -> str:
+    """
+    Guest retriever output for ranked snapshot ``records``, within the ``guest_info`` budget.
+
+    Records without the snapshot fields (stores built from plain texts) are
+    returned as their text, subject to the same budget.
+    """
+    fields = relevant_guest_fields(query)
+    full: List[str] = []
+    compact: List[str] = []
+    for record in records:
+        if all(field in record for field in GUEST_FIELDS):
+            full.append(format_guest(record))
+            compact.append(format_guest(record, fields))
+        else:
+            full.append(record["text"])
+            compact.append(record["text"])
+    return output_budget("guest_info").fit_records(compact, separator, source=separator.join(full), noun="guest")
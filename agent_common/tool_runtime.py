@@ -0,0 +1,361 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_DEADLINE = 10.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_TURN_BUDGET = 60.0
+DEFAULT_WORKERS = 8
+
+# Monotonic time by which the current conversation turn should be answered
+_turn_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("turn_deadline", default=None)
+
+_runtimes: Dict[str, "ToolRuntime"] = {}
+_runtimes_lock = threading.Lock()
+
+
+class ToolUnavailable(RuntimeError):
+    """A dependency was not called (open circuit, spent turn budget) or missed its deadline."""
+
+    def __init__(self, name: str, reason: str) -> None:
+        super().__init__(f"{name} is unavailable: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+def _env_float(name: str, key: str, default: float) -> float:
+    """``<key>_<NAME>`` if set, else ``<key>``, else ``default``."""
+    value = os.getenv(f"{key}_{name.upper()}") or os.getenv(key)
+    return float(value) if value else default
+
+
+def turn_budget_seconds() -> float:
+    """Latency budget of one conversation turn, from ``TURN_LATENCY_BUDGET`` (seconds)."""
+    return float(os.getenv("TURN_LATENCY_BUDGET", DEFAULT_TURN_BUDGET))
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current turn's latency budget, or None outside a :func:`turn_budget`."""
+    deadline = _turn_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextlib.contextmanager
+def turn_budget(seconds: Optional[float] = None) -> Iterator[None]:
+    """
+    Give the tool calls made inside the block a shared latency budget.
+
+    Args:
+        seconds: Length of the budget; defaults to ``TURN_LATENCY_BUDGET``
+
+    A nested block can only shorten the budget, never extend it.
+    """
+    deadline = time.monotonic() + (seconds if seconds is not None else turn_budget_seconds())
+    outer = _turn_deadline.get()
+    token = _turn_deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _turn_deadline.reset(token)
+
+
+def with_turn_budget(fn: Callable[..., T], seconds: Optional[float] = None) -> Callable[..., T]:
+    """
+    Wrap an agent entry point so every call runs inside a :func:`turn_budget`.
+
+    Generators (streaming runs) are budgeted from their first step to their
+    last. Each step may resume on a different thread, so the budget is set
+    around every step rather than once.
+    """
+    def budgeted_steps(steps: Iterator[Any]) -> Iterator[Any]:
+        deadline: Optional[float] = None
+        while True:
+            if deadline is None:
+                deadline = time.monotonic() + (seconds if seconds is not None else turn_budget_seconds())
+            token = _turn_deadline.set(deadline)
+            try:
+                step = next(steps)
+            except StopIteration:
+                return
+            finally:
+                _turn_deadline.reset(token)
+            yield step
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with turn_budget(seconds):
+            result = fn(*args, **kwargs)
+        if inspect.isgenerator(result):
+            return budgeted_steps(result)  # type: ignore[return-value]
+        return result
+
+    return wrapper
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    are refused for ``reset_timeout`` seconds. Then a single trial call is let
+    through (half-open). Its success closes the circuit, and its failure opens
+    it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial call through (0 when not open)."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; moving to half-open claims the single trial call."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give back a trial call that ended without a verdict, so the next call can probe."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+                self._opened_at = self._clock() - self.reset_timeout
+
+
+@dataclass
+class RuntimeStats:
+    """Counters of one :class:`ToolRuntime`."""
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    over_budget: int = 0
+
+
+class ToolRuntime:
+    """
+    Guards the calls a tool makes to one external dependency.
+
+    Every call gets a deadline of ``deadline`` seconds, cut short when the
+    current turn's budget (see :func:`turn_budget`) has less time left. A call
+    that misses it raises :class:`ToolUnavailable` and the caller moves on.
+    A synchronous call keeps running on its worker thread, but its result is
+    dropped. Failures feed a :class:`CircuitBreaker`. While it is open, or once
+    the turn budget is spent, calls fail immediately with
+    :class:`ToolUnavailable` instead of waiting on a degraded dependency.
+    ``is_failure`` decides which exceptions count against the dependency (a
+    "not found" answer, for instance, should not). Every exception is
+    re-raised either way.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+        max_workers: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            name: Dependency name, used in messages and to read per-dependency settings
+            deadline: Seconds per call (``TOOL_DEADLINE_<NAME>``, ``TOOL_DEADLINE``, default 10)
+            failure_threshold: Consecutive failures that open the circuit
+                (``TOOL_BREAKER_THRESHOLD[_<NAME>]``, default 5)
+            reset_timeout: Seconds the circuit stays open (``TOOL_BREAKER_RESET[_<NAME>]``, default 30)
+            is_failure: Whether an exception counts as a dependency failure; all do by default
+            max_workers: Threads running synchronous calls (``TOOL_RUNTIME_WORKERS``, default 8)
+            clock: Monotonic clock used by the circuit breaker
+        """
+        self.name = name
+        self.deadline = deadline if deadline is not None else _env_float(name, "TOOL_DEADLINE", DEFAULT_DEADLINE)
+        self.breaker = CircuitBreaker(
+            failure_threshold or int(_env_float(name, "TOOL_BREAKER_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+            reset_timeout if reset_timeout is not None else _env_float(name, "TOOL_BREAKER_RESET", DEFAULT_RESET_TIMEOUT),
+            clock,
+        )
+        self.is_failure = is_failure or (lambda error: True)
+        self.max_workers = max_workers or int(os.getenv("TOOL_RUNTIME_WORKERS", DEFAULT_WORKERS))
+        self._lock = threading.Lock()
+        self._stats = RuntimeStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self._stats, field, getattr(self._stats, field) + 1)
+
+    def _admit(self) -> float:
+        """Check the turn budget and the circuit; return the timeout for this call."""
+        self._count("calls")
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            self._count("over_budget")
+            raise ToolUnavailable(self.name, "the latency budget of this turn is spent")
+        if not self.breaker.allow():
+            self._count("rejected")
+            retry_in = self.breaker.retry_in()
+            if retry_in > 0:
+                raise ToolUnavailable(self.name, f"it failed repeatedly and is paused for another {retry_in:.0f}s")
+            raise ToolUnavailable(self.name, "it failed repeatedly and is being probed again")
+        return self.deadline if remaining is None else min(self.deadline, remaining)
+
+    def _timed_out(self, timeout: float) -> ToolUnavailable:
+        self._count("timeouts")
+        if timeout < self.deadline:
+            # Cut short by the turn budget: not the dependency's fault
+            self.breaker.release()
+            return ToolUnavailable(self.name, f"no answer within the {timeout:.1f}s left in this turn's budget")
+        self._failed()
+        logger.warning(f"{self.name} did not answer within {timeout:g}s.")
+        return ToolUnavailable(self.name, f"no answer within {timeout:g}s")
+
+    def _failed(self) -> None:
+        self._count("failures")
+        was_open = self.breaker.state == CircuitBreaker.OPEN
+        self.breaker.record_failure()
+        if not was_open and self.breaker.state == CircuitBreaker.OPEN:
+            logger.warning(f"Circuit for {self.name} is open for {self.breaker.reset_timeout:g}s.")
+
+    def _settle(self, error: Optional[BaseException]) -> None:
+        if error is None or not self.is_failure(error):
+            self._count("successes")
+            self.breaker.record_success()
+        else:
+            self._failed()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-call")
+            return self._executor
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run ``fn(*args, **kwargs)`` under the deadline and circuit breaker.
+
+        Raises:
+            ToolUnavailable: If the call was refused or missed its deadline
+            Exception: Whatever ``fn`` raised
+        """
+        timeout = self._admit()
+        context = contextvars.copy_context()
+        future = self._pool().submit(context.run, fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise self._timed_out(timeout) from None
+        except Exception as e:
+            self._settle(e)
+            raise
+        self._settle(None)
+        return result
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Async :meth:`call`: await ``fn(*args, **kwargs)``, cancelling it at the deadline.
+
+        Raises:
+            ToolUnavailable: If the call was refused or missed its deadline
+            Exception: Whatever ``fn`` raised
+        """
+        timeout = self._admit()
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(timeout) from None
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._settle(e)
+            raise
+        self._settle(None)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters plus the circuit state."""
+        with self._lock:
+            stats = asdict(self._stats)
+        return {**stats, "state": self.breaker.state, "deadline": self.deadline}
+
+
+def tool_runtime(name: str, **kwargs: Any) -> ToolRuntime:
+    """
+    Return the process-wide :class:`ToolRuntime` called ``name``, creating it on first use.
+
+    ``kwargs`` are passed to the constructor on first use only.
+    """
+    with _runtimes_lock:
+        runtime = _runtimes.get(name)
+        if runtime is None:
+            runtime = _runtimes[name] = ToolRuntime(name, **kwargs)
+        return runtime
+
+
+def runtime_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters of every process-wide runtime, keyed by name."""
+    with _runtimes_lock:
+        runtimes = list(_runtimes.values())
+    return {runtime.name: runtime.stats() for runtime in runtimes}
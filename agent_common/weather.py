@@ -0,0 +1,446 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Set, Union
+
+import aiohttp
+import requests
+
+from .async_http import get_json
+from .http_client import get_session
+from .single_flight import SingleFlight, flight_group
+from .tool_runtime import ToolRuntime, ToolUnavailable, tool_runtime
+
+logger = logging.getLogger(__name__)
+
+OPENWEATHERMAP_URL = "http://api.openweathermap.org/data/2.5/weather"
+DEFAULT_TTL = 600.0
+DEFAULT_STALE_TTL = 3600.0
+DEFAULT_NOT_FOUND_TTL = 3600.0
+DEFAULT_MAXSIZE = 1024
+
+# Common country names and non-ISO codes mapped to the ISO 3166 codes OpenWeatherMap expects
+COUNTRY_ALIASES = {
+    "uk": "gb",
+    "england": "gb",
+    "scotland": "gb",
+    "wales": "gb",
+    "great britain": "gb",
+    "united kingdom": "gb",
+    "usa": "us",
+    "u s a": "us",
+    "u s": "us",
+    "united states": "us",
+    "united states of america": "us",
+    "america": "us",
+    "deutschland": "de",
+    "germany": "de",
+    "france": "fr",
+    "japan": "jp",
+    "china": "cn",
+    "india": "in",
+    "spain": "es",
+    "italy": "it",
+    "canada": "ca",
+    "australia": "au",
+}
+
+_SPACE_RE = re.compile(r"\s+")
+_DOTS_RE = re.compile(r"\.")
+
+
+class WeatherError(Exception):
+    """Base class for weather lookup failures."""
+
+
+class LocationNotFound(WeatherError):
+    """OpenWeatherMap does not know the location (HTTP 404)."""
+
+
+class WeatherAPIError(WeatherError):
+    """OpenWeatherMap answered, but with an error payload."""
+
+
+class WeatherHTTPError(WeatherError):
+    """OpenWeatherMap answered with an HTTP error status other than 404."""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"{status_code} Error: {message}")
+        self.status_code = status_code
+
+
+class WeatherConnectionError(WeatherError):
+    """OpenWeatherMap could not be reached (connection error or timeout)."""
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the service is degraded, as opposed to a bad location or API key."""
+    if isinstance(error, LocationNotFound):
+        return False
+    if isinstance(error, WeatherHTTPError):
+        return error.status_code == 429 or error.status_code >= 500
+    return True
+
+
+@dataclass
+class WeatherData:
+    """Data class for weather information."""
+    main_weather: str
+    description: str
+    temp: Optional[float]
+    feels_like: Optional[float]
+    humidity: Optional[int]
+    wind_speed: Optional[float]
+    city_name: str
+
+
+@dataclass
+class WeatherCacheStats:
+    """Counters describing weather cache effectiveness."""
+    hits: int = 0
+    stale_hits: int = 0
+    not_found_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+
+
+class _NotFound:
+    """Cached "location not found" answer; each hit raises a fresh :class:`LocationNotFound`."""
+
+
+# Caching the exception itself would grow its traceback with every re-raise
+_NOT_FOUND = _NotFound()
+
+
+@dataclass
+class _Entry:
+    value: Union[WeatherData, _NotFound]
+    fresh_until: float
+    stale_until: float
+
+
+def parse_weather_data(data: Dict[str, Any]) -> WeatherData:
+    """Parse weather data from an OpenWeatherMap response."""
+    weather_info = (data.get("weather") or [{}])[0]
+    main_info = data.get("main", {})
+    wind_info = data.get("wind", {})
+    return WeatherData(
+        main_weather=weather_info.get("main", "N/A"),
+        description=weather_info.get("description", "N/A"),
+        temp=main_info.get("temp"),
+        feels_like=main_info.get("feels_like"),
+        humidity=main_info.get("humidity"),
+        wind_speed=wind_info.get("speed"),
+        city_name=data.get("name", "Unknown"),
+    )
+
+
+def normalize_location(location: str) -> str:
+    """
+    Canonical form of a location, used as the cache key and for the API query.
+
+    Case and whitespace are folded and the country part is mapped to its ISO
+    code, so "London, UK", " london,gb " and "LONDON , United Kingdom" share one
+    entry.
+    """
+    parts = [_SPACE_RE.sub(" ", part).strip() for part in location.lower().split(",")]
+    parts = [part for part in parts if part]
+    if len(parts) > 1:
+        country = _DOTS_RE.sub(" ", parts[-1])
+        country = _SPACE_RE.sub(" ", country).strip()
+        parts[-1] = COUNTRY_ALIASES.get(country, country)
+    return ",".join(parts)
+
+
+class WeatherClient:
+    """
+    OpenWeatherMap client with a TTL cache shared by every agent's weather tool.
+
+    Parsed results are cached per normalized location for ``ttl`` seconds.
+    After that they are still served, while a background refresh runs, until
+    ``stale_ttl`` has passed (stale-while-revalidate); only then does a caller
+    wait for the API again. "Location not found" answers are cached for
+    ``not_found_ttl`` seconds. Other errors are never cached. Concurrent
+    misses for the same location are coalesced into one request. Requests run
+    under a :class:`~agent_common.tool_runtime.ToolRuntime`, so a slow or
+    failing API raises ``ToolUnavailable`` quickly instead of stalling.
+
+    :meth:`get` blocks on ``requests``; :meth:`aget` is its non-blocking
+    counterpart for async agents, backed by the same cache.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        not_found_ttl: Optional[float] = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+        clock: Callable[[], float] = time.monotonic,
+        flight: Optional[SingleFlight] = None,
+        runtime: Optional[ToolRuntime] = None,
+    ) -> None:
+        # WEATHER_API_URL points the client elsewhere, e.g. at the local stand-in (agent_common.standin)
+        self.base_url = base_url or os.getenv("WEATHER_API_URL", OPENWEATHERMAP_URL)
+        self.ttl = ttl if ttl is not None else float(os.getenv("WEATHER_CACHE_TTL", DEFAULT_TTL))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv("WEATHER_CACHE_STALE_TTL", DEFAULT_STALE_TTL))
+        self.not_found_ttl = (
+            not_found_ttl if not_found_ttl is not None else float(os.getenv("WEATHER_NOT_FOUND_TTL", DEFAULT_NOT_FOUND_TTL))
+        )
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stats = WeatherCacheStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Concurrent misses (and refreshes) for one location share a single API request
+        self._flight = flight if flight is not None else SingleFlight("weather")
+        # Deadline and circuit breaker around every API request
+        self._runtime = runtime if runtime is not None else ToolRuntime("weather", is_failure=is_service_failure)
+
+    def _params(self, location: str, api_key: str) -> Dict[str, str]:
+        return {"q": location, "appid": api_key, "units": "metric"}
+
+    @staticmethod
+    def _parse_response(location: str, status: int, data: Any) -> WeatherData:
+        if status == 404:
+            raise LocationNotFound(location)
+        message = data.get("message") if isinstance(data, dict) else None
+        if status >= 400:
+            raise WeatherHTTPError(status, message or "Unexpected response")
+        if not isinstance(data, dict):
+            raise WeatherAPIError("Invalid response from weather service")
+        if str(data.get("cod")) != "200":
+            raise WeatherAPIError(message or "Unknown API error")
+        return parse_weather_data(data)
+
+    def fetch(self, location: str, api_key: str) -> WeatherData:
+        """
+        Query OpenWeatherMap without touching the cache.
+
+        Raises:
+            LocationNotFound: If the API does not know ``location``
+            WeatherHTTPError: On any other HTTP error status
+            WeatherAPIError: If the API returns an error payload
+            WeatherConnectionError: If the API cannot be reached
+        """
+        try:
+            response = get_session().get(self.base_url, params=self._params(location, api_key))
+        except requests.exceptions.RequestException as e:
+            raise WeatherConnectionError(str(e)) from e
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return self._parse_response(location, response.status_code, data)
+
+    async def afetch(self, location: str, api_key: str) -> WeatherData:
+        """Non-blocking :meth:`fetch`, for tools running on an event loop."""
+        try:
+            status, data = await get_json(self.base_url, params=self._params(location, api_key))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise WeatherConnectionError(str(e) or type(e).__name__) from e
+        return self._parse_response(location, status, data)
+
+    def _lookup(self, key: str, api_key: str) -> Optional[Union[WeatherData, _NotFound]]:
+        """Return the cached value for ``key`` (scheduling a refresh when stale), or None on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.stale_until:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if now >= entry.fresh_until:
+                self._stats.stale_hits += 1
+                self._schedule_refresh(key, api_key)
+            elif entry.value is _NOT_FOUND:
+                self._stats.not_found_hits += 1
+            else:
+                self._stats.hits += 1
+            return entry.value
+
+    @staticmethod
+    def _unwrap(value: Union[WeatherData, _NotFound], location: str) -> WeatherData:
+        if isinstance(value, _NotFound):
+            raise LocationNotFound(location)
+        return value
+
+    def get(self, location: str, api_key: str) -> WeatherData:
+        """
+        Return the weather for ``location``, from the cache when possible.
+
+        Raises:
+            LocationNotFound: If the location is unknown (possibly a cached answer)
+            WeatherError: If the lookup fails otherwise (see :meth:`fetch`)
+        """
+        key = normalize_location(location)
+        value = self._lookup(key, api_key)
+        if value is None:
+            value = self._load(key, api_key)
+        return self._unwrap(value, location)
+
+    async def aget(self, location: str, api_key: str) -> WeatherData:
+        """Non-blocking :meth:`get`; cache misses are fetched with ``aiohttp``."""
+        key = normalize_location(location)
+        value = self._lookup(key, api_key)
+        if value is None:
+            value = await self._flight.ado(key, lambda: self._afetch_entry(key, api_key))
+        return self._unwrap(value, location)
+
+    def _fetch_entry(self, key: str, api_key: str) -> Union[WeatherData, _NotFound]:
+        try:
+            value: Union[WeatherData, _NotFound] = self._runtime.call(self.fetch, key, api_key)
+        except LocationNotFound:
+            value = _NOT_FOUND
+        self._store(key, value)
+        return value
+
+    async def _afetch_entry(self, key: str, api_key: str) -> Union[WeatherData, _NotFound]:
+        try:
+            value: Union[WeatherData, _NotFound] = await self._runtime.acall(self.afetch, key, api_key)
+        except LocationNotFound:
+            value = _NOT_FOUND
+        self._store(key, value)
+        return value
+
+    def _load(self, key: str, api_key: str) -> Union[WeatherData, _NotFound]:
+        return self._flight.do(key, lambda: self._fetch_entry(key, api_key))
+
+    def _store(self, key: str, value: Union[WeatherData, _NotFound]) -> None:
+        now = self._clock()
+        if isinstance(value, _NotFound):
+            entry = _Entry(value, now + self.not_found_ttl, now + self.not_found_ttl)
+        else:
+            entry = _Entry(value, now + self.ttl, now + max(self.ttl, self.stale_ttl))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _schedule_refresh(self, key: str, api_key: str) -> None:
+        # Caller holds the lock; at most one refresh per location is in flight
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-refresh")
+        self._executor.submit(self._refresh, key, api_key)
+
+    def _refresh(self, key: str, api_key: str) -> None:
+        try:
+            self._load(key, api_key)
+            with self._lock:
+                self._stats.refreshes += 1
+        except (WeatherError, ToolUnavailable) as e:
+            # Keep serving the stale entry; the next stale hit retries
+            logger.warning(f"Background weather refresh for '{key}' failed: {e}")
+            with self._lock:
+                self._stats.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the counters plus the current size and request coalescing."""
+        with self._lock:
+            stats = {**asdict(self._stats), "size": len(self._entries)}
+        return {**stats, "flight": self._flight.stats(), "runtime": self._runtime.stats()}
+
+
+_client: Optional[WeatherClient] = None
+_client_lock = threading.Lock()
+
+
+def get_weather_client() -> WeatherClient:
+    """Return the process-wide :class:`WeatherClient`."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WeatherClient(
+                flight=flight_group("weather"),
+                runtime=tool_runtime("weather", is_failure=is_service_failure),
+            )
+        return _client
+
+
+def weather_api_key() -> Optional[str]:
+    """OpenWeatherMap API key (``OPENWEATHERMAP_API_KEY``), warning when it is not set."""
+    api_key = os.getenv("OPENWEATHERMAP_API_KEY")
+    if not api_key:
+        logger.warning("OPENWEATHERMAP_API_KEY environment variable not set. Weather tool will not function.")
+    return api_key
+
+
+def format_weather(weather: WeatherData) -> str:
+    """Weather report as returned by the agents' weather tools; missing values read "N/A"."""
+    def _value(value: Any, unit: str) -> str:
+        return f"{value}{unit}" if value is not None else "N/A"
+
+    return (
+        f"Weather in {weather.city_name}:\n"
+        f"- Condition: {weather.main_weather} ({weather.description})\n"
+        f"- Temperature: {_value(weather.temp, '°C')} (Feels like: {_value(weather.feels_like, '°C')})\n"
+        f"- Humidity: {_value(weather.humidity, '%')}\n"
+        f"- Wind Speed: {_value(weather.wind_speed, ' m/s')}"
+    )
+
+
+def format_weather_error(location: str, error: Exception) -> str:
+    """Turn a failed weather lookup into the message returned to the agent."""
+    if isinstance(error, LocationNotFound):
+        return f"Error fetching weather: Location '{location}' not found."
+    if isinstance(error, WeatherAPIError):
+        return f"Error fetching weather for '{location}': {error}"
+    if isinstance(error, WeatherHTTPError):
+        if error.status_code == 401:
+            return f"Error fetching weather for '{location}': Invalid API key or subscription issue."
+        return f"HTTP error occurred while fetching weather for '{location}': {error}"
+    if isinstance(error, WeatherConnectionError):
+        return f"Error connecting to weather service for '{location}': {error}"
+    if isinstance(error, ToolUnavailable):
+        # Slow or repeatedly failing service: answer fast and discourage retries
+        return f"Weather service is currently unavailable for '{location}' ({error.reason}). Do not retry it now."
+    logger.error(f"An unexpected error occurred while fetching weather for '{location}': {error}", exc_info=error)
+    return f"An unexpected error occurred while processing weather for '{location}'."
+
+
+def weather_report(location: str) -> str:
+    """
+    Current weather at ``location`` for an agent tool, or an error message.
+
+    Served from the shared :class:`WeatherClient`, so repeated and "not found"
+    lookups skip the API.
+    """
+    api_key = weather_api_key()
+    if not api_key:
+        return "Error: Weather API key not configured."
+    try:
+        return format_weather(get_weather_client().get(location, api_key))
+    except Exception as e:
+        return format_weather_error(location, e)
+
+
+async def aweather_report(location: str) -> str:
+    """Async :func:`weather_report`; cache misses use non-blocking HTTP."""
+    api_key = weather_api_key()
+    if not api_key:
+        return "Error: Weather API key not configured."
+    try:
+        return format_weather(await get_weather_client().aget(location, api_key))
+    except Exception as e:
+        return format_weather_error(location, e)
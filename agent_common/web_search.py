@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .async_http import get_json
+from .http_client import get_session
+from .paths import get_cache_dir
+from .query_cache import normalize_query
+from .single_flight import SingleFlight, flight_group
+from .snapshot import write_atomic
+from .tool_output import output_budget
+from .tool_runtime import ToolRuntime, ToolUnavailable, tool_runtime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 6 * 3600.0
+DEFAULT_MAX_RESULTS = 5
+DEFAULT_MAX_CHARS = 2000
+# Results requested from the backend; more than are returned, to survive deduplication
+FETCH_RESULTS = 10
+SNIPPET_CHARS = 400
+DEFAULT_REGION = "wt-wt"
+NO_RESULTS = "No results found! Try a less restrictive/shorter query."
+
+# Backend signature: (query, max_results, region) -> [{"title", "href", "body"}, ...]
+SearchBackend = Callable[[str, int, str], List[Dict[str, Any]]]
+AsyncSearchBackend = Callable[[str, int, str], Awaitable[List[Dict[str, Any]]]]
+
+
+class WebSearchError(RuntimeError):
+    """The search backend failed (network error, rate limit, ...)."""
+
+
+@dataclass
+class SearchResult:
+    """One web search hit."""
+    title: str
+    url: str
+    snippet: str
+
+
+def duckduckgo_backend(query: str, max_results: int, region: str) -> List[Dict[str, Any]]:
+    """Query DuckDuckGo through ``duckduckgo_search``."""
+    from duckduckgo_search import DDGS
+
+    return DDGS().text(query, region=region, max_results=max_results)
+
+
+def http_backend(url: str) -> SearchBackend:
+    """
+    Backend querying a JSON search endpoint, such as the local stand-in (``agent_common.standin``).
+
+    The endpoint takes ``q``, ``max_results`` and ``region`` query parameters
+    and answers with a list in the ``duckduckgo_search`` format.
+    """
+    def search(query: str, max_results: int, region: str) -> List[Dict[str, Any]]:
+        response = get_session().get(url, params={"q": query, "max_results": max_results, "region": region})
+        response.raise_for_status()
+        return response.json()
+
+    return search
+
+
+def async_http_backend(url: str) -> AsyncSearchBackend:
+    """Non-blocking :func:`http_backend`, on the event loop's shared ``aiohttp`` session."""
+    async def search(query: str, max_results: int, region: str) -> List[Dict[str, Any]]:
+        status, data = await get_json(url, {"q": query, "max_results": max_results, "region": region})
+        if status >= 400:
+            raise WebSearchError(f"{url} answered HTTP {status}")
+        return data
+
+    return search
+
+
+def default_backend() -> SearchBackend:
+    """DuckDuckGo, or the endpoint in ``WEB_SEARCH_URL`` when set."""
+    url = os.getenv("WEB_SEARCH_URL")
+    return http_backend(url) if url else duckduckgo_backend
+
+
+def default_async_backend() -> Optional[AsyncSearchBackend]:
+    """Async backend for the endpoint in ``WEB_SEARCH_URL``; None for DuckDuckGo, whose client only blocks."""
+    url = os.getenv("WEB_SEARCH_URL")
+    return async_http_backend(url) if url else None
+
+
+def canonical_url(url: str) -> str:
+    """URL used to detect duplicates: no fragment, tracking parameters, ``www.`` or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def _shorten(text: str, limit: int) -> str:
+    """Cut ``text`` to ``limit`` characters at a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    cut = text[:limit - 1]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,;:") + "…"
+
+
+class WebSearch:
+    """
+    Web search shared by every agent's search tool.
+
+    Backend results are cached on disk for ``ttl`` seconds, in files named
+    after the hash of the normalized query, so equivalent queries (case,
+    punctuation, whitespace) are answered locally across restarts and
+    processes. Results are deduplicated by URL, reordered by how many query
+    terms they contain (backend order breaks ties, hits without any query
+    term are dropped when others have one) and trimmed to
+    ``max_results`` hits and ``max_chars`` characters before they reach the
+    prompt. Identical concurrent searches share one backend request, which
+    runs under a deadline and circuit breaker (see
+    :class:`~agent_common.tool_runtime.ToolRuntime`).
+
+    :meth:`arun` queries ``abackend`` on the event loop when there is one
+    (an HTTP endpoint such as the stand-in). The DuckDuckGo client has no
+    async API, so without it searches run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[SearchBackend] = None,
+        ttl: Optional[float] = None,
+        max_results: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        region: str = DEFAULT_REGION,
+        cache_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        flight: Optional[SingleFlight] = None,
+        runtime: Optional[ToolRuntime] = None,
+        abackend: Optional[AsyncSearchBackend] = None,
+    ) -> None:
+        self.backend = backend or default_backend()
+        # A custom synchronous backend is not paired with the default async one
+        self.abackend = abackend if abackend is not None or backend is not None else default_async_backend()
+        self.ttl = ttl if ttl is not None else float(os.getenv("WEB_SEARCH_CACHE_TTL", DEFAULT_TTL))
+        self.max_results = (
+            max_results if max_results is not None else int(os.getenv("WEB_SEARCH_MAX_RESULTS", DEFAULT_MAX_RESULTS))
+        )
+        self.max_chars = max_chars if max_chars is not None else int(os.getenv("WEB_SEARCH_MAX_CHARS", DEFAULT_MAX_CHARS))
+        self.region = region
+        self.cache_dir = cache_dir
+        self._clock = clock
+        self._flight = flight if flight is not None else SingleFlight("web_search")
+        self._runtime = runtime if runtime is not None else ToolRuntime("web_search")
+
+    def _cache_path(self, normalized: str) -> str:
+        key = json.dumps({"q": normalized, "n": FETCH_RESULTS, "region": self.region}, sort_keys=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        root = self.cache_dir or get_cache_dir("web_search")
+        directory = os.path.join(root, digest[:2])
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{digest}.json")
+
+    def _read_cache(self, path: str) -> Optional[List[SearchResult]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable search cache entry {path}: {e}")
+            return None
+        if self._clock() - entry["fetched_at"] >= self.ttl:
+            return None
+        return [SearchResult(**result) for result in entry["results"]]
+
+    def _fetch(self, query: str, normalized: str, path: str) -> List[SearchResult]:
+        try:
+            raw = self._runtime.call(self.backend, query, FETCH_RESULTS, self.region) or []
+        except ToolUnavailable:
+            raise
+        except Exception as e:
+            raise WebSearchError(str(e)) from e
+        return self._store(normalized, path, raw)
+
+    async def _afetch(self, query: str, normalized: str, path: str) -> List[SearchResult]:
+        try:
+            raw = await self._runtime.acall(self.abackend, query, FETCH_RESULTS, self.region) or []
+        except ToolUnavailable:
+            raise
+        except Exception as e:
+            raise WebSearchError(str(e)) from e
+        return self._store(normalized, path, raw)
+
+    def _store(self, normalized: str, path: str, raw: List[Dict[str, Any]]) -> List[SearchResult]:
+        """Deduplicate backend hits and write them to the disk cache."""
+        results: List[SearchResult] = []
+        seen = set()
+        for item in raw:
+            url = item.get("href") or item.get("link") or item.get("url") or ""
+            key = canonical_url(url)
+            if not url or key in seen:
+                continue
+            seen.add(key)
+            results.append(SearchResult(
+                title=" ".join(str(item.get("title", "")).split()),
+                url=url,
+                snippet=str(item.get("body") or item.get("snippet") or ""),
+            ))
+
+        entry = {"query": normalized, "fetched_at": self._clock(), "results": [asdict(r) for r in results]}
+        encoded = json.dumps(entry).encode("utf-8")
+        try:
+            write_atomic(path, lambda f: f.write(encoded))
+        except OSError as e:
+            logger.warning(f"Could not save search cache entry {path}: {e}")
+        return results
+
+    def search(self, query: str) -> List[SearchResult]:
+        """
+        Return deduplicated results for ``query``, from the disk cache when fresh.
+
+        Raises:
+            WebSearchError: If the backend fails on a cache miss
+            ToolUnavailable: If the backend is too slow, failing repeatedly or out of turn budget
+        """
+        normalized = normalize_query(query)
+        path = self._cache_path(normalized)
+        results = self._read_cache(path)
+        if results is None:
+            results = self._flight.do(path, lambda: self._fetch(query, normalized, path))
+        return results
+
+    async def asearch(self, query: str) -> List[SearchResult]:
+        """
+        Async :meth:`search` over ``abackend``.
+
+        Raises:
+            WebSearchError: If the backend fails on a cache miss
+            ToolUnavailable: If the backend is too slow, failing repeatedly or out of turn budget
+        """
+        normalized = normalize_query(query)
+        path = self._cache_path(normalized)
+        results = self._read_cache(path)
+        if results is None:
+            results = await self._flight.ado(path, lambda: self._afetch(query, normalized, path))
+        return results
+
+    def select(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        """Keep the most relevant results that fit the result and character budgets."""
+        terms = {term for term in normalize_query(query).split() if len(term) > 2}
+
+        def overlap(result: SearchResult) -> int:
+            words = set(normalize_query(f"{result.title} {result.snippet}").split())
+            return len(terms & words)
+
+        scored = [(overlap(result), result) for result in results]
+        if any(score for score, _ in scored):
+            # Drop hits that share no term with the query when others do
+            scored = [(score, result) for score, result in scored if score]
+        # Stable sort: backend order breaks ties
+        ranked = [result for _, result in sorted(scored, key=lambda item: item[0], reverse=True)]
+        selected: List[SearchResult] = []
+        budget = self.max_chars
+        for result in ranked[:self.max_results]:
+            overhead = len(result.title) + len(result.url) + 6
+            if selected and overhead + 40 > budget:
+                break
+            snippet = _shorten(result.snippet, max(0, min(SNIPPET_CHARS, budget - overhead)))
+            selected.append(SearchResult(result.title, result.url, snippet))
+            budget -= overhead + len(snippet) + 2
+        return selected
+
+    def format(self, query: str, results: List[SearchResult]) -> str:
+        """Tool output for ``results``, within the configured budgets and the ``web_search`` token budget."""
+        selected = self.select(query, results)
+        if not selected:
+            return NO_RESULTS
+        blocks = [f"[{r.title}]({r.url})\n{r.snippet}" for r in selected]
+        # Everything the backend returned, for the tokens-saved counter
+        source = "\n\n".join(f"[{r.title}]({r.url})\n{r.snippet}" for r in results)
+        return output_budget("web_search").fit_records(blocks, source=source)
+
+    def _error(self, query: str, error: Exception) -> str:
+        if isinstance(error, ToolUnavailable):
+            return f"Web search is currently unavailable ({error.reason}). Do not retry it now; answer without it."
+        logger.warning(f"Web search for '{query}' failed: {error}")
+        return f"Error performing web search for '{query}': {error}"
+
+    def run(self, query: str) -> str:
+        """Search and format, returning an error message instead of raising."""
+        try:
+            return self.format(query, self.search(query))
+        except (WebSearchError, ToolUnavailable) as e:
+            return self._error(query, e)
+
+    async def arun(self, query: str) -> str:
+        """Non-blocking :meth:`run`: on ``abackend`` when set, otherwise in a worker thread."""
+        if self.abackend is None:
+            return await asyncio.to_thread(self.run, query)
+        try:
+            return self.format(query, await self.asearch(query))
+        except (WebSearchError, ToolUnavailable) as e:
+            return self._error(query, e)
+
+
+_shared: Optional[WebSearch] = None
+_shared_lock = threading.Lock()
+
+
+def get_web_search() -> WebSearch:
+    """Return the process-wide :class:`WebSearch`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WebSearch(flight=flight_group("web_search"), runtime=tool_runtime("web_search"))
+        return _shared
@@ -1,20 +1,28 @@
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import tools_condition
-from langgraph.prebuilt import ToolNode
+from langchain_core.runnables import RunnableLambda
 from .utils import tools
 from .agent_state import AgentState
-from .nodes import assistant
+from .history import manage_history
+from .nodes import aassistant, assistant
+from .tool_node import ConcurrentToolNode
 
 
 ## The graph
 builder = StateGraph(AgentState)
 
 # Define nodes: these do the work
-builder.add_node("assistant", assistant)
-builder.add_node("tools", ToolNode(tools))
+# Older turns are folded into a running summary before the model sees the history
+builder.add_node("history", manage_history)
+# Each node has a sync and an async path, so the graph serves both `invoke` and `ainvoke`
+builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+# All tool calls of one model turn run concurrently; deadlines come from the tool runtimes and the turn budget
+builder.add_node("tools", ConcurrentToolNode(tools))
 
 # Define edges: these determine how the control flow moves
-builder.add_edge(START, "assistant")
+builder.add_edge(START, "history")
+builder.add_edge("history", "assistant")
 builder.add_conditional_edges(
     "assistant",
     # If the latest message requires a tool, route to tools
@@ -22,4 +30,9 @@ builder.add_conditional_edges(
     tools_condition,
 )
 builder.add_edge("tools", "assistant")
-react_graph = builder.compile()
\ No newline at end of file
+react_graph = builder.compile()
+
+
+def compile_graph(checkpointer: BaseCheckpointSaver):
+    """The same graph, checkpointing conversations per thread id so a turn only sends its new message."""
+    return builder.compile(checkpointer=checkpointer)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from typing import TypedDict, List, Annotated
+from typing_extensions import NotRequired
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
 
@@ -7,6 +8,9 @@ class AgentState(TypedDict):
     Represents the state of the agent during conversation.
     
     Attributes:
-        messages: List of messages in the conversation history
+        messages: List of messages in the conversation history (recent turns, kept bounded by the history node)
+        summary: Extractive summary of the turns folded out of ``messages``, one line per turn;
+            absent until the first turn is folded
     """
-    messages: Annotated[List[AnyMessage], add_messages]
\ No newline at end of file
+    messages: Annotated[List[AnyMessage], add_messages]
+    summary: NotRequired[str]
\ No newline at end of file
@@ -1,9 +1,16 @@
+import asyncio
 import logging
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional
 from langchain_core.messages import HumanMessage, AIMessage
-from .agent_core import react_graph
+from .agent_core import compile_graph
+from .checkpointer import close_interrupted_turn, delete_thread, open_checkpointer, prune_thread
 from .langfuse_client import langfuse_handler
 from .agent_state import AgentState
+from agent_common.async_http import close_async_session
+from agent_common.console import read_line
+from agent_common.streaming import TurnTimer, streaming_enabled
+from agent_common.tool_runtime import turn_budget
 
 # Configure logging
 logging.basicConfig(
@@ -28,50 +35,135 @@ def process_response(conversation_state: AgentState) -> None:
         logger.warning("Received non-standard message type")
         print("Alfred: (Received a non-standard final message)")
 
-def main() -> None:
+def _chunk_text(content: Any) -> str:
+    """Text of a streamed message chunk; Gemini may send a list of content parts."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content or []
+    )
+
+async def stream_turn(graph: Any, turn_input: Dict[str, Any], config: Dict[str, Any]) -> Optional[AgentState]:
+    """
+    Run one turn with `astream_events`, printing tokens and tool progress as they arrive.
+
+    Args:
+        graph: The checkpointed agent graph
+        turn_input: The new user message; the checkpointer restores the rest of the conversation
+        config: Run config (thread id, callbacks, metadata)
+
+    Returns:
+        The final graph state, as `ainvoke` would return it
+    """
+    timer = TurnTimer()
+    final_state: Optional[AgentState] = None
+    # Whether the text printed since the last tool call is the answer (cached answers are not streamed)
+    answered = False
+    async for event in graph.astream_events(turn_input, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = _chunk_text(event["data"]["chunk"].content)
+            if text:
+                if not answered:
+                    print("Alfred: ", end="")
+                    answered = True
+                timer.token()
+                print(text, end="", flush=True)
+        elif kind == "on_tool_start":
+            timer.tool_started()
+            if answered:
+                print()
+                answered = False
+            print(f"  ⏳ {event['name']}({event['data'].get('input')})", flush=True)
+        elif kind == "on_tool_end":
+            timer.tool_finished()
+            print(f"  ✓ {event['name']} done", flush=True)
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            # The graph itself (the outermost run) ends with the full state
+            final_state = event["data"].get("output")
+    if answered:
+        print()
+    else:
+        timer.token()
+        process_response(final_state)
+    timer.finish()
+    return final_state
+
+async def main() -> None:
     """Run the interactive command-line interface for the agent."""
     try:
-        print("\n🎩 Welcome to the Alfred Agent! Type 'quit' or 'exit' to end the conversation.")
-        
-        # Initialize conversation state
-        conversation_state: AgentState = {"messages": []}
-        
-        while True:
-            try:
-                # Get user input
-                user_input = input("You: ").strip()
-                if user_input.lower() in ["quit", "exit"]:
-                    print("\n🎩 Alfred: Goodbye, sir.")
-                    break
-                    
-                # Update conversation state
-                current_messages = conversation_state.get("messages", [])
-                current_messages.append(HumanMessage(content=user_input))
-                
-                # Process input through the graph
-                logger.info(f"Processing query: \"{user_input}\"")
-                result = react_graph.invoke(
-                    input={"messages": current_messages},
-                    config={
-                        "callbacks": [langfuse_handler],
-                        "metadata": {"mode": "interactive"}
-                    }
-                )
-                
-                # Update state and display response
-                conversation_state = result
-                process_response(conversation_state)
-                
-            except KeyboardInterrupt:
-                print("\n🎩 Alfred: Interrupt received. Goodbye, sir.")
-                break
-            except Exception as e:
-                logger.error(f"Error processing input: {e}", exc_info=True)
-                print(f"\n💥 Alfred encountered an error: {e}")
-                
+        print("\n🎩 Welcome to the Alfred Agent! Type 'quit' or 'exit' to end the conversation, "
+              "'reset' to start over.")
+        async with open_checkpointer() as saver:
+            await _chat_loop(compile_graph(saver), saver)
     except Exception as e:
         logger.error(f"Fatal error in main execution: {e}", exc_info=True)
         raise
+    finally:
+        await close_async_session()
+
+async def _close_turn(graph: Any, config: Dict[str, Any], error: BaseException) -> None:
+    """Answer the tool calls an interrupted turn left open, so the session stays usable."""
+    try:
+        await close_interrupted_turn(graph, config, error)
+    except Exception as repair_error:
+        thread_id = config["configurable"]["thread_id"]
+        logger.error(f"Could not repair session '{thread_id}': {repair_error}", exc_info=True)
+
+async def _chat_loop(graph: Any, saver: Any) -> None:
+    """Answer queries in one session; its conversation is checkpointed under the session's thread id."""
+    # The conversation lives in the checkpointer and survives restarts
+    session_id = os.getenv("AGENT_SESSION", "cli")
+    config = {
+        "configurable": {"thread_id": session_id},
+        "callbacks": [langfuse_handler],
+        "metadata": {"mode": "interactive", "session_id": session_id}
+    }
+    snapshot = await graph.aget_state(config)
+    if snapshot.values.get("messages"):
+        logger.info(f"Resuming session '{session_id}' ({len(snapshot.values['messages'])} messages)")
+        print(f"🎩 Resuming session '{session_id}'.")
+        # The previous run may have ended between the model's tool calls and their results
+        await _close_turn(graph, config, RuntimeError("the previous run ended during this turn"))
+
+    while True:
+        try:
+            user_input = (await read_line("You: ")).strip()
+        except (EOFError, asyncio.CancelledError):
+            # Ctrl+D, or Ctrl+C (which asyncio.run delivers as a cancellation)
+            print("\n🎩 Alfred: Goodbye, sir.")
+            break
+        if user_input.lower() in ["quit", "exit"]:
+            print("\n🎩 Alfred: Goodbye, sir.")
+            break
+        if user_input.lower() == "reset":
+            await delete_thread(saver, session_id)
+            print("🎩 Alfred: Very well, sir. Starting afresh.")
+            continue
+
+        # Only the new message is sent; the checkpointer holds the rest of the conversation
+        turn_input = {"messages": [HumanMessage(content=user_input)]}
+
+        try:
+            # Process input through the graph
+            logger.info(f"Processing query: \"{user_input}\"")
+            with turn_budget():
+                if streaming_enabled():
+                    await stream_turn(graph, turn_input, config)
+                else:
+                    result = await graph.ainvoke(input=turn_input, config=config)
+                    process_response(result)
+            # Keeps the newest LANGGRAPH_CHECKPOINT_KEEP checkpoints of the session
+            await prune_thread(saver, session_id)
+        except asyncio.CancelledError as e:
+            print("\n🎩 Alfred: Interrupt received. Goodbye, sir.")
+            await _close_turn(graph, config, e)
+            break
+        except Exception as e:
+            logger.error(f"Error processing input: {e}", exc_info=True)
+            print(f"\n💥 Alfred encountered an error: {e}")
+            await _close_turn(graph, config, e)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import contextlib
+import logging
+import os
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from agent_common.paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP = 20
+
+
+def checkpoint_path() -> str:
+    """SQLite file of the sessions (``LANGGRAPH_CHECKPOINT_PATH``, default ``langgraph/checkpoints.sqlite`` under the cache root)."""
+    return os.getenv("LANGGRAPH_CHECKPOINT_PATH") or os.path.join(get_cache_dir("langgraph"), "checkpoints.sqlite")
+
+
+@contextlib.asynccontextmanager
+async def open_checkpointer(path: Optional[str] = None) -> AsyncIterator[AsyncSqliteSaver]:
+    """
+    Open the session store for the running event loop.
+
+    Every step of every thread (one thread per conversation) is checkpointed,
+    so a turn only sends the new message and sessions survive restarts.
+    """
+    path = path or checkpoint_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        await saver.setup()
+        yield saver
+
+
+async def prune_thread(saver: AsyncSqliteSaver, thread_id: str, keep: Optional[int] = None) -> int:
+    """
+    Drop all but the newest ``keep`` checkpoints of a thread, with their pending writes.
+
+    Only the latest checkpoint is needed to resume a conversation; the rest is
+    history for time travel. Without pruning, a session's rows grow with every step.
+
+    Args:
+        saver: Open session store
+        thread_id: Conversation to prune
+        keep: Checkpoints kept (``LANGGRAPH_CHECKPOINT_KEEP``, default 20)
+
+    Returns:
+        Number of checkpoints removed
+    """
+    keep = keep if keep is not None else int(os.getenv("LANGGRAPH_CHECKPOINT_KEEP", DEFAULT_KEEP))
+    if keep < 1:
+        raise ValueError("keep must be at least 1 (the latest checkpoint)")
+    async with saver.lock:
+        cursor = await saver.conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, thread_id, keep),
+        )
+        removed = cursor.rowcount
+        await saver.conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?)",
+            (thread_id, thread_id),
+        )
+        await saver.conn.commit()
+    if removed:
+        logger.debug(f"Pruned {removed} checkpoint(s) of thread '{thread_id}'")
+    return removed
+
+
+async def delete_thread(saver: AsyncSqliteSaver, thread_id: str) -> None:
+    """Forget a conversation: every checkpoint and write of ``thread_id``."""
+    async with saver.lock:
+        await saver.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        await saver.conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        await saver.conn.commit()
+
+
+async def close_interrupted_turn(graph: Any, config: RunnableConfig, error: BaseException) -> int:
+    """
+    Answer the tool calls a failed turn left open in a session.
+
+    A turn that raises between the model's tool calls and their results leaves
+    an ``AIMessage`` with unanswered ``tool_calls`` in the checkpoint; Gemini
+    rejects every later request on that thread. Each open call gets an error
+    ``ToolMessage``, recorded as if the tools node had produced it. Only calls
+    still at the end of the conversation are closed, so call this right after
+    the failure, or on resume before the next user message.
+
+    Returns:
+        Number of tool calls closed
+    """
+    snapshot = await graph.aget_state(config)
+    messages = snapshot.values.get("messages", [])
+    position = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], AIMessage)), None)
+    if position is None or not messages[position].tool_calls:
+        return 0
+    last_ai = messages[position]
+    if any(not isinstance(m, ToolMessage) for m in messages[position + 1:]):
+        # The conversation moved on; results appended now would follow the later messages
+        logger.warning(f"Tool calls left open earlier in thread '{config['configurable']['thread_id']}' cannot be closed")
+        return 0
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    reason = f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+    missing = [
+        ToolMessage(
+            content=f"Error: the tool call was interrupted ({reason}).",
+            tool_call_id=call["id"],
+            name=call["name"],
+            status="error",
+        )
+        for call in last_ai.tool_calls
+        if call["id"] not in answered
+    ]
+    if missing:
+        await graph.aupdate_state(config, {"messages": missing}, as_node="tools")
+        logger.warning(f"Closed {len(missing)} interrupted tool call(s) in thread '{config['configurable']['thread_id']}'")
+    return len(missing)
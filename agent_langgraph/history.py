@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+from agent_common.tool_output import CHARS_PER_TOKEN, estimate_tokens, truncate_text
+from .agent_state import AgentState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP_TURNS = 4
+DEFAULT_MAX_TOKENS = 6000
+DEFAULT_TOOL_TOKENS = 150
+DEFAULT_SUMMARY_TOKENS = 600
+# Characters of a question or answer kept in its summary line
+SUMMARY_LINE_CHARS = 240
+
+
+def _content_text(content: Any) -> str:
+    """Text of a message content, which may be a list of content parts."""
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content or [])
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Approximate prompt tokens taken by ``message``, tool call arguments included."""
+    tokens = estimate_tokens(_content_text(message.content))
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(call["name"] + json.dumps(call.get("args", {}), default=str))
+    return tokens
+
+
+def split_turns(messages: List[AnyMessage]) -> Tuple[List[AnyMessage], List[List[AnyMessage]]]:
+    """
+    Split a history into its leading system messages and its turns.
+
+    A turn starts with a ``HumanMessage`` and holds everything up to the next
+    one: the model's tool calls, their results and the answer. Removing whole
+    turns never separates a tool call from its result.
+    """
+    pinned: List[AnyMessage] = []
+    turns: List[List[AnyMessage]] = []
+    for message in messages:
+        if not turns and isinstance(message, SystemMessage):
+            pinned.append(message)
+        elif isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return pinned, turns
+
+
+def extract_turn(turn: List[AnyMessage]) -> str:
+    """
+    Extractive summary line for a turn: the question, the tools used and the answer.
+
+    The question and answer are quoted verbatim and cut to ``SUMMARY_LINE_CHARS``;
+    nothing is paraphrased, so details past the cut are lost.
+    """
+    question = next((m for m in turn if isinstance(m, HumanMessage)), None)
+    answers = [m for m in turn if isinstance(m, AIMessage) and _content_text(m.content).strip()]
+    tools = sorted({m.name or "tool" for m in turn if isinstance(m, ToolMessage)})
+    parts = []
+    if question is not None:
+        parts.append(f"User: {truncate_text(_content_text(question.content).strip(), SUMMARY_LINE_CHARS)}")
+    if tools:
+        parts.append(f"tools: {', '.join(tools)}")
+    if answers:
+        parts.append(f"Alfred: {truncate_text(_content_text(answers[-1].content).strip(), SUMMARY_LINE_CHARS)}")
+    return "- " + " | ".join(parts).replace("\n", " ")
+
+
+class HistoryManager:
+    """
+    Keeps the conversation sent to the model within a fixed size.
+
+    Runs once at the start of every turn, as the graph's ``history`` node. The
+    last ``keep_turns`` turns stay verbatim, except that tool results of earlier
+    turns are cut to ``tool_tokens``. Older turns are removed from the state
+    and folded into ``summary``, one extractive line per turn (see
+    :func:`extract_turn`), capped at ``summary_tokens`` (the oldest lines go
+    first). If the kept turns plus the summary still exceed ``max_tokens``,
+    more turns are folded, down to the current one. The summary is extractive
+    rather than written by the model, so the cost of a turn stays flat.
+    """
+
+    def __init__(
+        self,
+        keep_turns: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        tool_tokens: Optional[int] = None,
+        summary_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            keep_turns: Turns kept verbatim (``HISTORY_KEEP_TURNS``, default 4)
+            max_tokens: Ceiling for the history plus summary (``HISTORY_MAX_TOKENS``, default 6000)
+            tool_tokens: Size of a tool result from an earlier turn (``HISTORY_TOOL_TOKENS``, default 150)
+            summary_tokens: Size of the running summary (``HISTORY_SUMMARY_TOKENS``, default 600)
+        """
+        self.keep_turns = keep_turns if keep_turns is not None else int(os.getenv("HISTORY_KEEP_TURNS", DEFAULT_KEEP_TURNS))
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv("HISTORY_MAX_TOKENS", DEFAULT_MAX_TOKENS))
+        self.tool_tokens = (
+            tool_tokens if tool_tokens is not None else int(os.getenv("HISTORY_TOOL_TOKENS", DEFAULT_TOOL_TOKENS))
+        )
+        self.summary_tokens = (
+            summary_tokens
+            if summary_tokens is not None
+            else int(os.getenv("HISTORY_SUMMARY_TOKENS", DEFAULT_SUMMARY_TOKENS))
+        )
+        if self.keep_turns < 1:
+            raise ValueError("keep_turns must be at least 1 (the current turn)")
+
+    def _compact(self, message: AnyMessage) -> AnyMessage:
+        """``message`` with a bulky tool result cut to ``tool_tokens``; same id, so it replaces the original."""
+        if not isinstance(message, ToolMessage) or message_tokens(message) <= self.tool_tokens:
+            return message
+        text = truncate_text(_content_text(message.content), self.tool_tokens * CHARS_PER_TOKEN)
+        return message.model_copy(update={"content": text})
+
+    def _merge_summary(self, summary: str, turns: List[List[AnyMessage]]) -> str:
+        lines = [line for line in summary.splitlines() if line.strip()]
+        lines.extend(extract_turn(turn) for turn in turns)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def update(self, state: AgentState) -> Dict[str, Any]:
+        """
+        Graph node: the state update that brings the history back within bounds.
+
+        Returns:
+            ``RemoveMessage`` entries for folded messages, shortened tool results
+            (replacing the originals by id) and the new summary; empty when
+            nothing had to change
+        """
+        pinned, turns = split_turns(state["messages"])
+        summary = state.get("summary") or ""
+        if not turns:
+            return {}
+
+        keep = turns[-self.keep_turns:]
+        folded = turns[: len(turns) - len(keep)]
+        # Earlier turns keep their structure, but their tool results shrink
+        keep = [[self._compact(m) for m in turn] for turn in keep[:-1]] + [keep[-1]]
+
+        pinned_tokens = sum(message_tokens(m) for m in pinned)
+        turn_tokens = [sum(message_tokens(m) for m in turn) for turn in keep]
+        new_summary = self._merge_summary(summary, folded) if folded else summary
+        while len(keep) > 1 and pinned_tokens + sum(turn_tokens) + estimate_tokens(new_summary) > self.max_tokens:
+            folded.append(keep.pop(0))
+            turn_tokens.pop(0)
+            new_summary = self._merge_summary(summary, folded)
+
+        removals = [RemoveMessage(id=m.id) for turn in folded for m in turn if m.id]
+        originals = {id(m) for m in state["messages"]}
+        replacements = [m for turn in keep for m in turn if id(m) not in originals]
+        if not removals and not replacements:
+            return {}
+        logger.info(
+            f"History: folded {len(folded)} turn(s) into the summary, shortened {len(replacements)} tool result(s); "
+            f"~{pinned_tokens + sum(turn_tokens) + estimate_tokens(new_summary)} tokens kept."
+        )
+        return {"messages": removals + replacements, "summary": new_summary}
+
+
+_manager: Optional[HistoryManager] = None
+
+
+def manage_history(state: AgentState) -> Dict[str, Any]:
+    """The ``history`` node of the graph, configured from the environment."""
+    global _manager
+    if _manager is None:
+        _manager = HistoryManager()
+    return _manager.update(state)
@@ -16,7 +16,7 @@ def get_langfuse_handler() -> CallbackHandler:
         _langfuse_handler = CallbackHandler(
             secret_key=secret_key,
             public_key=public_key,
-            host="https://cloud.langfuse.com"
+            host=os.environ.get("LANGFUSE_HOST", "https://cloud.langfuse.com")
         )
     return _langfuse_handler
 
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import BaseMessage
+
+from agent_common.llm_cache import LLMCache, cache_key, get_llm_cache, should_cache
+
+
+def _temperature(llm_string: str) -> Optional[float]:
+    """Temperature recorded in LangChain's model description, if any."""
+    try:
+        return json.loads(llm_string.split("---", 1)[0]).get("kwargs", {}).get("temperature")
+    except (ValueError, AttributeError):
+        return None
+
+
+class SharedLLMCache(BaseCache):
+    """
+    LangChain cache over the shared two-tier response cache (``agent_common.llm_cache``).
+
+    LangChain hands over the serialized message history (``prompt``) and the
+    model description including bound tools and call parameters
+    (``llm_string``). Both are canonicalized, so generated message and tool call
+    ids do not prevent a match. Replayed messages lose their id, so the graph's
+    ``add_messages`` reducer appends them instead of replacing an earlier one.
+    """
+
+    def __init__(self, cache: Optional[LLMCache] = None) -> None:
+        self._cache = cache
+
+    @property
+    def cache(self) -> LLMCache:
+        if self._cache is None:
+            self._cache = get_llm_cache()
+        return self._cache
+
+    def __repr__(self) -> str:
+        # Part of the model's serialized description, hence of every key: must not vary between runs
+        return f"{type(self).__name__}()"
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        try:
+            messages: Any = json.loads(prompt)
+        except ValueError:
+            messages = prompt
+        return cache_key(llm_string, messages)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not should_cache(_temperature(llm_string)):
+            return None
+        value = self.cache.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+        generations = [loads(generation) for generation in json.loads(value)]
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if isinstance(message, BaseMessage):
+                message.id = None
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not should_cache(_temperature(llm_string)):
+            return
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.cache.put(self._key(prompt, llm_string), value, model="langchain")
+
+    def clear(self, **kwargs: Any) -> None:
+        self.cache.clear()
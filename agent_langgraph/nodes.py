@@ -1,33 +1,49 @@
-from langchain_core.messages import SystemMessage
+import asyncio
+from typing import List, Optional, Tuple
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
 from .agent_state import AgentState
-from .utils import agent_runnable
-from langchain_core.runnables import Runnable
+from .prompts import SYSTEM_MESSAGE, cached_context
+from .utils import agent_runnable, cache_llm
+from langchain_core.runnables import Runnable, RunnableConfig
 
-def assistant(state: AgentState) -> AgentState:
-    """Let LangGraph handle tool use; return model output directly."""
+def _summary_note(state: AgentState) -> str:
+    summary = state.get("summary")
+    return f"Summary of the earlier conversation (oldest first):\n{summary}" if summary else ""
+
+def _model_call(state: AgentState, cached_content: Optional[str]) -> Tuple[Runnable, List[AnyMessage]]:
+    """
+    Model and messages for the next step.
 
-    # If no previous messages, initialize with system prompt
-    if not state['messages']:
-        textual_description_of_tools = """
-        get_weather_info(location: str) -> str:
-        Fetches real-time weather information for a given location using OpenWeatherMap API.
-        retrieve_guest_info(query: str) -> str:
-        Retrieves detailed information about gala guests based on their name or relation.
-        duckduckgo_search(query: str) -> str:
-        Performs a web search using DuckDuckGo to find information on the internet. Use this for general knowledge questions or current events.
-        """
-        
-        sys_prompt = f"""
-        You are a helpful butler named Alfred serving Mr. Wayne and Batman.
-        You can use the tools below:
-        {textual_description_of_tools}
-        """
+    The static system prompt always comes first and is the same object on
+    every call; the summary follows it, so the cacheable prefix never changes.
+    When the prompt and tool declarations are registered as a Gemini cached
+    content, only the conversation is sent, on the cache's versioned model,
+    and the summary becomes a user note.
+    """
+    history = [m for m in state["messages"] if not isinstance(m, SystemMessage)]
+    note = _summary_note(state)
+    if cached_content:
+        # Cached contents already carry the system instruction and tools; the request must not repeat them
+        prefix = [HumanMessage(content=note)] if note else []
+        return cache_llm.bind(cached_content=cached_content), prefix + history
+    prefix = [SYSTEM_MESSAGE] + ([SystemMessage(content=note)] if note else [])
+    return agent_runnable, prefix + history
 
-        state["messages"] = [SystemMessage(content=sys_prompt)]
+def assistant(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Let LangGraph handle tool use; return model output directly."""
+    model, messages = _model_call(state, cached_context())
 
-    # Run the model (which may call tools)
-    result = agent_runnable.invoke(state["messages"])
+    # Run the model (which may call tools); the config carries callbacks, so streamed tokens reach the caller
+    result = model.invoke(messages, config=config)
 
     # Append the result to the message history
     state["messages"].append(result)
-    return state
\ No newline at end of file
+    return state
+
+async def aassistant(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Async variant of :func:`assistant`, used by `react_graph.ainvoke` and `astream_events`."""
+    # Registering the context cache is a blocking HTTP call (once per TTL)
+    model, messages = _model_call(state, await asyncio.to_thread(cached_context))
+    result = await model.ainvoke(messages, config=config)
+    state["messages"].append(result)
+    return state
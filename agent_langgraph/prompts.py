@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent_common.prompt_cache import context_cache_enabled, gemini_schema, get_context_cache, static_prefix
+from agent_common.tool_output import estimate_tokens
+from .utils import GEMINI_CACHE_MODEL, tools
+
+
+def _build_system_prompt() -> str:
+    # No interpolation of per-session or per-call values: the prompt must be byte-identical on every call.
+    # The tool lines come from the bound tools, in their fixed order, so names always match what ToolNode accepts
+    tool_lines = "".join(f"{tool.name}: {tool.description}\n" for tool in tools)
+    return (
+        "You are a helpful butler named Alfred serving Mr. Wayne and Batman.\n"
+        "You can use the tools below:\n"
+        f"{tool_lines}"
+    )
+
+
+# Built once per process and shared by every call, so provider prefix caches can match it
+SYSTEM_PROMPT = static_prefix("langgraph", _build_system_prompt)
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+
+def tool_declarations() -> List[Dict[str, Any]]:
+    """Gemini function declarations of the agent's tools, in a fixed order."""
+    declarations = []
+    for tool in tools:
+        function = convert_to_openai_tool(tool)["function"]
+        declarations.append({
+            "name": function["name"],
+            "description": function.get("description", ""),
+            "parameters": gemini_schema(function.get("parameters", {})),
+        })
+    return declarations
+
+
+_declarations: Optional[List[Dict[str, Any]]] = None
+_prefix_tokens: Optional[int] = None
+
+
+def cached_context() -> Optional[str]:
+    """
+    Name of the Gemini cached content holding the system prompt and tool declarations.
+
+    None when context caching is disabled, the prefix is too small to register
+    or registration failed; the full prompt is sent then. Today's prompt and
+    tools come to a few hundred tokens, well below Gemini's minimum for
+    explicit caches, so this is a no-op decided by one size check per process;
+    the byte-stable prefix is left to Gemini's implicit caching. Registration
+    starts once the prefix grows past ``GEMINI_CONTEXT_CACHE_MIN_TOKENS``.
+    """
+    global _declarations, _prefix_tokens
+    if not context_cache_enabled():
+        return None
+    cache = get_context_cache()
+    if _declarations is None:
+        _declarations = tool_declarations()
+        _prefix_tokens = estimate_tokens(SYSTEM_PROMPT + repr(_declarations))
+    if _prefix_tokens < cache.min_tokens:
+        return None
+    return cache.get(GEMINI_CACHE_MODEL, SYSTEM_PROMPT, _declarations)
@@ -1,20 +1,33 @@
-from langchain_community.retrievers import BM25Retriever
+from typing import List, Tuple
 from langchain.tools import Tool
-from .prepare_dataset import load_and_prepare_docs
+from agent_common.guest_search import get_guest_search
+from agent_common.tool_output import format_guests
 
-docs = load_and_prepare_docs()
-bm25_retriever = BM25Retriever.from_documents(docs)
+# Shared index and memory-mapped guest store; text is only built for the returned hits
+guest_search = get_guest_search()
 
-def retrieve_guest_info(query: str) -> str:
-    """Retrieves detailed information about gala guests based on their name or relation."""
-    results = bm25_retriever.invoke(query)
+def _format_results(query: str, results: List[Tuple[int, float]]) -> str:
+    """Join the ranked guests, keeping the fields relevant to the query within the output budget."""
     if results:
-        return "\n\n".join([doc.page_content for doc in results[:3]])
+        return format_guests(query, guest_search.records(results))
     else:
         return "No matching guest information found."
+
+def retrieve_guest_info(query: str) -> str:
+    """Retrieves detailed information about gala guests based on their name or relation."""
+    return _format_results(query, guest_search.search(query, k=3))
+
+async def aretrieve_guest_info(query: str) -> str:
+    """Async variant of :func:`retrieve_guest_info`; ranking runs off the event loop."""
+    return _format_results(query, await guest_search.asearch(query, k=3))
+
+def retrieve_guest_info_batch(queries: List[str]) -> List[str]:
+    """Retrieves guest information for many queries in a single batched search."""
+    return [_format_results(query, results) for query, results in zip(queries, guest_search.search_batch(queries, k=3))]
     
 guest_info_retriever = Tool(
     name="guest_info_retriever",
     func=retrieve_guest_info,
+    coroutine=aretrieve_guest_info,
     description="Retrieves detailed information about gala guests based on their name or relation."
 )
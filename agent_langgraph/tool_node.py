@@ -0,0 +1,128 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+
+from agent_common.tool_runtime import remaining_budget
+
+DEFAULT_MAX_WORKERS = 4
+# Head start given to the dependencies' own deadlines, which are cut to the same turn budget
+BUDGET_GRACE = 0.5
+
+
+class ConcurrentToolNode(ToolNode):
+    """
+    ``ToolNode`` that runs all tool calls of one ``AIMessage`` concurrently.
+
+    Calls are executed on a bounded pool (``TOOL_MAX_WORKERS``) when the graph
+    is invoked synchronously, or as concurrent coroutines limited by a
+    semaphore of the same size under ``ainvoke``; either way a step takes as
+    long as its slowest tool rather than the sum. The node sets no deadlines
+    of its own: each dependency's :class:`~agent_common.tool_runtime.ToolRuntime`
+    bounds its calls, so a tool returns (with an error) and frees its worker
+    once its deadline passes. As a last resort, a call still running when the
+    turn's latency budget is spent is answered with an error ``ToolMessage``
+    so the model can react. Results are always returned in the original call
+    order.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[Any],
+        *,
+        max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            tools: Tools to expose, as for ``ToolNode``
+            max_workers: Tool calls run at the same time (``TOOL_MAX_WORKERS`` by default)
+            **kwargs: Passed on to ``ToolNode``
+        """
+        super().__init__(tools, **kwargs)
+        self.max_workers = max_workers or int(os.getenv("TOOL_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @staticmethod
+    def _budget() -> Optional[float]:
+        """Seconds the step may wait for its calls: what is left of the turn budget, or None outside one."""
+        remaining = remaining_budget()
+        return None if remaining is None else max(0.0, remaining) + BUDGET_GRACE
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool-call")
+            return self._executor
+
+    @staticmethod
+    def _timed_out(call: Dict[str, Any]) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: {call['name']} did not finish within this turn's latency budget. Answer without it.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _func(
+        self,
+        input: Any,
+        config: RunnableConfig,
+        *,
+        store: Optional[BaseStore],
+    ) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        config_list = get_config_list(config, len(tool_calls))
+        pool = self._pool()
+        budget = self._budget()
+        started = time.monotonic()
+        # Each call keeps the caller's context variables (callbacks, tool budgets)
+        futures = [
+            pool.submit(contextvars.copy_context().run, self._run_one, call, input_type, call_config)
+            for call, call_config in zip(tool_calls, config_list)
+        ]
+
+        outputs: List[Any] = []
+        for call, future in zip(tool_calls, futures):
+            timeout = None if budget is None else max(0.0, started + budget - time.monotonic())
+            try:
+                outputs.append(future.result(timeout=timeout))
+            except FutureTimeoutError:
+                # The worker thread cannot be interrupted; its result is discarded when it finishes
+                future.cancel()
+                outputs.append(self._timed_out(call))
+        return self._combine_tool_outputs(outputs, input_type)
+
+    async def _afunc(
+        self,
+        input: Any,
+        config: RunnableConfig,
+        *,
+        store: Optional[BaseStore],
+    ) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        budget = self._budget()
+
+        async def bounded(call: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self._arun_one(call, input_type, config)
+
+        async def run(call: Dict[str, Any]) -> Any:
+            try:
+                return await asyncio.wait_for(bounded(call), budget)
+            except asyncio.TimeoutError:
+                return self._timed_out(call)
+
+        outputs = await asyncio.gather(*(run(call) for call in tool_calls))
+        return self._combine_tool_outputs(list(outputs), input_type)
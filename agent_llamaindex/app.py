@@ -1,10 +1,14 @@
 from llama_index.core.agent import ReActAgent
-from llama_index.llms.google_genai import GoogleGenAI
 
 import os
 import asyncio
 import logging
 from dotenv import load_dotenv
+from agent_common.async_http import close_async_session
+from agent_common.console import read_line
+from agent_common.streaming import TurnTimer, streaming_enabled
+from agent_common.tool_runtime import turn_budget
+from .llm import CachedGoogleGenAI
 from .utils import tools
 
 # Configure logging
@@ -26,9 +30,16 @@ def initialize_agent():
         exit("API Key not configured. Please set the GEMINI_API_KEY environment variable.")
     
     logger.info("Initializing Gemini model...")
-    llm = GoogleGenAI(
+    endpoint_kwargs = {}
+    gemini_api_base = os.getenv("GEMINI_API_BASE")
+    if gemini_api_base:
+        from google.genai import types
+
+        endpoint_kwargs["http_options"] = types.HttpOptions(base_url=gemini_api_base)
+    llm = CachedGoogleGenAI(
         model_name="models/gemini-1.5-flash",
-        api_key=GEMINI_API_KEY
+        api_key=GEMINI_API_KEY,
+        **endpoint_kwargs
     )
     
     # Create Alfred agent with tools
@@ -41,6 +52,31 @@ def initialize_agent():
 
 async def main():
     """Run the conversational loop for the Alfred agent."""
+    try:
+        await _chat_loop()
+    finally:
+        await close_async_session()
+
+async def stream_chat(alfred: ReActAgent, user_query: str) -> None:
+    """
+    Answer one query with `astream_chat`, printing the answer as it is generated.
+
+    The ReAct steps (thoughts, tool calls and observations) are printed by the
+    verbose agent while they run; the final answer is streamed token by token.
+    """
+    timer = TurnTimer()
+    response = await alfred.astream_chat(user_query)
+    print("\n🎩 Alfred:")
+    async for token in response.async_response_gen():
+        timer.token()
+        print(token, end="", flush=True)
+    print()
+    for source in response.sources:
+        print(f"  ✓ used {source.tool_name}")
+    timer.finish()
+
+async def _chat_loop():
+    """Read queries and answer them with `astream_chat` (or `achat`); the tools are awaited natively."""
     # Initialize agent
     alfred = initialize_agent()
     
@@ -51,31 +87,32 @@ async def main():
 
     while True:
         try:
-            # Get user input
-            user_query = input("You: ").strip()
-            
-            # Handle exit commands
-            if user_query.lower() in ['quit', 'exit']:
-                print("\n🎩 Alfred bids you farewell!")
-                break
-                
-            # Skip empty input
-            if not user_query:
-                continue
+            user_query = (await read_line("You: ")).strip()
+        except (EOFError, asyncio.CancelledError):  # Ctrl+D, or Ctrl+C (asyncio.run delivers it as a cancellation)
+            print("\n🎩 Alfred bids you farewell!")
+            break
 
+        # Handle exit commands
+        if user_query.lower() in ['quit', 'exit']:
+            print("\n🎩 Alfred bids you farewell!")
+            break
+
+        # Skip empty input
+        if not user_query:
+            continue
+
+        try:
             # Process query
             logger.info(f"Processing query: \"{user_query}\"")
-            response = await alfred.achat(user_query)
-
-            # Display response
-            print("\n🎩 Alfred:")
-            print(response)
+            with turn_budget():
+                if streaming_enabled():
+                    await stream_chat(alfred, user_query)
+                else:
+                    response = await alfred.achat(user_query)
+                    print("\n🎩 Alfred:")
+                    print(response)
             print("-" * 30)
-
-        except EOFError:  # Handle Ctrl+D
-            print("\n🎩 Alfred bids you farewell!")
-            break
-        except KeyboardInterrupt:  # Handle Ctrl+C
+        except asyncio.CancelledError:  # Ctrl+C during a turn
             print("\n🎩 Alfred bids you farewell!")
             break
         except Exception as e:
@@ -0,0 +1,81 @@
+from typing import Any, Optional, Sequence
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, ChatResponseAsyncGen, MessageRole
+from llama_index.llms.google_genai import GoogleGenAI
+
+from agent_common.llm_cache import cache_key, get_llm_cache, should_cache
+from agent_common.prompt_cache import check_prefix
+
+
+class CachedGoogleGenAI(GoogleGenAI):
+    """
+    ``GoogleGenAI`` whose ``chat``/``achat``/``astream_chat`` answers are cached (see ``agent_common.llm_cache``).
+
+    The key covers the model, the full message history (the ReAct prompt
+    includes the tool descriptions) and the sampling settings, so replaying an
+    identical turn costs no model call. A cached answer is streamed as a single
+    chunk; a streamed answer is stored once the stream is complete.
+
+    The ReAct system header (instructions and tool descriptions) is checked
+    for byte stability on every call, as Gemini only reuses an identical prefix.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedGoogleGenAI"
+
+    def _cache_key(self, messages: Sequence[ChatMessage], kwargs: Any) -> Optional[str]:
+        # Every chat call passes through here
+        if messages and messages[0].role == MessageRole.SYSTEM:
+            check_prefix("llamaindex", messages[0].content or "")
+        if not should_cache(self.temperature):
+            return None
+        settings = {"temperature": self.temperature, "max_tokens": self.max_tokens, **kwargs}
+        return cache_key(self.metadata.model_name, [m.model_dump(mode="json") for m in messages], settings=settings)
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        key = self._cache_key(messages, kwargs)
+        if key is not None:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return ChatResponse(message=ChatMessage.model_validate_json(cached))
+        response = super().chat(messages, **kwargs)
+        if key is not None:
+            get_llm_cache().put(key, response.message.model_dump_json(), model=self.metadata.model_name)
+        return response
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        key = self._cache_key(messages, kwargs)
+        if key is not None:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return ChatResponse(message=ChatMessage.model_validate_json(cached))
+        response = await super().achat(messages, **kwargs)
+        if key is not None:
+            get_llm_cache().put(key, response.message.model_dump_json(), model=self.metadata.model_name)
+        return response
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseAsyncGen:
+        key = self._cache_key(messages, kwargs)
+        cached = get_llm_cache().get(key) if key is not None else None
+        if cached is not None:
+            message = ChatMessage.model_validate_json(cached)
+
+            async def replay() -> ChatResponseAsyncGen:
+                yield ChatResponse(message=message, delta=message.content)
+
+            return replay()
+        stream = await super().astream_chat(messages, **kwargs)
+        if key is None:
+            return stream
+
+        async def record() -> ChatResponseAsyncGen:
+            last: Optional[ChatResponse] = None
+            async for response in stream:
+                last = response
+                yield response
+            # Only complete answers are stored: an abandoned stream never reaches this point
+            if last is not None:
+                get_llm_cache().put(key, last.message.model_dump_json(), model=self.metadata.model_name)
+
+        return record()
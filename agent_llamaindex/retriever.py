@@ -1,18 +1,29 @@
+from typing import List, Tuple
 from llama_index.core.tools import FunctionTool
-from llama_index.retrievers.bm25 import BM25Retriever
-from .prepare_dataset import load_and_prepare_docs
+from agent_common.guest_search import get_guest_search
+from agent_common.tool_output import format_guests
 
+# Shared index and memory-mapped guest store; text is only built for the returned hits
+guest_search = get_guest_search()
 
-docs = load_and_prepare_docs()
-bm25_retriever = BM25Retriever.from_defaults(nodes=docs)
-
-def get_guest_info_retriever(query: str) -> str:
-    """Retrieves detailed information about gala guests based on their name or relation."""
-    results = bm25_retriever.retrieve(query)
+def _format_results(query: str, results: List[Tuple[int, float]]) -> str:
+    """Join the ranked guests, keeping the fields relevant to the query within the output budget."""
     if results:
-        return "\n\n".join([doc.text for doc in results[:3]])
+        return format_guests(query, guest_search.records(results))
     else:
         return "No matching guest information found."
 
+def get_guest_info_retriever(query: str) -> str:
+    """Retrieves detailed information about gala guests based on their name or relation."""
+    return _format_results(query, guest_search.search(query, k=3))
+
+async def aget_guest_info_retriever(query: str) -> str:
+    """Async variant of :func:`get_guest_info_retriever`; ranking runs off the event loop."""
+    return _format_results(query, await guest_search.asearch(query, k=3))
+
+def get_guest_info_batch(queries: List[str]) -> List[str]:
+    """Retrieves guest information for many queries in a single batched search."""
+    return [_format_results(query, results) for query, results in zip(queries, guest_search.search_batch(queries, k=3))]
+
 # Initialize the tool
-guest_info_retriever = FunctionTool.from_defaults(fn=get_guest_info_retriever, name="guest_info_retriever", description="Retrieve detailed information about gala guests based on their name or relation.")
\ No newline at end of file
+guest_info_retriever = FunctionTool.from_defaults(fn=get_guest_info_retriever, async_fn=aget_guest_info_retriever, name="guest_info_retriever", description="Retrieve detailed information about gala guests based on their name or relation.")
@@ -1,11 +1,13 @@
 import os
 import logging
 from typing import List
-from smolagents import Tool, GradioUI, CodeAgent, DuckDuckGoSearchTool, LiteLLMModel
+from smolagents import Tool, GradioUI, CodeAgent, VisitWebpageTool
 from dotenv import load_dotenv
 
 # Import custom tools and utilities
-from .tools import WeatherInfoTool, HubStatsTool
+from .models import CachedLiteLLMModel
+from .tools import WebSearchTool, WeatherInfoTool, HubStatsTool
+from agent_common.tool_runtime import with_turn_budget
 from .retriever import load_guest_dataset
 from .tracing import (
     initialize_otel_tracing,
@@ -19,16 +21,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def initialize_model() -> LiteLLMModel:
+def initialize_model() -> CachedLiteLLMModel:
     """Initialize and return the Gemini model instance."""
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if not gemini_api_key:
         raise ValueError("GEMINI_API_KEY environment variable not set.")
 
     logger.info("Initializing Gemini model...")
-    return LiteLLMModel(
+    # LiteLLM expects the full model path under GEMINI_API_BASE
+    gemini_api_base = os.getenv("GEMINI_API_BASE")
+    return CachedLiteLLMModel(
         model_id="gemini/gemini-2.0-flash",
         api_key=gemini_api_key,
+        api_base=f"{gemini_api_base}/v1beta/models/gemini-2.0-flash" if gemini_api_base else None,
     )
 
 def initialize_tools() -> List[Tool]:
@@ -38,7 +43,8 @@ def initialize_tools() -> List[Tool]:
         load_guest_dataset(),  # Guest info retriever
         WeatherInfoTool(),     # Weather information
         HubStatsTool(),        # Hugging Face Hub stats
-        DuckDuckGoSearchTool() # Web search
+        WebSearchTool(),       # Web search (cached)
+        VisitWebpageTool()     # Base tool, listed explicitly (see add_base_tools below)
     ]
 
 def setup_tracing(agent: CodeAgent, tracing_enabled: bool) -> None:
@@ -68,10 +74,14 @@ def main() -> None:
         alfred = CodeAgent(
             tools=tools,
             model=model,
-            add_base_tools=True,
+            # Base tools would replace our cached `web_search` with smolagents' own;
+            # the one we still want (visit_webpage) is listed in initialize_tools
+            add_base_tools=False,
             planning_interval=3
         )
         
+        alfred.run = with_turn_budget(alfred.run)
+
         # Setup tracing if enabled
         setup_tracing(alfred, tracing_initialized)
         
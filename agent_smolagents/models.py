@@ -0,0 +1,89 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from smolagents import LiteLLMModel, Tool
+from smolagents.models import ChatMessage
+
+from agent_common.llm_cache import cache_key, get_llm_cache, should_cache
+from agent_common.prompt_cache import check_prefix, context_cache_enabled, get_context_cache
+from agent_common.tool_output import estimate_tokens
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def mark_static_prefix(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Mark the system prompt for Gemini context caching, if it is large enough.
+
+    The system prompt (instructions and tool descriptions) is the static
+    prefix of every step. LiteLLM registers messages carrying
+    ``cache_control`` as a Gemini cached content and sends only the rest. Below
+    ``GEMINI_CONTEXT_CACHE_MIN_TOKENS`` Gemini refuses the registration, so the
+    messages are left unchanged and implicit caching applies.
+    """
+    if not messages or messages[0].get("role") != "system":
+        return messages
+    text = _text(messages[0].get("content"))
+    check_prefix("smolagents", text)
+    if not context_cache_enabled() or estimate_tokens(text) < get_context_cache().min_tokens:
+        return messages
+    system = {
+        **messages[0],
+        "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}],
+    }
+    return [system] + list(messages[1:])
+
+
+class CachedLiteLLMModel(LiteLLMModel):
+    """
+    ``LiteLLMModel`` whose answers are cached (see ``agent_common.llm_cache``).
+
+    The key covers the model id, the message history, the tools offered and
+    every completion setting, so replaying an identical step costs no model
+    call. Cached answers report zero tokens used. A large system prompt is
+    registered as a Gemini cached content (see :func:`mark_static_prefix`).
+    """
+
+    def _cache_key(
+        self,
+        messages: List[Dict[str, Any]],
+        stop_sequences: Optional[List[str]],
+        grammar: Optional[str],
+        tools_to_call_from: Optional[List[Tool]],
+        kwargs: Dict[str, Any],
+    ) -> Optional[str]:
+        settings = {**self.kwargs, **kwargs, "stop_sequences": stop_sequences, "grammar": grammar}
+        if not should_cache(settings.get("temperature")):
+            return None
+        tools = [
+            {"name": tool.name, "description": tool.description, "inputs": tool.inputs, "output_type": tool.output_type}
+            for tool in tools_to_call_from or []
+        ]
+        return cache_key(self.model_id, messages, tools=tools, settings=settings)
+
+    def __call__(
+        self,
+        messages: List[Dict[str, Any]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Tool]] = None,
+        **kwargs: Any,
+    ) -> ChatMessage:
+        messages = mark_static_prefix(messages)
+        key = self._cache_key(messages, stop_sequences, grammar, tools_to_call_from, kwargs)
+        if key is not None:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                self.last_input_token_count = 0
+                self.last_output_token_count = 0
+                return ChatMessage.from_dict(json.loads(cached))
+        message = super().__call__(
+            messages, stop_sequences=stop_sequences, grammar=grammar, tools_to_call_from=tools_to_call_from, **kwargs
+        )
+        if key is not None:
+            get_llm_cache().put(key, message.model_dump_json(), model=self.model_id)
+        return message
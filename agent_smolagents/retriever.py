@@ -1,10 +1,7 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from smolagents import Tool
-from langchain_community.retrievers import BM25Retriever
-# Import the function from prepare_dataset using relative import
-from .prepare_dataset import load_and_prepare_docs
-# Import Document if needed for type hinting (optional but good practice)
-from langchain.docstore.document import Document
+from agent_common.guest_search import GuestSearch, get_guest_search
+from agent_common.tool_output import format_guests
 
 class GuestInfoRetrieverTool(Tool):
     name = "guest_info_retriever"
@@ -17,22 +14,21 @@ class GuestInfoRetrieverTool(Tool):
     }
     output_type = "string"
 
-    def __init__(self, docs: List[Document]) -> None:
+    def __init__(self, guest_search: Optional[GuestSearch] = None) -> None:
         """
-        Initialize the retriever with a list of documents.
+        Initialize the retriever over the shared guest index and store.
         
         Args:
-            docs: List of Document objects containing guest information
+            guest_search: Search to use; defaults to the process-wide search over the invitees snapshot
             
         Raises:
-            ValueError: If docs is empty
+            ValueError: If there are no guests to search
         """
-        if not docs:
-            raise ValueError("Cannot initialize retriever with empty documents list.")
-        
-        print(f"Initializing BM25Retriever with {len(docs)} documents...")
-        self.retriever = BM25Retriever.from_documents(docs)
-        print("BM25Retriever initialized successfully.")
+        print("Loading guest search index...")
+        self.guest_search = guest_search if guest_search is not None else get_guest_search()
+        if self.guest_search.bm25_index.n_docs == 0:
+            raise ValueError("Cannot initialize retriever with an empty guest list.")
+        print(f"Guest search index loaded successfully ({self.guest_search.bm25_index.n_docs} guests).")
 
     def forward(self, query: str) -> str:
         """
@@ -45,14 +41,30 @@ class GuestInfoRetrieverTool(Tool):
             str: Formatted string containing relevant guest information
         """
         print(f"Retriever received query: '{query}'")
-        results = self.retriever.get_relevant_documents(query)
+        results = self.guest_search.search(query, k=3)
         print(f"Retriever found {len(results)} relevant documents.")
+        return self._format_results(query, results)
+
+    def forward_batch(self, queries: List[str]) -> List[str]:
+        """
+        Retrieve guest information for many queries in one batched search.
         
+        Args:
+            queries: Search queries for guest information
+            
+        Returns:
+            List[str]: Formatted guest information for each query, in order
+        """
+        results = self.guest_search.search_batch(queries, k=3)
+        return [self._format_results(query, ranked) for query, ranked in zip(queries, results)]
+
+    def _format_results(self, query: str, results: List[Tuple[int, float]]) -> str:
+        """Format ranked ``(doc_id, score)`` pairs for the agent, within the output budget."""
         if not results:
             return "No matching guest information found."
             
-        # Return top 3 results, clearly separated
-        return "\n\n---\n\n".join([doc.page_content for doc in results[:3]])
+        # Return top 3 results, clearly separated; fields the query does not need are left out
+        return format_guests(query, self.guest_search.records(results), separator="\n\n---\n\n")
 
 def load_guest_dataset() -> GuestInfoRetrieverTool:
     """
@@ -67,13 +79,8 @@ def load_guest_dataset() -> GuestInfoRetrieverTool:
     print("Starting guest dataset loading and tool initialization...")
     
     try:
-        # Load and prepare the documents
-        docs = load_and_prepare_docs()
-        if not docs:
-            raise RuntimeError("Failed to load guest dataset - no documents found.")
-            
-        # Initialize the tool with the documents
-        guest_info_tool = GuestInfoRetrieverTool(docs)
+        # Guests are served from the shared memory-mapped store; no Document list is built
+        guest_info_tool = GuestInfoRetrieverTool()
         print("GuestInfoRetrieverTool is ready.")
         return guest_info_tool
         
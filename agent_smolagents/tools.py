@@ -1,20 +1,9 @@
-from typing import Dict, Any, Optional
+from typing import Optional
 from smolagents import Tool
-from huggingface_hub import list_models
-import os
-import requests
-from dataclasses import dataclass
-
-@dataclass
-class WeatherData:
-    """Data class for weather information."""
-    main_weather: str
-    description: str
-    temp: float
-    feels_like: float
-    humidity: int
-    wind_speed: float
-    city_name: str
+from agent_common.hub_stats import HubStats, format_author_stats, get_hub_stats
+from agent_common.tool_output import output_budget
+from agent_common.weather import weather_api_key, weather_report
+from agent_common.web_search import WebSearch, get_web_search
 
 class WeatherInfoTool(Tool):
     name = "weather_info"
@@ -28,97 +17,69 @@ class WeatherInfoTool(Tool):
     output_type = "string"
 
     def __init__(self) -> None:
-        """Initialize the weather tool with API key."""
-        self.api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-        if not self.api_key:
-            print("Warning: OPENWEATHERMAP_API_KEY environment variable not set. Weather tool will not function.")
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        """Initialize the weather tool, warning if the API key is missing."""
+        weather_api_key()
         self.is_initialized = True
 
-    def _parse_weather_data(self, data: Dict[str, Any]) -> WeatherData:
-        """Parse weather data from API response."""
-        return WeatherData(
-            main_weather=data.get('weather', [{}])[0].get('main', 'N/A'),
-            description=data.get('weather', [{}])[0].get('description', 'N/A'),
-            temp=data.get('main', {}).get('temp', 'N/A'),
-            feels_like=data.get('main', {}).get('feels_like', 'N/A'),
-            humidity=data.get('main', {}).get('humidity', 'N/A'),
-            wind_speed=data.get('wind', {}).get('speed', 'N/A'),
-            city_name=data.get('name', 'Unknown')
-        )
-
-    def _format_weather_output(self, weather: WeatherData) -> str:
-        """Format weather data into a readable string."""
-        return (
-            f"Weather in {weather.city_name}:\n"
-            f"- Condition: {weather.main_weather} ({weather.description})\n"
-            f"- Temperature: {weather.temp}°C (Feels like: {weather.feels_like}°C)\n"
-            f"- Humidity: {weather.humidity}%\n"
-            f"- Wind Speed: {weather.wind_speed} m/s"
-        )
-
     def forward(self, location: str) -> str:
         """Fetch and return weather information for the given location."""
-        if not self.api_key:
-            return "Error: Weather API key not configured."
-
-        params = {
-            'q': location,
-            'appid': self.api_key,
-            'units': 'metric'
-        }
-
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("cod") != 200:
-                error_message = data.get("message", "Unknown API error")
-                return f"Error fetching weather for '{location}': {error_message}"
-
-            weather = self._parse_weather_data(data)
-            return self._format_weather_output(weather)
-
-        except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 401:
-                return f"Error fetching weather for '{location}': Invalid API key or subscription issue."
-            elif response.status_code == 404:
-                return f"Error fetching weather: Location '{location}' not found."
-            return f"HTTP error occurred while fetching weather for '{location}': {http_err}"
-        except requests.exceptions.RequestException as req_err:
-            return f"Error connecting to weather service for '{location}': {req_err}"
-        except Exception as e:
-            return f"An unexpected error occurred while fetching weather for '{location}': {e}"
+        return weather_report(location)
 
 class HubStatsTool(Tool):
     name = "hub_stats"
     description = (
-        "Fetches the most downloaded model from a specific author or organization on the Hugging Face Hub. "
+        "Fetches the most downloaded model from one or more authors or organizations on the Hugging Face Hub. "
         "Use this tool when you need to find popular models from a known entity like 'google', 'facebook', 'microsoft', 'openai', etc. "
-        "Requires the exact Hugging Face username or organization ID."
+        "Requires the exact Hugging Face username or organization ID; several can be given at once, separated by commas."
     )
     inputs = {
         "author": {
             "type": "string",
             "description": (
-                "The exact Hugging Face username or organization ID (e.g., 'google', 'facebook', 'microsoft'). "
+                "The exact Hugging Face username or organization ID (e.g., 'google', 'facebook', 'microsoft'), "
+                "or a comma-separated list of them (e.g., 'google, facebook'). "
                 "Do NOT provide company names like 'Meta' if their Hugging Face ID is different (e.g., use 'facebook' for Meta AI)."
             )
         }
     }
     output_type = "string"
+
+    def __init__(self, hub_stats: Optional[HubStats] = None) -> None:
+        """
+        Initialize the tool over the shared Hub stats service.
+
+        Args:
+            hub_stats: Service to use; defaults to the process-wide, cached one
+        """
+        self.hub_stats = hub_stats if hub_stats is not None else get_hub_stats()
+        self.is_initialized = True
+
     def forward(self, author: str) -> str:
-        """Fetch and return the most downloaded model for the given author."""
-        try:
-            models = list(list_models(author=author, sort="downloads", direction=-1, limit=1))
-            
-            if not models:
-                return f"No models found for author {author}."
-            
-            model = models[0]
-            return f"The most downloaded model by {author} is {model.id} with {model.downloads:,} downloads."
-            
-        except Exception as e:
-            return f"Error fetching models for {author}: {str(e)}"
+        """Fetch and return the most downloaded model for each given author."""
+        # Cached per author (and mirrored to a local snapshot), so repeated questions skip the Hub
+        results = self.hub_stats.lookup(author.split(","))
+        if not results:
+            return f"No models found for author {author}."
+        # One line per author, in the order asked; a long author list is cut to the budget
+        lines = [format_author_stats(stats) for stats in results.values()]
+        return output_budget(self.name).fit_records(lines, separator="\n", noun="author")
+
+class WebSearchTool(Tool):
+    name = "web_search"
+    description = "Performs a duckduckgo web search based on your query (think a Google search) then returns the top search results."
+    inputs = {"query": {"type": "string", "description": "The search query to perform."}}
+    output_type = "string"
+
+    def __init__(self, web_search: Optional[WebSearch] = None) -> None:
+        """
+        Initialize the tool over the shared web search.
+
+        Args:
+            web_search: Search to use; defaults to the process-wide, disk-cached one
+        """
+        self.web_search = web_search if web_search is not None else get_web_search()
+        self.is_initialized = True
 
+    def forward(self, query: str) -> str:
+        """Return the most relevant results for the query, within the configured budgets."""
+        return self.web_search.run(query)
@@ -0,0 +1,96 @@
+"""
+Build and query benchmark for the hybrid guest retrieval channel.
+
+Usage:
+    python -m benchmarks.dense_benchmark --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from agent_common.bm25_index import BM25Index
+from agent_common.dense_index import DEFAULT_NPROBE, DenseIndex
+from agent_common.guest_search import GuestSearch
+from agent_common.query_cache import QueryCache
+from .synthetic import generate_queries, generate_texts
+
+
+def _latencies_ms(fn: Callable[[str], Any], queries: List[str]) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+    }
+
+
+def run(n_docs: int, n_queries: int, nprobe: int) -> Dict[str, Any]:
+    """Benchmark one corpus size and return the measurements."""
+    texts = generate_texts(n_docs)
+    queries = generate_queries(n_queries)
+
+    start = time.perf_counter()
+    bm25 = BM25Index.build(texts)
+    bm25_build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dense = DenseIndex.build(bm25)
+    dense_build_s = time.perf_counter() - start
+
+    # No query cache: repeated synthetic queries would otherwise be timed as cache hits
+    lexical = GuestSearch(bm25, cache=QueryCache(maxsize=0))
+    hybrid = GuestSearch(bm25, dense, nprobe=nprobe, cache=QueryCache(maxsize=0))
+
+    # Recall of the IVF scan against scanning every list; tie-aware, since synthetic
+    # guests often share the exact same similarity
+    approx = dense.search_batch(bm25, queries, 10, nprobe=nprobe)
+    exact = dense.search_batch(bm25, queries, 10, nprobe=dense.nlist)
+    hits = sum(
+        sum(score >= e[-1][1] - 1e-6 for _, score in a)
+        for a, e in zip(approx, exact) if e
+    )
+    total = sum(len(e) for e in exact)
+
+    return {
+        "n_docs": n_docs,
+        "nlist": dense.nlist,
+        "nprobe": nprobe,
+        "bm25_build_s": round(bm25_build_s, 3),
+        "dense_build_s": round(dense_build_s, 3),
+        "bm25": _latencies_ms(lambda q: lexical.search(q, 3), queries),
+        "dense": _latencies_ms(lambda q: dense.search_batch(bm25, [q], 3, nprobe=nprobe), queries),
+        "hybrid": _latencies_ms(lambda q: hybrid.search(q, 3), queries),
+        "ivf_recall_at_10": round(hits / total, 4) if total else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dense + BM25 guest retrieval.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    parser.add_argument("--json", action="store_true", help="Emit one JSON object per size.")
+    args = parser.parse_args()
+
+    for n_docs in args.sizes:
+        result = run(n_docs, args.queries, args.nprobe)
+        if args.json:
+            print(json.dumps(result))
+            continue
+        print(
+            f"{n_docs:>10,} docs | build bm25 {result['bm25_build_s']:.1f}s dense {result['dense_build_s']:.1f}s | "
+            f"p50/p99 ms bm25 {result['bm25']['p50_ms']:.2f}/{result['bm25']['p99_ms']:.2f} "
+            f"dense {result['dense']['p50_ms']:.2f}/{result['dense']['p99_ms']:.2f} "
+            f"hybrid {result['hybrid']['p50_ms']:.2f}/{result['hybrid']['p99_ms']:.2f} | "
+            f"IVF recall@10 {result['ivf_recall_at_10']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Benchmark for the guest retriever tools of the three agents.
+
+Synthetic guest lists in the ``agents-course/unit3-invitees`` schema are written
+as local snapshots, then every (implementation, size) case runs in its own
+subprocess so that cold build time and peak RSS are measured in isolation.
+Each case reports index build time, peak RSS, single-query p50/p99 latency,
+batch QPS and recall@3 against an exhaustive BM25 ranking, as one JSON line.
+Everything runs offline.
+
+Usage:
+    python -m benchmarks.retrieval_benchmark --sizes 1000 10000 100000 1000000 10000000
+    python -m benchmarks.retrieval_benchmark --impls common langgraph --output results.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .synthetic import generate_queries, generate_table
+
+IMPLEMENTATIONS = ("common", "langgraph", "llamaindex", "smolagents")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+K = 3
+# Reference depth used to find every document tied with the k-th reference result
+REFERENCE_DEPTH = 50
+NO_RESULTS = "No matching guest information found."
+
+Retriever = Tuple[Callable[[str], str], Callable[[List[str]], List[str]]]
+
+
+def _load_retriever(impl: str) -> Retriever:
+    """Import one implementation and return its single-query and batch functions."""
+    if impl == "common":
+        from agent_common.guest_search import get_guest_search
+
+        guest_search = get_guest_search()
+        return (
+            lambda query: "\n\n".join(guest_search.texts(guest_search.search(query, K))),
+            lambda queries: ["\n\n".join(guest_search.texts(r)) for r in guest_search.search_batch(queries, K)],
+        )
+    if impl == "langgraph":
+        from agent_langgraph import retriever
+
+        return retriever.retrieve_guest_info, retriever.retrieve_guest_info_batch
+    if impl == "llamaindex":
+        from agent_llamaindex import retriever
+
+        return retriever.get_guest_info_retriever, retriever.get_guest_info_batch
+    if impl == "smolagents":
+        from agent_smolagents.retriever import load_guest_dataset
+
+        tool = load_guest_dataset()
+        return tool.forward, tool.forward_batch
+    raise ValueError(f"Unknown implementation: {impl}")
+
+
+def _guest_blocks(output: str) -> List[str]:
+    """Split a retriever's output back into guest text blocks."""
+    if output.strip() == NO_RESULTS:
+        return []
+    return [block.strip() for block in output.split("\n\n") if block.strip() and block.strip() != "---"]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _recall(outputs: List[str], queries: List[str]) -> Optional[float]:
+    """Tie-aware recall@K of ``outputs`` against exhaustive BM25 over the same index."""
+    from agent_common.guest_search import get_guest_search
+
+    guest_search = get_guest_search()
+    reference = guest_search.bm25_index.score_batch_exhaustive(queries, REFERENCE_DEPTH)
+    hits = total = 0
+    for output, ranking in zip(outputs, reference):
+        if not ranking:
+            continue
+        wanted = min(K, len(ranking))
+        cutoff = ranking[wanted - 1][1]
+        # Compared by the leading "Name: ..." line: tool output leaves out fields and may cut long ones
+        allowed: Set[str] = {
+            text.split("\n", 1)[0]
+            for text in guest_search.store.texts([doc_id for doc_id, score in ranking if score >= cutoff])
+        }
+        hits += min(wanted, sum(block.split("\n", 1)[0] in allowed for block in _guest_blocks(output)))
+        total += wanted
+    return round(hits / total, 4) if total else None
+
+
+def run_case(impl: str, n_queries: int) -> Dict[str, Any]:
+    """Measure one implementation in the current process (the cache dir must hold a snapshot)."""
+    queries = generate_queries(n_queries)
+
+    start = time.perf_counter()
+    single, batch = _load_retriever(impl)
+    build_s = time.perf_counter() - start
+
+    outputs = []
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        outputs.append(single(query))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    batch(queries)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "build_s": round(build_s, 3),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+        "batch_qps": round(len(queries) / max(batch_s, 1e-9), 1),
+        "recall_at_3": _recall(outputs, queries),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _prepare_size(work_dir: str, n_docs: int) -> str:
+    """Write a synthetic snapshot with ``n_docs`` guests and return its cache root."""
+    from agent_common.snapshot import refresh_snapshot
+
+    root = os.path.join(work_dir, f"guests-{n_docs}")
+    os.environ["AGENTIC_RAG_CACHE_DIR"] = root
+    refresh_snapshot(generate_table(n_docs))
+    return root
+
+
+def _case_cache_dir(size_root: str, impl: str) -> str:
+    """Fresh cache root for one case, sharing the size's snapshot but no indexes."""
+    case_root = os.path.join(size_root, "cases", impl)
+    shutil.rmtree(case_root, ignore_errors=True)
+    os.makedirs(case_root)
+    try:
+        os.symlink(os.path.join(size_root, "snapshots"), os.path.join(case_root, "snapshots"), target_is_directory=True)
+    except OSError:
+        shutil.copytree(os.path.join(size_root, "snapshots"), os.path.join(case_root, "snapshots"))
+    return case_root
+
+
+def _spawn_case(impl: str, n_queries: int, cache_dir: str) -> Dict[str, Any]:
+    env = dict(
+        os.environ,
+        AGENTIC_RAG_CACHE_DIR=cache_dir,
+        AGENTIC_RAG_OFFLINE="1",
+        # Every query should hit the retrieval engine, not the result cache
+        GUEST_QUERY_CACHE_SIZE="0",
+    )
+    result_path = os.path.join(cache_dir, "result.json")
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.retrieval_benchmark", "--case", impl,
+         "--queries", str(n_queries), "--result-file", result_path],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {completed.returncode}"}
+    with open(result_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the agents' guest retriever tools.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--impls", nargs="+", choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", help="Append JSON lines to this file as well as printing them.")
+    parser.add_argument("--work-dir", help="Keep snapshots and indexes here instead of a temporary directory.")
+    parser.add_argument("--case", choices=IMPLEMENTATIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        result = run_case(args.case, args.queries)
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="guest-bench-")
+    run_info = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+    try:
+        for n_docs in args.sizes:
+            size_root = _prepare_size(work_dir, n_docs)
+            for impl in args.impls:
+                result = {**run_info, "impl": impl, "n_docs": n_docs, "queries": args.queries}
+                result.update(_spawn_case(impl, args.queries, _case_cache_dir(size_root, impl)))
+                line = json.dumps(result)
+                print(line, flush=True)
+                if args.output:
+                    with open(args.output, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import random
+from typing import Dict, Iterator, List
+
+import pyarrow as pa
+
+from agent_common.ingest import format_guest
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Grace", "Nikola", "Marie", "Albert", "Emmy", "Richard", "Katherine", "Isaac",
+    "Rosalind", "Niels", "Lise", "Werner", "Barbara", "Carl", "Dorothy", "Edwin", "Hedy", "James",
+    "Jane", "Linus", "Margaret", "Max", "Paul", "Rachel", "Srinivasa", "Tim", "Vera", "Wangari",
+]
+LAST_NAMES = [
+    "Lovelace", "Turing", "Hopper", "Tesla", "Curie", "Einstein", "Noether", "Feynman", "Johnson",
+    "Newton", "Franklin", "Bohr", "Meitner", "Heisenberg", "McClintock", "Sagan", "Hodgkin", "Hubble",
+    "Lamarr", "Maxwell", "Goodall", "Pauling", "Hamilton", "Planck", "Dirac", "Carson", "Ramanujan",
+    "Berners-Lee", "Rubin", "Maathai",
+]
+RELATIONS = [
+    "best friend", "old friend from university", "business partner", "colleague", "rival",
+    "neighbor", "cousin", "mentor", "former student", "family friend", "board member", "client",
+]
+PROFESSIONS = [
+    "physicist", "mathematician", "chemist", "astronomer", "biologist", "engineer", "inventor",
+    "programmer", "economist", "architect", "novelist", "composer", "surgeon", "diplomat", "pilot",
+]
+INTERESTS = [
+    "chess", "sailing", "opera", "mountaineering", "gardening", "astronomy", "poetry", "fencing",
+    "cooking", "photography", "jazz", "robotics", "calligraphy", "birdwatching", "cryptography",
+]
+CITIES = [
+    "Gotham", "Metropolis", "London", "Paris", "Vienna", "Geneva", "Kyoto", "Boston", "Oslo",
+    "Prague", "Lisbon", "Cairo", "Nairobi", "Lima", "Sydney",
+]
+
+
+def generate_guest(rng: random.Random, row: int) -> Dict[str, str]:
+    """Generate one guest in the ``agents-course/unit3-invitees`` schema."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    profession = rng.choice(PROFESSIONS)
+    description = (
+        f"A {profession} from {rng.choice(CITIES)} who is passionate about "
+        f"{rng.choice(INTERESTS)} and {rng.choice(INTERESTS)}. "
+        f"Recently worked on a {rng.choice(PROFESSIONS)} project in {rng.choice(CITIES)}."
+    )
+    return {
+        "name": f"{first} {last}",
+        "relation": rng.choice(RELATIONS),
+        "description": description,
+        "email": f"{first.lower()}.{last.lower()}{row}@example.com",
+    }
+
+
+def iter_guests(n_rows: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Yield ``n_rows`` deterministic synthetic guests."""
+    rng = random.Random(seed)
+    for row in range(n_rows):
+        yield generate_guest(rng, row)
+
+
+def generate_table(n_rows: int, seed: int = 0, chunk_rows: int = 100_000) -> pa.Table:
+    """Return ``n_rows`` synthetic guests as an Arrow table, built chunk by chunk."""
+    schema = pa.schema([(column, pa.string()) for column in ("name", "relation", "description", "email")])
+    chunks: List[pa.Table] = []
+    batch: List[Dict[str, str]] = []
+    for guest in iter_guests(n_rows, seed):
+        batch.append(guest)
+        if len(batch) == chunk_rows:
+            chunks.append(pa.Table.from_pylist(batch, schema=schema))
+            batch = []
+    chunks.append(pa.Table.from_pylist(batch, schema=schema))
+    return pa.concat_tables(chunks)
+
+
+def generate_texts(n_rows: int, seed: int = 0) -> List[str]:
+    """Return ``n_rows`` formatted synthetic guest documents."""
+    return [format_guest(guest) for guest in iter_guests(n_rows, seed)]
+
+
+def generate_queries(n_queries: int, seed: int = 1) -> List[str]:
+    """Return a mix of name, relation and descriptive guest queries."""
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        lambda: f"my {rng.choice(RELATIONS)}",
+        lambda: f"the {rng.choice(PROFESSIONS)} who likes {rng.choice(INTERESTS)}",
+        lambda: f"{rng.choice(PROFESSIONS)} from {rng.choice(CITIES)}",
+    ]
+    return [rng.choice(templates)() for _ in range(n_queries)]
@@ -4,12 +4,14 @@ import sys
 import os
 from typing import Dict, Optional
 
-def run_agent(agent_name: str) -> None:
+def run_agent(agent_name: str, stream: Optional[bool] = None, session: Optional[str] = None) -> None:
     """
     Runs the main script for the specified agent.
     
     Args:
         agent_name: Name of the agent to run (smol, llama, or graph)
+        stream: Stream answers as they are generated (sets AGENT_STREAM); None keeps the environment's setting
+        session: Conversation to resume or start (sets AGENT_SESSION); None keeps the environment's setting
     
     Raises:
         SystemExit: If agent_name is invalid or script is not found
@@ -40,8 +42,14 @@ def run_agent(agent_name: str) -> None:
     print(f"--- Running {agent_name} agent ---")
     try:
         module_path = f"{agent_dir}.{main_script.replace('.py', '')}"     
+        env = dict(os.environ)
+        if stream is not None:
+            env["AGENT_STREAM"] = "1" if stream else "0"
+        if session is not None:
+            env["AGENT_SESSION"] = session
         process = subprocess.run(
             [sys.executable, "-m", module_path],
+            env=env,
             check=True,
             capture_output=False,
             text=True
@@ -66,8 +74,19 @@ def main() -> None:
         choices=["smol", "llama", "graph"],
         help="The name of the agent implementation to run."
     )
+    parser.add_argument(
+        "--no-stream",
+        dest="stream",
+        action="store_false",
+        default=None,
+        help="Print each answer only once it is complete instead of streaming it (graph and llama agents)."
+    )
+    parser.add_argument(
+        "--session",
+        help="Conversation to resume or start; kept across restarts (graph agent)."
+    )
     args = parser.parse_args()
-    run_agent(args.agent)
+    run_agent(args.agent, stream=args.stream, session=args.session)
 
 if __name__ == "__main__":
     main()